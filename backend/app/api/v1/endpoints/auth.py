@@ -1,13 +1,16 @@
 from datetime import timedelta, datetime
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from .... import models, schemas
 from ....core.security import (
+    build_token_claims,
     create_access_token,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_and_update_password_async,
     get_current_user,
     get_current_active_user
 )
@@ -22,11 +25,17 @@ async def login(
     db: Session = Depends(get_db)
 ):
     """OAuth2 compatible token login, get an access token for future requests"""
-    user = db.query(models.User).filter(
-        models.User.username == form_data.username
-    ).first()
+    # Queries run in the threadpool and bcrypt in its own executor, keeping both off the event loop
+    user = await run_in_threadpool(_find_user, db, models.User.username == form_data.username)
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if user:
+        password_valid, new_hash = await verify_and_update_password_async(
+            form_data.password, user.hashed_password
+        )
+    else:
+        password_valid, new_hash = False, None
+    
+    if not password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -40,14 +49,30 @@ async def login(
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
+        data=build_token_claims(user), expires_delta=access_token_expires
     )
     
+    await run_in_threadpool(_record_login, db, user, new_hash)
+    
+    return {"access_token": access_token, "token_type": "bearer"}
+
+def _find_user(db: Session, criterion) -> Optional[models.User]:
+    return db.query(models.User).filter(criterion).first()
+
+def _record_login(db: Session, user: models.User, new_hash: Optional[str]) -> None:
+    # Transparently upgrade hashes created with outdated parameters
+    if new_hash:
+        user.hashed_password = new_hash
+    
     # Update last login time
     user.last_login = datetime.utcnow()
     db.commit()
-    
-    return {"access_token": access_token, "token_type": "bearer"}
+
+def _add_user(db: Session, user: models.User) -> models.User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
 
 @router.post("/register", response_model=schemas.User)
 async def register(
@@ -56,9 +81,7 @@ async def register(
 ):
     """Register a new user"""
     # Check if username already exists
-    db_user = db.query(models.User).filter(
-        models.User.username == user_in.username
-    ).first()
+    db_user = await run_in_threadpool(_find_user, db, models.User.username == user_in.username)
     if db_user:
         raise HTTPException(
             status_code=400,
@@ -66,9 +89,7 @@ async def register(
         )
     
     # Check if email already exists
-    db_email = db.query(models.User).filter(
-        models.User.email == user_in.email
-    ).first()
+    db_email = await run_in_threadpool(_find_user, db, models.User.email == user_in.email)
     if db_email:
         raise HTTPException(
             status_code=400,
@@ -83,7 +104,7 @@ async def register(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await get_password_hash_async(user_in.password)
     db_user = models.User(
         username=user_in.username,
         email=user_in.email,
@@ -93,15 +114,19 @@ async def register(
         is_superuser=False
     )
     
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    return db_user
+    return await run_in_threadpool(_add_user, db, db_user)
 
 @router.get("/me", response_model=schemas.User)
-async def read_users_me(current_user: models.User = Depends(get_current_active_user)):
+def read_users_me(
+    current_user: models.User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
     """Get current user."""
+    if current_user.email is None:
+        # Principal built from token claims only; load the full profile
+        current_user = db.query(models.User).filter(models.User.id == current_user.id).first()
+        if current_user is None:
+            raise HTTPException(status_code=404, detail="User not found")
     return current_user
 
 @router.post("/password-reset")
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
 
 from .... import models, schemas
 from ....db.base import get_db
 from ....core.security import get_current_user
+from ....db.query_budget import query_budget
 
 router = APIRouter()
 
@@ -21,11 +22,10 @@ def create_thought_graph(
         created_by=current_user.id if current_user else None
     )
     db.add(db_graph)
-    db.commit()
-    db.refresh(db_graph)
+    db.flush()
     
-    # Create nodes
-    node_map = {}
+    # Create nodes; one flush assigns all ids instead of a commit per node
+    db_nodes = []
     for node in graph.nodes:
         db_node = models.GraphNode(
             graph_id=db_graph.id,
@@ -33,15 +33,21 @@ def create_thought_graph(
             content=node.content,
             position_x=node.position_x,
             position_y=node.position_y,
-            metadata=node.metadata
+            node_metadata=node.metadata
         )
         db.add(db_node)
-        db.commit()
-        db.refresh(db_node)
-        node_map[node.id] = db_node.id
+        db_nodes.append(db_node)
+    db.flush()
+    node_map = {
+        node.id if node.id is not None else index: db_node.id
+        for index, (node, db_node) in enumerate(zip(graph.nodes, db_nodes))
+    }
     
     # Create edges
     for edge in graph.edges:
+        if edge.source_node_id not in node_map or edge.target_node_id not in node_map:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Edge references an unknown node")
         db_edge = models.GraphEdge(
             graph_id=db_graph.id,
             source_node_id=node_map[edge.source_node_id],
@@ -55,14 +61,21 @@ def create_thought_graph(
     db.refresh(db_graph)
     return db_graph
 
-@router.get("/{graph_id}", response_model=schemas.ThoughtGraphResponse)
+@router.get(
+    "/{graph_id}",
+    response_model=schemas.ThoughtGraphResponse,
+    dependencies=[Depends(query_budget(4))]  # user + graph + nodes + edges
+)
 def read_thought_graph(
     graph_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get a specific thought graph by ID"""
-    db_graph = db.query(models.ThoughtGraph).filter(models.ThoughtGraph.id == graph_id).first()
+    db_graph = db.query(models.ThoughtGraph).options(
+        selectinload(models.ThoughtGraph.nodes),
+        selectinload(models.ThoughtGraph.edges)
+    ).filter(models.ThoughtGraph.id == graph_id).first()
     if not db_graph:
         raise HTTPException(status_code=404, detail="Thought graph not found")
     
@@ -72,7 +85,11 @@ def read_thought_graph(
     
     return db_graph
 
-@router.get("/", response_model=schemas.ThoughtGraphListResponse)
+@router.get(
+    "/",
+    response_model=schemas.ThoughtGraphListResponse,
+    dependencies=[Depends(query_budget(5))]  # user + count + graphs + nodes + edges
+)
 def list_thought_graphs(
     skip: int = 0,
     limit: int = 100,
@@ -82,7 +99,11 @@ def list_thought_graphs(
     """List all thought graphs"""
     # In a real app, you'd want to filter by user or implement proper permissions
     total = db.query(models.ThoughtGraph).count()
-    graphs = db.query(models.ThoughtGraph).offset(skip).limit(limit).all()
+    # Eager-load children in one query each instead of two lazy loads per graph
+    graphs = db.query(models.ThoughtGraph).options(
+        selectinload(models.ThoughtGraph.nodes),
+        selectinload(models.ThoughtGraph.edges)
+    ).order_by(models.ThoughtGraph.id).offset(skip).limit(limit).all()
     
     return {
         "total": total,
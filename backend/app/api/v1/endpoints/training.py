@@ -0,0 +1,113 @@
+import asyncio
+import json
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from .... import models, schemas
+from ....config import settings
+from ....core.security import get_current_active_superuser
+from ....services.training_supervisor import read_log_chunk, training_supervisor
+
+router = APIRouter()
+
+# Comment line sent on idle SSE streams so proxies keep the connection open
+SSE_HEARTBEAT_SECONDS = 15.0
+
+@router.get("/status", response_model=schemas.TrainingStatus)
+def read_training_status(
+    current_user: models.User = Depends(get_current_active_superuser)
+):
+    """Get the state of the supervised training job"""
+    return training_supervisor.status()
+
+@router.post("/start", response_model=schemas.TrainingStatus)
+def start_training(
+    start_request: Optional[schemas.TrainingStartRequest] = None,
+    current_user: models.User = Depends(get_current_active_superuser)
+):
+    """Start a training run in the background"""
+    overrides = start_request.overrides if start_request else {}
+    try:
+        return training_supervisor.start(overrides)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to launch training: {e}")
+
+@router.post("/stop", response_model=schemas.TrainingStatus)
+def stop_training(
+    current_user: models.User = Depends(get_current_active_superuser)
+):
+    """Stop the running training job"""
+    return training_supervisor.stop()
+
+@router.get("/logs", response_model=schemas.TrainingLogChunk)
+async def read_training_logs(
+    request: Request,
+    offset: Optional[int] = Query(None, ge=0, description="Byte offset returned as next_offset by the previous call"),
+    max_bytes: int = Query(64 * 1024, gt=0),
+    tail_bytes: int = Query(16 * 1024, ge=0, description="Window read from the end of the log when no offset is given"),
+    follow: bool = Query(False, description="Stream new lines as server-sent events"),
+    last_event_id: Optional[str] = Header(None),
+    current_user: models.User = Depends(get_current_active_superuser)
+):
+    """Incrementally read the training log.
+
+    Clients poll with the returned ``next_offset`` so each call reads only
+    the new bytes. With ``follow=true`` the log is streamed as server-sent
+    events whose ids are byte offsets, so EventSource reconnects resume
+    where they left off via ``Last-Event-ID``.
+    """
+    # The job state is a locked file shared with the other workers, so read it off the event loop
+    log_file, running = await run_in_threadpool(training_supervisor.current_log)
+    if log_file is None or not log_file.exists():
+        raise HTTPException(status_code=404, detail="No training log available")
+
+    max_bytes = min(max_bytes, settings.TRAINING_LOG_MAX_CHUNK_BYTES)
+    if follow:
+        if last_event_id is not None and last_event_id.isdigit():
+            offset = int(last_event_id)
+        return StreamingResponse(
+            _follow_log(request, log_file, offset, max_bytes, tail_bytes),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    chunk = await run_in_threadpool(
+        read_log_chunk, log_file, offset, max_bytes, tail_bytes, not running,
+    )
+    return {"log_file": log_file.name, **chunk}
+
+async def _follow_log(request: Request, log_file, offset, max_bytes: int, tail_bytes: int):
+    last_sent = time.monotonic()
+    while True:
+        if await request.is_disconnected():
+            return
+        # Sample liveness before reading so the final lines are never missed
+        current_log, running = await run_in_threadpool(training_supervisor.current_log)
+        finished = not running or current_log != log_file
+        chunk = await run_in_threadpool(
+            read_log_chunk, log_file, offset, max_bytes, tail_bytes, finished
+        )
+        offset = chunk["next_offset"]
+
+        if chunk["lines"]:
+            data = "".join(f"data: {line}\n" for line in chunk["lines"])
+            yield f"id: {offset}\n{data}\n"
+            last_sent = time.monotonic()
+            # Drain a backlog without sleeping
+            continue
+
+        if finished:
+            status = await run_in_threadpool(training_supervisor.status)
+            yield f"event: end\ndata: {json.dumps(status, ensure_ascii=False)}\n\n"
+            return
+
+        if time.monotonic() - last_sent >= SSE_HEARTBEAT_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(settings.TRAINING_LOG_POLL_INTERVAL_SECONDS)
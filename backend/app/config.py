@@ -9,20 +9,56 @@ class Settings(BaseSettings):
     # CORS settings
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8000"]
     
+    # Production server (app.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # 0 = one worker per usable CPU
+    SERVER_MAX_WORKERS: int = 16
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVER_TIMEOUT_SECONDS: int = 60
+    SERVER_MAX_REQUESTS: int = 10000  # Recycle a worker after this many requests; 0 disables
+    SERVER_ACCESS_LOG: bool = False
+    
+    # Observability
+    METRICS_ENABLED: bool = True  # Request metrics middleware and /metrics
+    PROFILING_TOKEN: Optional[str] = None  # Secret for the X-Profile header; unset disables profiling
+    PROFILING_MAX_PER_MINUTE: int = 6
+    PROFILING_INTERVAL_MS: float = 1.0
+    PROFILING_OUTPUT_DIR: str = "logs/profiles"
+    QUERY_DEBUG: bool = False  # Log SQL statements per request and check endpoint query budgets
+    
     # Database settings
     POSTGRES_SERVER: str = "localhost"
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "ontothink"
     DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PREWARM: int = 2  # Connections opened at startup; 0 disables
     
     # Security
     SECRET_KEY: str = "your-secret-key-here"  # Change this in production
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    PASSWORD_HASH_ROUNDS: int = 12  # bcrypt work factor; changing it rehashes passwords on login
+    PASSWORD_HASH_WORKERS: int = 4  # Threads for bcrypt; 0 hashes inline on the event loop
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60.0  # 0 disables the principal cache
+    AUTH_USER_CACHE_MAX_SIZE: int = 10000
+    # Build the principal from signed is_active/is_superuser claims without a DB lookup.
+    # Deactivation then only takes effect when the token expires.
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
     
     # Model settings
     DEEPSEEK_API_KEY: Optional[str] = None
     
+    # Training control
+    TRAINING_CONFIG_PATH: Optional[str] = None  # Defaults to OntoThinkTrainingManager's built-in config
+    TRAINING_STATE_PATH: str = "data/training/supervisor.json"  # Job state shared by all server workers
+    TRAINING_STOP_TIMEOUT_SECONDS: float = 30.0  # Grace period before SIGKILL
+    TRAINING_LOG_MAX_CHUNK_BYTES: int = 256 * 1024
+    TRAINING_LOG_POLL_INTERVAL_SECONDS: float = 1.0
+    
     class Config:
         case_sensitive = True
         env_file = ".env"
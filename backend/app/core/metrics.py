@@ -0,0 +1,141 @@
+"""In-process request metrics rendered in the Prometheus text format.
+
+Metrics are kept per process. Under the multi-worker server each scrape of
+``/metrics`` reports the worker that served it, so scrape workers
+individually (or run one worker per container) when exact totals matter.
+"""
+import time
+from contextvars import ContextVar
+from typing import Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Dialect, Engine
+
+from .metrics_registry import (  # noqa: F401 (re-exported)
+    DEFAULT_LATENCY_BUCKETS, SIZE_BUCKETS, QUERY_COUNT_BUCKETS, Counter, Gauge, Histogram, MetricsRegistry, registry
+)
+
+
+REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status"))
+LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served")
+REQUEST_SIZE = registry.histogram(
+    "http_request_size_bytes", "HTTP request body size", ("method", "route"), SIZE_BUCKETS)
+RESPONSE_SIZE = registry.histogram(
+    "http_response_size_bytes", "HTTP response body size", ("method", "route"), SIZE_BUCKETS)
+DB_QUERIES = registry.histogram(
+    "http_request_db_queries", "SQL statements executed per request", ("method", "route"), QUERY_COUNT_BUCKETS)
+DB_TIME = registry.histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL statements per request", ("method", "route"))
+
+
+class RequestDBStats:
+    """SQL statement count and time accumulated for one request."""
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Set by the middleware; sync endpoints see it too because worker threads
+# run with a copy of the request's context
+current_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("current_db_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append((cursor, time.perf_counter()))
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _, started = conn.info["query_start_time"].pop()
+    stats = current_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += time.perf_counter() - started
+
+
+# handle_error is a dialect event in SQLAlchemy 2.0
+@event.listens_for(Dialect, "handle_error")
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time so
+    # it isn't taken for the start of the next statement on this pooled connection.
+    # Errors raised before the statement was sent have no entry for their cursor.
+    connection = context.connection
+    cursor = getattr(context.execution_context, "cursor", None)
+    starts = connection.info.get("query_start_time") if connection is not None else None
+    if starts and cursor is not None and starts[-1][0] is cursor:
+        _, started = starts.pop()
+        stats = current_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status, sizes and SQL usage.
+
+    Routes are labelled by their path template (``/thought-graphs/{graph_id}``)
+    to keep label cardinality bounded. A ``Server-Timing`` header reports the
+    SQL share of each request so slow calls can be split into SQL vs Python
+    and serialization time from the browser.
+    """
+
+    def __init__(self, app, exclude_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestDBStats()
+        token = current_db_stats.set(stats)
+        start = time.perf_counter()
+        request_size = 0
+        response_size = 0
+        status_code = 500
+
+        async def receive_wrapper():
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_size, status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timing = (f"db;dur={stats.seconds * 1000:.1f};desc=\"{stats.queries} queries\", "
+                          f"app;dur={(time.perf_counter() - start) * 1000:.1f}")
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode("latin-1"))
+                ]}
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            current_db_stats.reset(token)
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            elapsed = time.perf_counter() - start
+
+            REQUESTS.inc(method, route_label, str(status_code))
+            LATENCY.observe(elapsed, method, route_label)
+            REQUEST_SIZE.observe(request_size, method, route_label)
+            RESPONSE_SIZE.observe(response_size, method, route_label)
+            DB_QUERIES.observe(stats.queries, method, route_label)
+            DB_TIME.observe(stats.seconds, method, route_label)
@@ -0,0 +1,243 @@
+"""Opt-in profiling of individual requests.
+
+A request is profiled when it carries the ``X-Profile`` header (or the
+``__profile`` query parameter) set to ``PROFILING_TOKEN``. Profiling is off
+while the token is unset, and profiled requests are rate limited and
+serialized, so it can stay enabled in production.
+
+The profiler samples stacks with ``sys._current_frames()``. Unlike cProfile or
+pyinstrument it also sees the threadpool, where sync endpoints such as the
+graph reads run. Samples come from the event-loop thread and the AnyIO worker
+threads, dropping stacks parked in the selector or an idle wait; a concurrent
+request on the same worker can therefore show up in the profile.
+
+Output is written to ``PROFILING_OUTPUT_DIR`` as folded stacks (loadable by
+speedscope or flamegraph.pl) plus a text summary. The file name is returned in
+``X-Profile-File``. With ``X-Profile-Mode: return`` the summary and folded
+stacks replace the response body instead; streaming responses (no
+``Content-Length``, e.g. server-sent events) are passed through unchanged in
+that mode, with ``X-Profile-Status: streaming`` and the profile saved to a file.
+"""
+import hmac
+import logging
+import os
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_STDLIB = sysconfig.get_paths()["stdlib"]
+WORKER_THREAD_PREFIX = "AnyIO worker thread"
+
+
+# Leaf frames of a thread that is parked rather than working
+_IDLE_LEAVES = {("selectors.py", "select"), ("threading.py", "wait"), ("queue.py", "get")}
+
+
+def _is_idle(code) -> bool:
+    return code.co_filename.startswith(_STDLIB) and (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES
+
+
+class StackSampler:
+    """Background thread aggregating stack samples of the target threads."""
+
+    def __init__(self, loop_thread_id: int, interval: float):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.idle_count = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _target_threads(self) -> List[int]:
+        ids = [self.loop_thread_id]
+        ids.extend(t.ident for t in threading.enumerate() if t.name.startswith(WORKER_THREAD_PREFIX))
+        return ids
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            self.sample_count += 1
+            for thread_id in self._target_threads():
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                if _is_idle(frame.f_code):
+                    self.idle_count += 1
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.samples[tuple(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        """Stacks in the folded format: ``root;caller;callee count``."""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+    def summary(self, label: str, elapsed: float, top: int = 25) -> str:
+        total = sum(self.samples.values()) or 1
+        self_time: Counter = Counter()
+        cumulative: Counter = Counter()
+        for stack, count in self.samples.items():
+            self_time[stack[-1]] += count
+            for name in set(stack):
+                cumulative[name] += count
+
+        lines = [
+            f"{label}",
+            f"wall time {elapsed * 1000:.1f} ms, {self.sample_count} sampling ticks "
+            f"every {self.interval * 1000:.1f} ms, {total} active and {self.idle_count} idle thread samples",
+            "",
+            "Top functions by self samples:",
+        ]
+        lines += [f"  {count / total:6.1%}  {name}" for name, count in self_time.most_common(top)]
+        lines += ["", "Top functions by cumulative samples:"]
+        lines += [f"  {count / total:6.1%}  {name}" for name, count in cumulative.most_common(top)]
+        return "\n".join(lines) + "\n"
+
+
+class _RateLimiter:
+    """Token bucket allowing ``per_minute`` profiles, one at a time."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self.busy = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.per_minute, self.tokens + (now - self.updated) * self.per_minute / 60)
+            self.updated = now
+            if self.busy or self.tokens < 1:
+                return False
+            self.tokens -= 1
+            self.busy = True
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.busy = False
+
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _is_streaming(headers: List[Tuple[bytes, bytes]]) -> bool:
+    """Whether a response is streamed: no Content-Length, or server-sent events."""
+    names = {k.lower(): v for k, v in headers}
+    return b"content-length" not in names or names.get(b"content-type", b"").startswith(b"text/event-stream")
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.limiter = _RateLimiter(settings.PROFILING_MAX_PER_MINUTE)
+
+    def _requested(self, scope) -> Tuple[bool, bool]:
+        """Return (profile requested with a valid token, return profile in the body)."""
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        supplied = headers.get("x-profile")
+        if supplied is None and scope.get("query_string"):
+            supplied = parse_qs(scope["query_string"].decode("latin-1")).get("__profile", [None])[0]
+        # compare_digest only accepts ASCII str, so compare the encoded bytes
+        if not supplied or not hmac.compare_digest(supplied.encode("utf-8"),
+                                                   settings.PROFILING_TOKEN.encode("utf-8")):
+            return False, False
+        return True, headers.get("x-profile-mode", "").lower() == "return"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_TOKEN:
+            await self.app(scope, receive, send)
+            return
+
+        requested, return_profile = self._requested(scope)
+        if not requested:
+            await self.app(scope, receive, send)
+            return
+
+        if not self.limiter.acquire():
+            async def send_rate_limited(message):
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": list(message.get("headers", [])) + [
+                        (b"x-profile-status", b"rate-limited")]}
+                await send(message)
+            await self.app(scope, receive, send_rate_limited)
+            return
+
+        label = f"{scope['method']} {scope['path']}"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{_UNSAFE_CHARS.sub('_', label)[:80]}"
+        sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL_MS / 1000)
+        response_status: Optional[int] = None
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal response_status, streaming
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+                headers = list(message.get("headers", []))
+                streaming = _is_streaming(headers)
+                if return_profile and not streaming:
+                    # The profile replaces the endpoint's response
+                    return
+                headers.append((b"x-profile-file", f"{name}.folded".encode("latin-1")))
+                if return_profile:
+                    # A stream may never end, so its profile can't be returned in the body
+                    headers.append((b"x-profile-status", b"streaming"))
+                message = {**message, "headers": headers}
+            elif return_profile and not streaming:
+                # Only the status of a replaced response is reported; its body is dropped
+                return
+            await send(message)
+
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            self.limiter.release()
+            elapsed = time.perf_counter() - start
+            summary = sampler.summary(label, elapsed)
+            folded = sampler.folded()
+            self._save(name, summary, folded)
+
+        if return_profile and not streaming:
+            status = response_status if response_status is not None else 500
+            body = f"response status {status}\n\n{summary}\n# folded stacks\n{folded}".encode("utf-8")
+            await send({"type": "http.response.start", "status": 200, "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ]})
+            await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _save(name: str, summary: str, folded: str) -> None:
+        try:
+            output_dir = Path(settings.PROFILING_OUTPUT_DIR)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            (output_dir / f"{name}.txt").write_text(summary, encoding="utf-8")
+            (output_dir / f"{name}.folded").write_text(folded, encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Failed to save request profile {name}: {e}")
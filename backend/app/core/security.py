@@ -1,31 +1,106 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import Optional, Dict, Any, Tuple, TYPE_CHECKING
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from ..config import settings
 from ..db.base import get_db
 from ..models.user import User
+from .user_cache import user_cache
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib and jose are imported on first use to keep app import time down;
+# the lifespan hook in app.main loads them at startup
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+_pwd_context: Optional["CryptContext"] = None
+
+# bcrypt releases the GIL, so a bounded thread pool runs hashes in parallel
+# while keeping the event loop free and capping CPU spent on login bursts
+_hash_executor: Optional[ThreadPoolExecutor] = None
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+def get_pwd_context() -> "CryptContext":
+    """Password hashing context.
+
+    min/max rounds pin the work factor so hashes created with a different
+    PASSWORD_HASH_ROUNDS are flagged for rehash on the next login.
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+            bcrypt__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+            bcrypt__max_rounds=settings.PASSWORD_HASH_ROUNDS,
+        )
+    return _pwd_context
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Generate a password hash."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash if its parameters are outdated."""
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="password-hash",
+        )
+    return _hash_executor
+
+async def _run_hash_job(func, *args):
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        # Inline hashing on the event loop (the pre-pool behaviour)
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), func, *args)
+
+def prewarm_security() -> None:
+    """Load jose, passlib and the bcrypt backend, and start the hash pool."""
+    import jose.jwt  # noqa: F401
+
+    get_pwd_context().handler("bcrypt").get_backend()
+    if settings.PASSWORD_HASH_WORKERS > 0:
+        _get_hash_executor()
+
+def shutdown_security() -> None:
+    """Stop the password hash pool."""
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False)
+        _hash_executor = None
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash without blocking the event loop."""
+    return await _run_hash_job(get_password_hash, password)
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password (and compute any rehash) without blocking the event loop."""
+    return await _run_hash_job(verify_and_update_password, plain_password, hashed_password)
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -35,11 +110,22 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
+def build_token_claims(user: User) -> Dict[str, Any]:
+    """Claims identifying a user; act/su let get_current_user skip the DB when trusted."""
+    return {
+        "sub": str(user.id),
+        "usr": user.username,
+        "act": bool(user.is_active),
+        "su": bool(user.is_superuser),
+    }
+
 async def get_current_user(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
     """Get the current user from the JWT token."""
+    from jose import JWTError, jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -48,18 +134,38 @@ async def get_current_user(
     
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        user_id: int = payload.get("sub")
-        if user_id is None:
+        sub = payload.get("sub")
+        if sub is None:
             raise credentials_exception
-    except JWTError:
+        user_id = int(sub)
+    except (JWTError, ValueError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    # Most requests are served from the principal cache without a DB round trip
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and "act" in payload:
+        # Partial principal from signed claims; email and timestamps are not set
+        return User(
+            id=user_id,
+            username=payload.get("usr"),
+            is_active=payload["act"],
+            is_superuser=payload.get("su", False),
+        )
+    
+    # Run the lookup off the event loop so a slow query doesn't stall other requests
+    user = await run_in_threadpool(_load_user, db, user_id)
     if user is None:
         raise credentials_exception
     
+    user_cache.put(user)
     return user
 
+def _load_user(db: Session, user_id: int) -> Optional[User]:
+    return db.query(User).filter(User.id == user_id).first()
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -67,3 +173,14 @@ async def get_current_active_user(
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+async def get_current_active_superuser(
+    current_user: User = Depends(get_current_active_user)
+) -> User:
+    """Get the current active user, requiring superuser privileges."""
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges"
+        )
+    return current_user
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from ..config import settings
+from ..models.user import User
+
+
+class TTLCache:
+    """A small thread-safe LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Columns copied into the cache; the password hash never leaves the database row
+_SNAPSHOT_EXCLUDE = {"hashed_password"}
+
+
+def snapshot_user(user: User) -> Dict[str, Any]:
+    """Copy the column values of a user into a plain dict."""
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(User).column_attrs
+        if attr.key not in _SNAPSHOT_EXCLUDE
+    }
+
+
+def user_from_snapshot(snapshot: Dict[str, Any]) -> User:
+    """Build a detached User from a snapshot.
+
+    The instance is not bound to any session, so it is safe to share across
+    requests; callers that need to modify the user must load it from their
+    own session.
+    """
+    return User(**snapshot)
+
+
+class UserCache:
+    """Principal cache used by ``get_current_user``, keyed by user id.
+
+    Entries are dropped when a user row is updated or deleted through the ORM
+    in this process; other workers see the change once the TTL expires.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self._cache = TTLCache(ttl, max_size)
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, ttl: float, max_size: int) -> None:
+        self._cache.ttl = ttl
+        self._cache.max_size = max_size
+        self._cache.clear()
+
+    def get(self, user_id: int) -> Optional[User]:
+        snapshot = self._cache.get(user_id)
+        if snapshot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return user_from_snapshot(snapshot)
+
+    def put(self, user: User) -> None:
+        self._cache.set(user.id, snapshot_user(user))
+
+    def invalidate(self, user_id: int) -> None:
+        self._cache.invalidate(user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+def _register_invalidation(cache: UserCache) -> None:
+    """Drop cached users on ORM updates/deletes.
+
+    Entries are dropped at flush and again after commit, so a concurrent
+    request cannot re-cache the pre-commit row. Bulk ``query.update()``
+    bypasses mapper events and relies on the TTL instead.
+    """
+    def on_change(mapper, connection, target):
+        if target.id is None:
+            return
+        cache.invalidate(target.id)
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault("invalidated_user_ids", set()).add(target.id)
+
+    def on_commit(session):
+        for user_id in session.info.pop("invalidated_user_ids", ()):
+            cache.invalidate(user_id)
+
+    event.listen(User, "after_update", on_change)
+    event.listen(User, "after_delete", on_change)
+    event.listen(Session, "after_commit", on_commit)
+
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_TTL_SECONDS, settings.AUTH_USER_CACHE_MAX_SIZE)
+_register_invalidation(user_cache)
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from ..core.metrics_registry import registry
+from .config import LLM_CACHE_PATH, LLM_CACHE_MODE, LLM_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOOKUPS = registry.counter(
+    "llm_cache_lookups_total", "Completion cache lookups by result", ("result",))
+
+CACHE_MODES = ("off", "readwrite", "readonly")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_completions_last_used ON completions (last_used_at);
+"""
+
+
+def completion_key(payload: Dict[str, Any]) -> str:
+    """Content address of a chat completion request.
+
+    Only the fields that determine the output take part: model, messages,
+    temperature, max_tokens and seed. Transport options such as ``stream``
+    do not, so streamed and non-streamed calls share entries.
+    """
+    material = {
+        "model": payload.get("model"),
+        "messages": payload.get("messages"),
+        "temperature": payload.get("temperature"),
+        "max_tokens": payload.get("max_tokens"),
+        "seed": payload.get("seed"),
+    }
+    canonical = json.dumps(material, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """SQLite store of chat completion responses, keyed by ``completion_key``.
+
+    Modes:
+        readwrite: replay hits and store new validated completions.
+        readonly: replay hits only; nothing is written, not even usage
+            timestamps, and callers should not query the API on a miss,
+            so a rebuild from the cache is deterministic.
+        off: every lookup misses and nothing is stored.
+
+    Responses are stored zlib-compressed. When the stored bytes exceed
+    ``max_bytes`` the least recently used entries are evicted down to 90% of
+    the cap.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, mode: str = LLM_CACHE_MODE,
+                 max_bytes: int = LLM_CACHE_MAX_BYTES):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}; expected one of {', '.join(CACHE_MODES)}")
+        self.path = path
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+        if mode != "off":
+            self._open()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def readonly(self) -> bool:
+        return self.mode == "readonly"
+
+    def _open(self) -> None:
+        if self.readonly:
+            if not os.path.exists(self.path):
+                logger.warning(f"Completion cache {self.path} does not exist; every lookup will miss")
+                return
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+
+    def get(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Cached response for the request, or None."""
+        if self._conn is None:
+            return None
+        key = completion_key(payload)
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is not None and not self.readonly:
+                self._conn.execute(
+                    "UPDATE completions SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+        CACHE_LOOKUPS.inc("hit" if row else "miss")
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, payload: Dict[str, Any], response: Dict[str, Any]) -> None:
+        """Store a response; a no-op unless the cache is writable."""
+        if self._conn is None or self.readonly:
+            return
+        key = completion_key(payload)
+        body = zlib.compress(json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM completions WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, body, size, created_at, last_used_at, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, payload.get("model", ""), body, len(body), now, now))
+            self._total_bytes += len(body) - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        rows = self._conn.execute("SELECT key, size FROM completions ORDER BY last_used_at").fetchall()
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self._total_bytes -= size
+            evicted += 1
+        logger.info(f"Evicted {evicted} cached completions; cache now {self._total_bytes} bytes")
+
+    def stats(self) -> Dict[str, Any]:
+        if self._conn is None:
+            return {"mode": self.mode, "entries": 0, "bytes": 0}
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        return {"mode": self.mode, "entries": entries, "bytes": self._total_bytes, "max_bytes": self.max_bytes}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
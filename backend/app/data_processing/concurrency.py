@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+from ..core.metrics_registry import registry
+from .config import (
+    MIN_CONCURRENT_REQUESTS, MAX_CONCURRENT_REQUESTS_CEILING,
+    CONCURRENCY_DECREASE_FACTOR, RETRY_BASE_DELAY, RETRY_MAX_DELAY
+)
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY_LIMIT = registry.gauge(
+    "deepseek_concurrency_limit", "Current adaptive limit on in-flight DeepSeek API requests")
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "deepseek_requests_in_flight", "DeepSeek API requests currently in flight")
+THROTTLE_EVENTS = registry.counter(
+    "deepseek_throttle_events_total", "Throttled or failed DeepSeek API responses", ("reason",))
+
+RATE_LIMIT_WAITS = registry.counter(
+    "deepseek_rate_limit_wait_seconds_total", "Time requests waited for the request rate limit")
+
+# Statuses worth retrying; anything else in 4xx is a request problem
+RETRYABLE_STATUSES = {408, 409, 425, 429}
+
+
+def is_retryable_status(status_code: int) -> bool:
+    return status_code in RETRYABLE_STATUSES or status_code >= 500
+
+
+def retry_after_seconds(response: Optional[httpx.Response]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Delay before retry number ``attempt + 1``.
+
+    A server hint wins; otherwise capped exponential backoff with full jitter,
+    so concurrent workers that failed together do not retry together.
+    """
+    if retry_after is not None:
+        return min(retry_after, RETRY_MAX_DELAY)
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on in-flight requests.
+
+    Each success while the window is full raises the limit by ``1 / limit``
+    (about +1 per round trip of the whole window); a throttle or server error
+    multiplies it by ``decrease_factor``, at most once per round trip so a
+    burst of failures from the same window counts as one signal. A
+    Retry-After hint also pauses new requests until it has elapsed.
+    """
+
+    def __init__(self, initial_limit: int, min_limit: int = MIN_CONCURRENT_REQUESTS,
+                 max_limit: int = MAX_CONCURRENT_REQUESTS_CEILING,
+                 decrease_factor: float = CONCURRENCY_DECREASE_FACTOR):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.decrease_factor = decrease_factor
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+        self.round_trip = 1.0  # Smoothed request latency in seconds
+        self._condition: Optional[asyncio.Condition] = None
+        CONCURRENCY_LIMIT.set(value=int(self.limit))
+
+    @property
+    def current_limit(self) -> int:
+        return int(self.limit)
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Created lazily so the limiter is bound to the loop that uses it
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def reset_loop(self) -> None:
+        """Forget waiters bound to a previous event loop."""
+        self._condition = None
+        self.in_flight = 0
+
+    async def acquire(self) -> None:
+        while True:
+            pause = self.paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            condition = self._get_condition()
+            async with condition:
+                if self.in_flight < self.current_limit and self.paused_until <= time.monotonic():
+                    self.in_flight += 1
+                    REQUESTS_IN_FLIGHT.set(value=self.in_flight)
+                    return
+                await condition.wait()
+
+    async def release(self) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            REQUESTS_IN_FLIGHT.set(value=self.in_flight)
+            condition.notify_all()
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.release()
+
+    def _set_limit(self, limit: float) -> None:
+        previous = self.current_limit
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+        if self.current_limit != previous:
+            log = logger.warning if self.current_limit < previous else logger.debug
+            log(f"DeepSeek concurrency limit {previous} -> {self.current_limit}")
+            CONCURRENCY_LIMIT.set(value=self.current_limit)
+
+    def on_success(self, latency: Optional[float] = None) -> None:
+        """Record a successful call; call it before releasing the slot."""
+        if latency is not None:
+            self.round_trip = 0.8 * self.round_trip + 0.2 * latency
+        # Only grow when the limit is what holds callers back
+        if self.in_flight >= self.current_limit:
+            self._set_limit(self.limit + 1.0 / self.limit)
+
+    def on_throttle(self, reason: str, retry_after: Optional[float] = None) -> None:
+        """Record a 429, 5xx or transport failure and back off."""
+        now = time.monotonic()
+        if retry_after:
+            self.paused_until = max(self.paused_until, now + min(retry_after, RETRY_MAX_DELAY))
+        THROTTLE_EVENTS.inc(reason)
+        # One decrease per round trip: failures already in flight share the cause
+        if now - self._last_decrease < self.round_trip:
+            return
+        self._last_decrease = now
+        self._set_limit(self.limit * self.decrease_factor)
+
+
+class RequestRateLimiter:
+    """Paces request starts to ``requests_per_minute`` with bursts of up to ``burst``.
+
+    A generic cell rate algorithm: each request pushes a theoretical arrival
+    time forward by one interval, and a caller only waits when that time is
+    more than ``burst`` intervals ahead. Unlike fixed sleeps, idle time is
+    only spent when requests would actually exceed the rate. A rate of 0
+    disables pacing. The state is plain numbers, so it works across event
+    loops and threads.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int = 1):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self.burst = max(1, burst)
+        self._arrival = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Claim the next request slot; returns how long to wait before using it."""
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            arrival = max(self._arrival, now)
+            wait = max(0.0, arrival - (self.burst - 1) * self.interval - now)
+            self._arrival = arrival + self.interval
+        if wait:
+            RATE_LIMIT_WAITS.inc(amount=wait)
+        return wait
+
+    async def acquire(self) -> None:
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
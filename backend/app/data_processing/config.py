@@ -19,15 +19,59 @@ PRESENCE_PENALTY = 0.0
 TIMEOUT = 60  # Increased timeout for complex philosophical queries
 MAX_RETRIES = 5  # Increased retries for better reliability
 
+GENERATION_SEED = None  # Sent as "seed" when set; part of the completion cache key
+STREAM_COMPLETIONS = True  # Stream completions and abort invalid structure early
+STREAM_ABORT_RETRIES = 2  # Immediate regenerations after an aborted stream
+QUESTIONS_PER_REQUEST = 1  # Seed questions packed into one request; 1 disables batching
+BATCH_MAX_TOKENS = 8000  # max_tokens for batched requests (the API caps output at 8K)
+
+# HTTP Connection Pool
+CONNECT_TIMEOUT = 10  # Seconds to establish a connection; TIMEOUT bounds reads
+POOL_MAX_CONNECTIONS = 10  # Upper bound on open connections to the API
+POOL_MAX_KEEPALIVE = 10  # Idle connections kept alive for reuse
+POOL_KEEPALIVE_EXPIRY = 30  # Seconds an idle connection is kept
+HTTP2_ENABLED = False  # Requires the optional h2 package
+
 # File Paths
 SEED_QUESTIONS_FILE = os.path.join(DATA_DIR, 'seed_questions.json')
 EXPANDED_DATASET_FILE = os.path.join(DATA_DIR, 'philosophical_debates.json')
 LOG_FILE = os.path.join(LOG_DIR, 'philosophy_data_generation.log')
+RUN_LOG_DIR = os.path.join(LOG_DIR, 'generation_runs')  # Per-call JSONL telemetry, one file per run
+
+# Token Pricing (CNY per million tokens, deepseek-chat list price; used for run cost reports)
+PROMPT_TOKEN_PRICE = 2.0
+COMPLETION_TOKEN_PRICE = 8.0
+
+# Completion Cache
+LLM_CACHE_PATH = os.path.join(DATA_DIR, 'cache', 'llm_completions.sqlite3')
+LLM_CACHE_MODE = "readwrite"  # readwrite, readonly (replay only, no API calls on miss) or off
+LLM_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Least recently used entries are evicted above this
+
+# Shared Work Queue (several expander processes splitting the seed questions)
+WORK_QUEUE_PATH = os.path.join(DATA_DIR, 'queue', 'seed_questions.sqlite3')
+QUEUE_LEASE_SECONDS = 300  # A leased question is handed to another worker if not renewed within this
+QUEUE_HEARTBEAT_INTERVAL = 60  # Seconds between lease renewals of a running worker
+QUEUE_MAX_ATTEMPTS = 3  # Leases of one question before it is marked failed
+
+# Near-Duplicate Seed Filtering (MinHash/LSH over character shingles)
+NEAR_DUPLICATE_THRESHOLD = 0.7  # Jaccard similarity at which a seed question counts as a duplicate; 0 disables
+NEAR_DUPLICATE_SHINGLE_SIZE = 2  # Tokens per shingle; a token is one CJK character or one word
+NEAR_DUPLICATE_NUM_PERM = 32  # MinHash signature length
+NEAR_DUPLICATE_BANDS = 16  # LSH bands; rows per band = NUM_PERM / BANDS
 
 # Processing Parameters
-BATCH_SIZE = 3  # Smaller batch size to avoid rate limiting
-DELAY_BETWEEN_REQUESTS = 5  # Increased delay between requests
-MAX_CONCURRENT_REQUESTS = 1  # Process one question at a time
+EXPANSION_WORKERS = 8  # Concurrent DatasetExpander workers pulling seed questions
+REQUESTS_PER_MINUTE = 120  # Request start rate for the DeepSeek clients; 0 disables pacing
+RATE_LIMIT_BURST = 5  # Requests that may start back to back before pacing applies
+MAX_CONCURRENT_REQUESTS = 3  # Initial limit on API requests in flight
+MIN_CONCURRENT_REQUESTS = 1  # Floor for the adaptive concurrency limit
+MAX_CONCURRENT_REQUESTS_CEILING = 16  # Ceiling for the adaptive concurrency limit
+CONCURRENCY_DECREASE_FACTOR = 0.5  # Limit multiplier on 429/5xx responses
+RETRY_BASE_DELAY = 1  # Seconds; backoff grows from here when no Retry-After is sent
+RETRY_MAX_DELAY = 60  # Cap on any single retry wait, including Retry-After
+
+# Training Data Preparation
+SHUFFLE_MEMORY_LIMIT_MB = 256  # Examples held in memory before shuffled runs are spilled to disk
 
 # Data Validation
 MIN_QUESTIONS = 1
@@ -0,0 +1,360 @@
+"""The philosophical debate format, compiled once into fast validators.
+
+This is the single definition of a valid debate used by the generation
+clients, the dataset tooling and the model validation scripts::
+
+    {"question": str,
+     "standpoints": [{"id": "standpoint_1", "text": str,
+                      "arguments": [{"id": "argument_1_1", "text": str}, ...]}, ...],
+     "counter_questions": [{"id": "counter_question_1", "text": str}, ...]}
+
+Texts must be non-empty strings and each list must hold at least the
+``MIN_*`` number of items from the data-processing config. Extra keys (such as
+``category`` or ``timestamp`` added by the expander) are allowed.
+
+The schema is compiled into two sets of closures: ``is_valid`` short-circuits
+on the first problem with no bookkeeping, and ``validate`` walks the whole
+document to report every problem with its JSON path. ``validate_jsonl``
+validates a large JSONL corpus across processes.
+
+Keep this module free of heavy imports; the training-side validators load it
+outside the backend environment.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .config import MIN_STANDPOINTS, MIN_ARGUMENTS_PER_STANDPOINT, MIN_COUNTER_QUESTIONS
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _DecodeError = orjson.JSONDecodeError
+except ImportError:  # orjson is optional; the stdlib parser gives the same results
+    _loads = json.loads
+    _DecodeError = json.JSONDecodeError
+
+
+class ValidationIssue(NamedTuple):
+    path: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+def format_path(path: Tuple[Any, ...]) -> str:
+    """Render a path like ``$.standpoints[0].arguments[1].id``."""
+    rendered = "$"
+    for part in path:
+        rendered += f"[{part}]" if isinstance(part, int) else f".{part}"
+    return rendered
+
+
+# Schema nodes
+
+@dataclass
+class Text:
+    """A non-empty string."""
+
+
+@dataclass
+class Id:
+    """A string equal to ``template`` formatted with the 1-based indices of the enclosing lists."""
+    template: str
+
+
+@dataclass
+class ListOf:
+    item: Any
+    min_items: int = 0
+
+
+@dataclass
+class Record:
+    fields: Dict[str, Any] = field(default_factory=dict)
+
+
+DEBATE_SCHEMA = Record({
+    "question": Text(),
+    "standpoints": ListOf(Record({
+        "id": Id("standpoint_{0}"),
+        "text": Text(),
+        "arguments": ListOf(Record({
+            "id": Id("argument_{0}_{1}"),
+            "text": Text(),
+        }), min_items=MIN_ARGUMENTS_PER_STANDPOINT),
+    }), min_items=MIN_STANDPOINTS),
+    "counter_questions": ListOf(Record({
+        "id": Id("counter_question_{0}"),
+        "text": Text(),
+    }), min_items=MIN_COUNTER_QUESTIONS),
+})
+
+
+# Compilation
+
+Explain = Callable[[Any, Tuple[Any, ...], Tuple[int, ...], List[ValidationIssue]], None]
+
+
+def _compile_check(schema) -> Callable[[Any], bool]:
+    """Generate and compile a flat boolean validator that stops at the first problem.
+
+    The schema is turned into straight-line Python source (one nested loop
+    per list, no per-node calls), which is several times faster than walking
+    the schema for every record.
+    """
+    lines = ["def check(v0):"]
+    counter = {"var": 0, "index": 0}
+
+    def emit(node, var: str, indices: Tuple[str, ...], indent: str) -> None:
+        if isinstance(node, Text):
+            lines.append(f"{indent}if type({var}) is not str or not {var} or {var}.isspace(): return False")
+        elif isinstance(node, Id):
+            # "standpoint_{0}" -> f"standpoint_{i1}"
+            expected = node.template.format(*("{" + index + "}" for index in indices))
+            lines.append(f"{indent}if {var} != f{expected!r}: return False")
+        elif isinstance(node, ListOf):
+            counter["var"] += 1
+            counter["index"] += 1
+            item, index = f"v{counter['var']}", f"i{counter['index']}"
+            lines.append(f"{indent}if type({var}) is not list or len({var}) < {node.min_items}: return False")
+            lines.append(f"{indent}for {index}, {item} in enumerate({var}, 1):")
+            emit(node.item, item, indices + (index,), indent + "    ")
+        elif isinstance(node, Record):
+            lines.append(f"{indent}if type({var}) is not dict: return False")
+            for name, child in node.fields.items():
+                counter["var"] += 1
+                child_var = f"v{counter['var']}"
+                lines.append(f"{indent}{child_var} = {var}.get({name!r}, _MISSING)")
+                lines.append(f"{indent}if {child_var} is _MISSING: return False")
+                emit(child, child_var, indices, indent)
+        else:
+            raise TypeError(f"Unknown schema node {node!r}")
+
+    emit(schema, "v0", (), "    ")
+    lines.append("    return True")
+    namespace = {"_MISSING": object()}
+    exec(compile("\n".join(lines), "<debate_schema>", "exec"), namespace)
+    return namespace["check"]
+
+
+def _compile_explain(node) -> Explain:
+    """Validator that records every problem with its path."""
+    if isinstance(node, Text):
+        def explain_text(value, path, indices, issues):
+            if type(value) is not str:
+                issues.append(ValidationIssue(format_path(path), f"expected a string, got {type(value).__name__}"))
+            elif not value or value.isspace():
+                issues.append(ValidationIssue(format_path(path), "must not be empty"))
+        return explain_text
+    if isinstance(node, Id):
+        template = node.template
+
+        def explain_id(value, path, indices, issues):
+            expected = template.format(*indices)
+            if value != expected:
+                issues.append(ValidationIssue(format_path(path), f"expected id {expected!r}, got {value!r}"))
+        return explain_id
+    if isinstance(node, ListOf):
+        explain_item, min_items = _compile_explain(node.item), node.min_items
+
+        def explain_list(value, path, indices, issues):
+            if type(value) is not list:
+                issues.append(ValidationIssue(format_path(path), f"expected a list, got {type(value).__name__}"))
+                return
+            if len(value) < min_items:
+                issues.append(ValidationIssue(format_path(path), f"expected at least {min_items} items, got {len(value)}"))
+            for i, item in enumerate(value):
+                explain_item(item, path + (i,), indices + (i + 1,), issues)
+        return explain_list
+    if isinstance(node, Record):
+        fields = tuple((name, _compile_explain(child)) for name, child in node.fields.items())
+
+        def explain_record(value, path, indices, issues):
+            if type(value) is not dict:
+                issues.append(ValidationIssue(format_path(path), f"expected an object, got {type(value).__name__}"))
+                return
+            for name, child_explain in fields:
+                if name not in value:
+                    issues.append(ValidationIssue(format_path(path + (name,)), "missing required field"))
+                else:
+                    child_explain(value[name], path + (name,), indices, issues)
+        return explain_record
+    raise TypeError(f"Unknown schema node {node!r}")
+
+
+_check_debate = _compile_check(DEBATE_SCHEMA)
+_explain_debate = _compile_explain(DEBATE_SCHEMA)
+
+
+# Public API
+
+def is_valid(data: Any) -> bool:
+    """Fast check of a parsed debate."""
+    return _check_debate(data)
+
+
+def validate(data: Any) -> List[ValidationIssue]:
+    """All problems in a parsed debate; empty when it is valid."""
+    if _check_debate(data):
+        return []
+    issues: List[ValidationIssue] = []
+    _explain_debate(data, (), (), issues)
+    return issues
+
+
+def extract_json_content(content: str) -> str:
+    """Strip markdown code fences or surrounding prose from model output."""
+    if '```json' in content:
+        content = content.split('```json')[1].split('```')[0].strip()
+    elif '```' in content:
+        content = content.split('```')[1].strip()
+        if content.startswith('json'):
+            content = content[4:].strip()
+    elif not content.lstrip().startswith('{'):
+        # Prose around the object: keep the outermost braces
+        start, end = content.find('{'), content.rfind('}')
+        if start != -1 and end > start:
+            content = content[start:end + 1]
+    return content
+
+
+def parse_and_validate(text: str, extract: bool = True) -> Tuple[Optional[Any], List[ValidationIssue]]:
+    """Parse model output and validate it.
+
+    Returns ``(data, issues)``; ``data`` is None only when the text is not
+    JSON, in which case the single issue describes the parse error.
+    """
+    if extract:
+        text = extract_json_content(text)
+    try:
+        data = _loads(text)
+    except (_DecodeError, ValueError) as e:
+        return None, [ValidationIssue("$", f"invalid JSON: {e}")]
+    return data, validate(data)
+
+
+# Batch validation
+
+@dataclass
+class BatchReport:
+    records: int = 0
+    valid: int = 0
+    invalid_json: int = 0
+    # Issue path with list indices dropped -> occurrences, e.g. "$.standpoints[].id"
+    issue_counts: Dict[str, int] = field(default_factory=dict)
+    # (line number, issues) for the first few invalid records
+    samples: List[Tuple[int, List[str]]] = field(default_factory=list)
+
+    @property
+    def invalid(self) -> int:
+        return self.records - self.valid
+
+    def merge(self, other: "BatchReport", line_offset: int, max_samples: int) -> None:
+        self.records += other.records
+        self.valid += other.valid
+        self.invalid_json += other.invalid_json
+        for key, count in other.issue_counts.items():
+            self.issue_counts[key] = self.issue_counts.get(key, 0) + count
+        for line, issues in other.samples:
+            if len(self.samples) < max_samples:
+                self.samples.append((line + line_offset, issues))
+
+
+def _generalize(path: str) -> str:
+    out, skipping = [], False
+    for char in path:
+        if char == "[":
+            skipping = True
+            out.append("[]")
+        elif char == "]":
+            skipping = False
+        elif not skipping:
+            out.append(char)
+    return "".join(out)
+
+
+def _record_issues(report: BatchReport, number: int, issues: List[ValidationIssue], max_samples: int) -> None:
+    for issue in issues:
+        key = _generalize(issue.path)
+        report.issue_counts[key] = report.issue_counts.get(key, 0) + 1
+    if len(report.samples) < max_samples:
+        report.samples.append((number, [str(issue) for issue in issues]))
+
+
+def validate_records(records: Iterable[Any], max_samples: int = 20) -> BatchReport:
+    """Validate already parsed debates in-process; sample numbers are 1-based positions."""
+    report = BatchReport()
+    for number, record in enumerate(records, 1):
+        report.records += 1
+        issues = validate(record)
+        if issues:
+            _record_issues(report, number, issues, max_samples)
+        else:
+            report.valid += 1
+    return report
+
+
+def _validate_range(path: str, start: int, end: int, max_samples: int) -> Tuple[BatchReport, int]:
+    """Validate the lines starting within ``[start, end)``; returns the report and lines read."""
+    report = BatchReport()
+    lines = 0
+    with open(path, "rb") as f:
+        if start:
+            # Lines that begin before ``start`` belong to the previous range
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            lines += 1
+            if not line.strip():
+                continue
+            report.records += 1
+            try:
+                data = _loads(line)
+            except (_DecodeError, ValueError) as e:
+                report.invalid_json += 1
+                issues = [ValidationIssue("$", f"invalid JSON: {e}")]
+            else:
+                if _check_debate(data):
+                    report.valid += 1
+                    continue
+                issues = []
+                _explain_debate(data, (), (), issues)
+            _record_issues(report, lines, issues, max_samples)
+    return report, lines
+
+
+def validate_jsonl(path: str, workers: Optional[int] = None, chunk_bytes: int = 32 * 1024 * 1024,
+                   max_samples: int = 20) -> BatchReport:
+    """Validate one debate per line of a JSONL file, split across processes.
+
+    The file is cut into byte ranges of about ``chunk_bytes`` aligned to line
+    boundaries; each worker opens the file itself, so only the reports cross
+    process boundaries. Sample line numbers are 1-based.
+    """
+    size = os.path.getsize(path)
+    ranges = [(start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes)] or [(0, 0)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(ranges) == 1:
+        results = [_validate_range(path, start, end, max_samples) for start, end in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            futures = [pool.submit(_validate_range, path, start, end, max_samples) for start, end in ranges]
+            results = [future.result() for future in futures]
+
+    report = BatchReport()
+    line_offset = 0
+    for chunk_report, lines in results:
+        report.merge(chunk_report, line_offset, max_samples)
+        line_offset += lines
+    return report
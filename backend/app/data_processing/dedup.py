@@ -0,0 +1,212 @@
+import logging
+import re
+import unicodedata
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..core.metrics_registry import registry
+from .config import (
+    NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_SHINGLE_SIZE, NEAR_DUPLICATE_NUM_PERM, NEAR_DUPLICATE_BANDS
+)
+
+logger = logging.getLogger(__name__)
+
+NEAR_DUPLICATES = registry.counter(
+    "near_duplicate_questions_total", "Seed questions dropped before generation", ("kind",))
+
+# One token per CJK ideograph, kana or hangul syllable; runs of other letters and digits form words
+_CJK = "぀-ヿ㐀-䶿一-鿿豈-﫿가-힯"
+_TOKEN = re.compile(rf"[{_CJK}]|[^\W_{_CJK}]+")
+_NOT_TOKEN = re.compile(r"[\W_]+")
+_NOT_CJK = re.compile(rf"[^{_CJK}]")
+
+
+def fingerprint(text: str, size: int = NEAR_DUPLICATE_SHINGLE_SIZE) -> Tuple[str, Set[int]]:
+    """Normalized form of ``text`` and the hashes of its ``size``-token shingles.
+
+    Text is NFKC-normalized and case-folded, and punctuation and whitespace
+    are dropped, so full-width and half-width variants compare equal. Each
+    CJK character is a token, as Chinese has no word boundaries to split on;
+    other scripts are split into words. Shingle hashes are builtin hashes of
+    tuples of token ids: unlike string hashes they are not salted per
+    process, so all processes of one interpreter agree on them, but they
+    may differ between Python versions, implementations and word sizes.
+    """
+    chars = _NOT_TOKEN.sub("", text)
+    if not unicodedata.is_normalized("NFKC", chars):
+        chars = _NOT_TOKEN.sub("", unicodedata.normalize("NFKC", chars))
+    if not _NOT_CJK.search(chars):
+        # Pure CJK, the common case: tokens are the characters themselves
+        normalized = chars
+        ids = list(map(ord, chars))
+    else:
+        tokens = _TOKEN.findall(unicodedata.normalize("NFKC", text).casefold())
+        normalized = "\x1f".join(tokens)
+        ids = [ord(token) if len(token) == 1 else zlib.crc32(token.encode("utf-8")) << 21 for token in tokens]
+    if len(ids) <= size:
+        return normalized, {hash(tuple(ids))}
+    if size == 2:
+        return normalized, set(map(hash, zip(ids, ids[1:])))
+    return normalized, set(map(hash, zip(*[ids[k:] for k in range(size)])))
+
+
+def minhash_signature(hashes: Iterable[int], num_perm: int = NEAR_DUPLICATE_NUM_PERM) -> List[int]:
+    """Densified one-permutation MinHash of a set of shingle hashes.
+
+    Each shingle is hashed once: its low bits pick one of ``num_perm`` bins
+    (a power of two) and the rest is its value; a bin keeps its minimum. Two
+    sets agree on a bin with probability close to their Jaccard similarity.
+    Empty bins, common with short questions, take the value of the next
+    non-empty bin to the right (Shrivastava & Li, 2014), which keeps that
+    property for the bins without shingles.
+    """
+    shift = (num_perm - 1).bit_length()
+    mask = num_perm - 1
+    # Within a bin the low bits are equal, so descending hashes mean descending values
+    bins = {h & mask: h >> shift for h in sorted(hashes, reverse=True)}
+    signature = list(map(bins.get, range(num_perm)))
+    if len(bins) < num_perm:
+        if not bins:
+            return [0] * num_perm
+        value = signature[min(bins)]
+        for i in range(num_perm - 1, -1, -1):
+            if signature[i] is None:
+                signature[i] = value
+            else:
+                value = signature[i]
+    return signature
+
+
+def signature_bands(signature: List[int], bands: int = NEAR_DUPLICATE_BANDS) -> List[Tuple[int, ...]]:
+    """The ``bands`` bands of a MinHash signature.
+
+    Band i takes bins i, i + bands, ...: runs of neighbouring bins filled
+    from the same shingle by densification then end up in different bands.
+    """
+    return list(zip(*[signature[i:i + bands] for i in range(0, len(signature), bands)]))
+
+
+def band_keys(signature: List[int], bands: int = NEAR_DUPLICATE_BANDS) -> List[int]:
+    """LSH key of each band of a MinHash signature (see ``signature_bands``).
+
+    Keys are builtin hashes of tuples of ints, which hold for as long as the
+    interpreter runs, as for the shingle hashes of ``fingerprint``.
+    """
+    return list(map(hash, signature_bands(signature, bands)))
+
+
+def jaccard(a: Iterable[int], b: Iterable[int]) -> float:
+    a, b = set(a), set(b)
+    union = len(a | b)
+    return len(a & b) / union if union else 1.0
+
+
+@dataclass
+class NearDuplicateIndex:
+    """MinHash/LSH index of question texts for dropping near-duplicates.
+
+    ``find_or_add`` returns the indexed text a new question duplicates, or
+    indexes the question and returns None. Questions that normalize to the
+    same tokens are caught by a plain dict lookup. Otherwise the signature is
+    split into ``bands`` bands; questions sharing any band are candidates,
+    and a candidate only counts if the exact Jaccard similarity of the
+    shingle sets reaches ``threshold``, so LSH collisions never drop a
+    question. The indexed shingle hashes are kept in one flat array rather
+    than as Python sets; with the default 16 bands an indexed question takes
+    about 2 KB, mostly for the band tables.
+    """
+    threshold: float = NEAR_DUPLICATE_THRESHOLD
+    shingle_size: int = NEAR_DUPLICATE_SHINGLE_SIZE
+    num_perm: int = NEAR_DUPLICATE_NUM_PERM
+    bands: int = NEAR_DUPLICATE_BANDS
+    texts: List[str] = field(default_factory=list)
+    _exact: Dict[str, int] = field(default_factory=dict)
+    _hashes: array = field(default_factory=lambda: array("q"))
+    _offsets: array = field(default_factory=lambda: array("Q", [0]))
+
+    def __post_init__(self):
+        if self.num_perm & (self.num_perm - 1) or self.num_perm % self.bands:
+            raise ValueError(f"num_perm ({self.num_perm}) must be a power of two and a multiple of "
+                             f"bands ({self.bands})")
+        self.rows = self.num_perm // self.bands
+        self._buckets: List[Dict[int, Any]] = [{} for _ in range(self.bands)]
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _shingles(self, index: int) -> array:
+        return self._hashes[self._offsets[index]:self._offsets[index + 1]]
+
+    def find_or_add(self, text: str) -> Optional[str]:
+        normalized, hashes = fingerprint(text, self.shingle_size)
+        match = self._exact.get(normalized)
+        if match is not None:
+            NEAR_DUPLICATES.inc("exact")
+            return self.texts[match]
+
+        keys = band_keys(minhash_signature(hashes, self.num_perm), self.bands)
+        hits = list(map(dict.get, self._buckets, keys))
+        if hits.count(None) < self.bands:
+            checked = set()
+            for bucket in hits:
+                if bucket is None:
+                    continue
+                for candidate in (bucket if isinstance(bucket, list) else (bucket,)):
+                    if candidate in checked:
+                        continue
+                    checked.add(candidate)
+                    if jaccard(hashes, self._shingles(candidate)) >= self.threshold:
+                        NEAR_DUPLICATES.inc("near")
+                        return self.texts[candidate]
+
+        index = len(self.texts)
+        self.texts.append(text)
+        self._exact[normalized] = index
+        self._hashes.extend(hashes)
+        self._offsets.append(len(self._hashes))
+        if hits.count(None) == self.bands:
+            # The common case: no band seen before
+            for _ in map(dict.__setitem__, self._buckets, keys, repeat(index, self.bands)):
+                pass
+            return None
+        for buckets, key, bucket in zip(self._buckets, keys, hits):
+            # Most buckets hold a single question; only shared ones become lists
+            if bucket is None:
+                buckets[key] = index
+            elif isinstance(bucket, list):
+                bucket.append(index)
+            else:
+                buckets[key] = [bucket, index]
+        return None
+
+
+def filter_near_duplicates(items: Iterable[Any], key: Callable[[Any], str] = lambda item: item,
+                           existing: Iterable[str] = (), index: Optional[NearDuplicateIndex] = None,
+                           lookup: Optional[Callable[[str], Optional[str]]] = None,
+                           **index_options) -> Tuple[List[Any], List[Tuple[Any, str]]]:
+    """Split ``items`` into the ones to keep and ``(item, duplicated text)`` pairs.
+
+    The first of a group of near-duplicates is kept. Texts in ``existing``
+    are indexed first, so items that duplicate them are dropped as well.
+    ``lookup`` returns the text an item duplicates in a larger collection
+    kept elsewhere (e.g. ``ProcessedIndex.find_near_duplicate`` for the
+    questions already expanded), and is consulted before the index.
+    """
+    index = index if index is not None else NearDuplicateIndex(**index_options)
+    for text in existing:
+        index.find_or_add(text)
+    kept, duplicates = [], []
+    for item in items:
+        match = lookup(key(item)) if lookup is not None else None
+        if match is not None:
+            NEAR_DUPLICATES.inc("indexed")
+        else:
+            match = index.find_or_add(key(item))
+        if match is None:
+            kept.append(item)
+        else:
+            duplicates.append((item, match))
+    return kept, duplicates
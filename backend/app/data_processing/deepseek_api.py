@@ -1,13 +1,27 @@
+import asyncio
 import json
 import time
 import logging
 from typing import Dict, List, Optional, Any
-import requests
+import httpx
 from .config import (
     DEEPSEEK_API_KEY, DEEPSEEK_API_BASE, MODEL_NAME,
-    MAX_TOKENS, TEMPERATURE, TIMEOUT, MAX_RETRIES
+    MAX_TOKENS, TEMPERATURE, TIMEOUT, MAX_RETRIES, MAX_CONCURRENT_REQUESTS,
+    CONNECT_TIMEOUT, POOL_MAX_CONNECTIONS, POOL_MAX_KEEPALIVE,
+    POOL_KEEPALIVE_EXPIRY, HTTP2_ENABLED, STREAM_COMPLETIONS, STREAM_ABORT_RETRIES,
+    GENERATION_SEED, QUESTIONS_PER_REQUEST, BATCH_MAX_TOKENS, REQUESTS_PER_MINUTE, RATE_LIMIT_BURST
+)
+from .completion_cache import CompletionCache
+from .concurrency import (
+    AdaptiveConcurrencyLimiter, RequestRateLimiter, is_retryable_status, retry_after_seconds, retry_delay
+)
+from .debate_schema import extract_json_content, parse_and_validate, validate
+from .philosophy_prompt import BATCH_PROMPT_SUFFIX, PHILOSOPHY_PROMPT
+from .streaming import DebateStructureValidator, StreamedCompletion, StreamValidationError
+from .telemetry import (
+    ABORTED, ACCEPTED, CACHED, FAILED, REJECTED, CallRecord, RunLog, record_batch, record_call,
+    split_batch_call
 )
-from .philosophy_prompt import PHILOSOPHY_PROMPT
 
 # Set up logging
 logging.basicConfig(
@@ -15,130 +29,532 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+# httpx logs every request at INFO; keep the generation logs readable
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def http2_available() -> bool:
+    """Whether the optional h2 package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_client_options(http2: bool = HTTP2_ENABLED) -> Dict[str, Any]:
+    """Pool limits and timeouts shared by the DeepSeek HTTP clients."""
+    if http2 and not http2_available():
+        logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+        http2 = False
+    return {
+        "timeout": httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+        ),
+        "http2": http2,
+    }
+
+
+SYSTEM_PROMPT = """你是一个专业的哲学思辨图谱数据生成助手。你的任务是根据给定的哲学问题，
+        生成包含不同立场、支持论据和反问的思辨图谱数据。请严格遵循指定的JSON格式输出，
+        并确保内容的哲学深度和逻辑严谨性。"""
+
+
+def build_debate_messages(question: str) -> List[Dict[str, str]]:
+    """Chat messages asking the model for the debate structure of a question."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"{PHILOSOPHY_PROMPT}\n\n{question}"}
+    ]
+
+
+def build_batch_messages(questions: List[str]) -> List[Dict[str, str]]:
+    """Chat messages asking for the debates of several questions in one JSON object.
+
+    The system prompt and the format template are sent once for the whole
+    batch; the answer is ``{"debates": [...]}`` (JSON mode requires an
+    object at the top level), one debate per numbered question.
+    """
+    numbered = "\n".join(f"{i}. {question}" for i, question in enumerate(questions, 1))
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"{PHILOSOPHY_PROMPT}\n\n{BATCH_PROMPT_SUFFIX}\n\n{numbered}"}
+    ]
+
+
+def build_payload(messages: List[Dict[str, str]], stream: bool = False,
+                  max_tokens: int = MAX_TOKENS) -> Dict[str, Any]:
+    """Chat completion request body for the configured model."""
+    payload = {
+        "model": MODEL_NAME,
+        "messages": messages,
+        "temperature": TEMPERATURE,
+        "max_tokens": max_tokens,
+        "response_format": { "type": "json_object" }
+    }
+    if GENERATION_SEED is not None:
+        payload["seed"] = GENERATION_SEED
+    if stream:
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+    return payload
+
+
+def parse_debate_response(response: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Extract and validate the debate structure from a chat completion response."""
+    if not response or 'choices' not in response or not response['choices']:
+        logger.error("Failed to get valid response from API")
+        return None
+
+    # Extract the content from the response
+    content = response['choices'][0]['message']['content']
+    debate_data, issues = parse_and_validate(content)
+    if issues:
+        logger.error(f"Invalid debate in response: {'; '.join(str(issue) for issue in issues[:5])}")
+        logger.debug(f"Response content: {content}")
+        return None
+    return debate_data
+
+
+def split_batch_response(response: Optional[Dict[str, Any]],
+                         questions: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """Validate each debate of a batched completion; None for items that are missing or invalid.
+
+    Debates are matched to questions by their ``question`` field, falling
+    back to position when the model rewrote the question text.
+    """
+    if not response or not response.get('choices'):
+        return [None] * len(questions)
+    content = response['choices'][0]['message']['content']
+    try:
+        data = json.loads(extract_json_content(content))
+    except ValueError as e:
+        logger.error(f"Invalid JSON in batched response of {len(questions)} questions: {e}")
+        return [None] * len(questions)
+    items = data.get('debates') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        logger.error("Batched response has no list of debates")
+        return [None] * len(questions)
+
+    by_question = {item.get('question'): item for item in items if isinstance(item, dict)}
+    results: List[Optional[Dict[str, Any]]] = []
+    for i, question in enumerate(questions):
+        item = by_question.get(question)
+        if item is None and i < len(items) and isinstance(items[i], dict) \
+                and items[i].get('question') not in questions:
+            item = items[i]
+        if item is None:
+            logger.warning(f"Batched response has no debate for question {i + 1}")
+            results.append(None)
+            continue
+        issues = validate(item)
+        if issues:
+            logger.warning(f"Invalid debate for question {i + 1} in batched response: "
+                           f"{'; '.join(str(issue) for issue in issues[:5])}")
+            results.append(None)
+        else:
+            results.append(item)
+    return results
+
+
+def replay_cached(cache: CompletionCache, messages: List[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+    """Debate from a cached completion of the same request, if any."""
+    response = cache.get(build_payload(messages))
+    if response is None:
+        if cache.readonly:
+            logger.warning("Completion cache miss in read-only mode; not querying the API")
+        return None
+    return parse_debate_response(response)
+
+
+def store_valid(cache: CompletionCache, messages: List[Dict[str, str]],
+                response: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Validate a completion and cache it only if it holds a valid debate."""
+    debate_data = parse_debate_response(response)
+    if debate_data is not None:
+        cache.put(build_payload(messages), response)
+    return debate_data
+
+
+def store_batch_debates(cache: CompletionCache, response: Optional[Dict[str, Any]],
+                        questions: List[str], debates: List[Optional[Dict[str, Any]]]) -> None:
+    """Cache each valid debate of a batched completion under its single-question request.
+
+    Batches are made up differently on every run, so the batched request
+    itself would hardly ever be asked again; a single-question entry is what
+    ``replay_cached`` looks up when the question comes back. Each entry is a
+    one-choice completion holding just that debate, without usage (the
+    tokens were billed to the batch).
+    """
+    for question, debate in zip(questions, debates):
+        if debate is None:
+            continue
+        cache.put(build_payload(build_debate_messages(question)), {
+            "id": response.get("id"),
+            "object": "chat.completion",
+            "model": response.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {
+                "role": "assistant", "content": json.dumps(debate, ensure_ascii=False)}}],
+        })
+
+
+def finish_call(run_log: Optional[RunLog], call: CallRecord, cache: CompletionCache,
+                messages: List[Dict[str, str]], response: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Validate and cache a completion, then record the call's outcome and usage."""
+    call.apply_response(response)
+    debate_data = store_valid(cache, messages, response)
+    if debate_data is not None:
+        call.outcome = ACCEPTED
+    else:
+        call.outcome = REJECTED if response else FAILED
+    record_call(run_log, call)
+    return debate_data
+
 
 class DeepSeekAPI:
     """A class to handle interactions with the DeepSeek API for philosophical debate data generation."""
     
-    def __init__(self, api_key: str = DEEPSEEK_API_KEY):
-        """Initialize the DeepSeek API client."""
+    def __init__(self, api_key: str = DEEPSEEK_API_KEY, api_base: str = DEEPSEEK_API_BASE,
+                 http2: bool = HTTP2_ENABLED, cache: Optional[CompletionCache] = None,
+                 run_log: Optional[RunLog] = None, requests_per_minute: float = REQUESTS_PER_MINUTE):
+        """Initialize the DeepSeek API client.
+
+        Connections are pooled and kept alive across calls, so only the first
+        request to the API pays for the TCP and TLS handshake. Valid debates
+        are recorded in ``cache`` (by default the configured completion cache)
+        and replayed for identical requests. Each call's latency, token usage
+        and outcome is appended to ``run_log`` when one is given. Request
+        starts are paced to ``requests_per_minute``.
+        """
+        self.run_log = run_log
+        self.rate_limiter = RequestRateLimiter(requests_per_minute, RATE_LIMIT_BURST)
+        self._owns_cache = cache is None
+        self.cache = cache if cache is not None else CompletionCache()
         self.api_key = api_key
-        self.base_url = f"{DEEPSEEK_API_BASE}/chat/completions"
+        self.base_url = f"{api_base}/chat/completions"
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.client = httpx.Client(headers=self.headers, **build_client_options(http2))
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.client.close()
+        if self._owns_cache:
+            self.cache.close()
+
+    def __enter__(self) -> "DeepSeekAPI":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
     
-    def _make_api_call(self, messages: List[Dict[str, str]]) -> Optional[Dict[str, Any]]:
-        """Make a single API call to the DeepSeek API."""
-        payload = {
-            "model": MODEL_NAME,
-            "messages": messages,
-            "temperature": TEMPERATURE,
-            "max_tokens": MAX_TOKENS,
-            "response_format": { "type": "json_object" }
-        }
-        
+    def _make_api_call(self, messages: List[Dict[str, str]],
+                       validator: Optional[DebateStructureValidator] = None,
+                       call: Optional[CallRecord] = None) -> Optional[Dict[str, Any]]:
+        """Make a single API call to the DeepSeek API.
+
+        With a ``validator`` the completion is streamed and checked as it
+        arrives; ``StreamValidationError`` is raised as soon as it is invalid.
+        Attempts, status and latency are noted on ``call``.
+        """
+        call = call if call is not None else CallRecord()
+        payload = build_payload(messages, stream=validator is not None)
+
         for attempt in range(MAX_RETRIES):
+            response = None
+            call.http_attempts = attempt + 1
+            time.sleep(self.rate_limiter.reserve())
+            started = time.monotonic()
             try:
-                response = requests.post(
-                    self.base_url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=TIMEOUT
-                )
-                response.raise_for_status()
-                return response.json()
-            except requests.exceptions.RequestException as e:
+                with self.client.stream("POST", self.base_url, json=payload) as response:
+                    call.status = response.status_code
+                    response.raise_for_status()
+                    if validator is None:
+                        return json.loads(response.read())
+                    completion = StreamedCompletion(validator)
+                    try:
+                        for line in response.iter_lines():
+                            completion.feed_line(line)
+                    finally:
+                        call.completion_chars = completion.received
+                    return completion.as_response()
+            except httpx.HTTPStatusError as e:
                 logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
-                if attempt < MAX_RETRIES - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                else:
-                    logger.error(f"All {MAX_RETRIES} attempts failed")
+                if not is_retryable_status(e.response.status_code):
                     return None
-    
-    def generate_philosophical_debate(self, question: str) -> Optional[Dict[str, Any]]:
+            except StreamValidationError:
+                raise
+            except (httpx.HTTPError, ValueError) as e:
+                logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+                call.error = str(e)
+            finally:
+                call.latency = time.monotonic() - started
+            if attempt < MAX_RETRIES - 1:
+                time.sleep(retry_delay(attempt, retry_after_seconds(response)))
+        logger.error(f"All {MAX_RETRIES} attempts failed")
+        return None
+
+    def generate_philosophical_debate(self, question: str, category: Optional[str] = None,
+                                      difficulty: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Generate a philosophical debate structure for the given question.
         
         Args:
             question: The philosophical question to generate debate for
+            category, difficulty: Seed question labels recorded in the run log
             
         Returns:
             Dict containing the debate structure or None if generation fails
         """
-        system_prompt = """你是一个专业的哲学思辨图谱数据生成助手。你的任务是根据给定的哲学问题，
-        生成包含不同立场、支持论据和反问的思辨图谱数据。请严格遵循指定的JSON格式输出，
-        并确保内容的哲学深度和逻辑严谨性。"""
-        
-        # Create the user prompt with the specific question
-        user_prompt = f"{PHILOSOPHY_PROMPT}\n\n{question}"
-        
-        # Make the API call
-        response = self._make_api_call([
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ])
-        
-        if not response or 'choices' not in response or not response['choices']:
-            logger.error("Failed to get valid response from API")
-            return None
-        
-        # Extract the content from the response
-        content = response['choices'][0]['message']['content']
-        
-        # Clean up the response (handle markdown code blocks if present)
-        if '```json' in content:
-            content = content.split('```json')[1].split('```')[0].strip()
-        elif '```' in content:
-            content = content.split('```')[1].strip()
-            if content.startswith('json'):
-                content = content[4:].strip()
-        
-        try:
-            # Parse the JSON response
-            debate_data = json.loads(content)
-            
-            # Validate the structure
-            required_fields = ['question', 'standpoints', 'counter_questions']
-            for field in required_fields:
-                if field not in debate_data:
-                    logger.error(f"Missing required field in response: {field}")
-                    return None
-            
-            # Validate standpoints
-            if not isinstance(debate_data['standpoints'], list) or len(debate_data['standpoints']) < 2:
-                logger.error("At least two standpoints are required")
-                return None
-                
-            for i, standpoint in enumerate(debate_data['standpoints'], 1):
-                if 'id' not in standpoint or standpoint['id'] != f'standpoint_{i}':
-                    logger.error(f"Invalid or missing id for standpoint {i}")
-                    return None
-                if 'arguments' not in standpoint or not isinstance(standpoint['arguments'], list) or len(standpoint['arguments']) < 2:
-                    logger.error(f"At least two arguments are required for standpoint {i}")
-                    return None
-                
-                # Validate arguments
-                for j, argument in enumerate(standpoint['arguments'], 1):
-                    if 'id' not in argument or argument['id'] != f'argument_{i}_{j}':
-                        logger.error(f"Invalid or missing id for argument {j} in standpoint {i}")
+        messages = build_debate_messages(question)
+        cached = replay_cached(self.cache, messages)
+        if cached is not None or self.cache.readonly:
+            if cached is not None:
+                record_call(self.run_log, CallRecord(question, category, difficulty, outcome=CACHED))
+            return cached
+        if not STREAM_COMPLETIONS:
+            call = CallRecord(question, category, difficulty)
+            return finish_call(self.run_log, call, self.cache, messages, self._make_api_call(messages, call=call))
+        for attempt in range(STREAM_ABORT_RETRIES + 1):
+            call = CallRecord(question, category, difficulty)
+            try:
+                response = self._make_api_call(messages, DebateStructureValidator(), call)
+            except StreamValidationError as e:
+                logger.warning(f"Aborted streamed generation (attempt {attempt + 1}): {e}")
+                call.outcome, call.error = ABORTED, str(e)
+                record_call(self.run_log, call)
+                continue
+            return finish_call(self.run_log, call, self.cache, messages, response)
+        return None
+
+
+class AsyncDeepSeekAPI:
+    """Asyncio client for the DeepSeek API with adaptive concurrency.
+
+    Requests go over a pooled keep-alive connection pool, gated by an
+    ``AdaptiveConcurrencyLimiter`` that starts at ``max_concurrency`` in-flight
+    requests, grows while calls succeed and shrinks on 429/5xx responses,
+    honoring Retry-After; request starts are also paced to
+    ``requests_per_minute`` by a ``RequestRateLimiter``. Responses are
+    validated the same way as ``DeepSeekAPI.generate_philosophical_debate``
+    (see ``debate_schema``). The HTTP client is created on first use and
+    released by ``aclose()``, so an instance can be reused across
+    ``asyncio.run`` calls. Valid debates are recorded in and replayed from
+    ``cache`` and calls are logged to ``run_log`` like ``DeepSeekAPI`` does.
+    """
+
+    def __init__(self, api_key: str = DEEPSEEK_API_KEY, api_base: str = DEEPSEEK_API_BASE,
+                 max_concurrency: int = MAX_CONCURRENT_REQUESTS, http2: bool = HTTP2_ENABLED,
+                 cache: Optional[CompletionCache] = None, run_log: Optional[RunLog] = None,
+                 requests_per_minute: float = REQUESTS_PER_MINUTE):
+        self.run_log = run_log
+        self.rate_limiter = RequestRateLimiter(requests_per_minute, RATE_LIMIT_BURST)
+        self.cache = cache if cache is not None else CompletionCache()
+        self.api_key = api_key
+        self.base_url = f"{api_base}/chat/completions"
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        self.limiter = AdaptiveConcurrencyLimiter(max_concurrency)
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is not loop:
+            # Connections belong to a previous event loop and cannot be reused
+            self._client = None
+            self.limiter.reset_loop()
+        if self._client is None:
+            options = build_client_options(self.http2)
+            options["limits"] = httpx.Limits(
+                max_connections=max(POOL_MAX_CONNECTIONS, self.limiter.max_limit),
+                max_keepalive_connections=max(POOL_MAX_KEEPALIVE, self.limiter.max_limit),
+                keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+            )
+            self._client = httpx.AsyncClient(headers=self.headers, **options)
+            self._loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> "AsyncDeepSeekAPI":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _make_api_call(self, messages: List[Dict[str, str]],
+                             validator: Optional[DebateStructureValidator] = None,
+                             call: Optional[CallRecord] = None,
+                             max_tokens: int = MAX_TOKENS) -> Optional[Dict[str, Any]]:
+        """Make a single API call, retrying throttling, server and transport errors.
+
+        With a ``validator`` the completion is streamed and checked as it
+        arrives; ``StreamValidationError`` is raised as soon as it is invalid.
+        Attempts, status and latency are noted on ``call``.
+        """
+        call = call if call is not None else CallRecord()
+        client = self._get_client()
+        payload = build_payload(messages, stream=validator is not None, max_tokens=max_tokens)
+
+        for attempt in range(MAX_RETRIES):
+            retry_after = None
+            call.http_attempts = attempt + 1
+            await self.rate_limiter.acquire()
+            # Only hold a concurrency slot while the request is in flight
+            async with self.limiter:
+                started = time.monotonic()
+                try:
+                    async with client.stream("POST", self.base_url, json=payload) as response:
+                        call.status = response.status_code
+                        if response.is_success:
+                            result = await self._read_response(response, validator, call)
+                            self.limiter.on_success(time.monotonic() - started)
+                            return result
+                        await response.aread()
+                except httpx.HTTPError as e:
+                    logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+                    call.error = str(e)
+                    self.limiter.on_throttle(type(e).__name__)
+                except StreamValidationError:
+                    raise
+                except ValueError as e:
+                    logger.warning(f"Attempt {attempt + 1} returned invalid JSON: {e}")
+                    call.error = str(e)
+                else:
+                    logger.warning(f"Attempt {attempt + 1} failed with HTTP {response.status_code}")
+                    if not is_retryable_status(response.status_code):
                         return None
-            
-            # Validate counter questions
-            if not isinstance(debate_data['counter_questions'], list) or len(debate_data['counter_questions']) < 2:
-                logger.error("At least two counter questions are required")
-                return None
-                
-            for i, question in enumerate(debate_data['counter_questions'], 1):
-                if 'id' not in question or question['id'] != f'counter_question_{i}':
-                    logger.error(f"Invalid or missing id for counter question {i}")
-                    return None
-            
-            return debate_data
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse response as JSON: {e}")
-            logger.debug(f"Response content: {content}")
-            return None
-        except Exception as e:
-            logger.error(f"Error validating response: {e}")
-            return None
+                    retry_after = retry_after_seconds(response)
+                    self.limiter.on_throttle(str(response.status_code), retry_after)
+                finally:
+                    call.latency = time.monotonic() - started
+            if attempt < MAX_RETRIES - 1:
+                await asyncio.sleep(retry_delay(attempt, retry_after))
+        logger.error(f"All {MAX_RETRIES} attempts failed")
+        return None
+
+    @staticmethod
+    async def _read_response(response: httpx.Response, validator: Optional[DebateStructureValidator],
+                             call: CallRecord) -> Dict[str, Any]:
+        if validator is None:
+            return json.loads(await response.aread())
+        completion = StreamedCompletion(validator)
+        try:
+            async for line in response.aiter_lines():
+                completion.feed_line(line)
+        finally:
+            call.completion_chars = completion.received
+        return completion.as_response()
+
+    async def generate_philosophical_debate(self, question: str, category: Optional[str] = None,
+                                            difficulty: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Generate and validate a philosophical debate structure for the given question.
+
+        Completions are streamed (``STREAM_COMPLETIONS``) and abandoned as soon
+        as their structure is provably invalid, then regenerated right away
+        up to ``STREAM_ABORT_RETRIES`` times. ``category`` and ``difficulty``
+        label the calls in the run log.
+        """
+        messages = build_debate_messages(question)
+        cached = replay_cached(self.cache, messages)
+        if cached is not None or self.cache.readonly:
+            if cached is not None:
+                record_call(self.run_log, CallRecord(question, category, difficulty, outcome=CACHED))
+            return cached
+        if not STREAM_COMPLETIONS:
+            call = CallRecord(question, category, difficulty)
+            response = await self._make_api_call(messages, call=call)
+            return finish_call(self.run_log, call, self.cache, messages, response)
+        for attempt in range(STREAM_ABORT_RETRIES + 1):
+            call = CallRecord(question, category, difficulty)
+            try:
+                response = await self._make_api_call(messages, DebateStructureValidator(), call)
+            except StreamValidationError as e:
+                logger.warning(f"Aborted streamed generation (attempt {attempt + 1}): {e}")
+                call.outcome, call.error = ABORTED, str(e)
+                record_call(self.run_log, call)
+                continue
+            return finish_call(self.run_log, call, self.cache, messages, response)
+        return None
+
+    async def generate_debate_batch(self, seeds: List[Dict[str, Any]],
+                                    retry_individually: bool = True) -> List[Optional[Dict[str, Any]]]:
+        """Generate the debates of several seed questions with a single request.
+
+        ``seeds`` are seed question dicts (``question`` plus optional
+        ``category`` and ``difficulty``). Questions with a cached completion
+        are replayed first; the rest share one request (see
+        ``build_batch_messages``) whose debates are validated one by one. With
+        ``retry_individually`` the questions whose debate was missing or
+        invalid are then generated with single-question requests. Results are
+        in the order of ``seeds``.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(seeds)
+        pending = []
+        for i, seed in enumerate(seeds):
+            cached = replay_cached(self.cache, build_debate_messages(seed['question']))
+            if cached is not None:
+                results[i] = cached
+                record_call(self.run_log, CallRecord(seed['question'], seed.get('category'),
+                                                     seed.get('difficulty'), outcome=CACHED))
+            else:
+                pending.append(i)
+        if not pending or self.cache.readonly:
+            return results
+        if len(pending) == 1:
+            seed = seeds[pending[0]]
+            results[pending[0]] = await self.generate_philosophical_debate(
+                seed['question'], seed.get('category'), seed.get('difficulty'))
+            return results
+
+        batch = [seeds[i] for i in pending]
+        questions = [seed['question'] for seed in batch]
+        messages = build_batch_messages(questions)
+        call = CallRecord()
+        response = await self._make_api_call(messages, call=call, max_tokens=BATCH_MAX_TOKENS)
+        call.apply_response(response)
+        debates = split_batch_response(response, questions)
+        store_batch_debates(self.cache, response, questions, debates)
+        outcomes = [ACCEPTED if debate is not None else (REJECTED if response else FAILED) for debate in debates]
+        record_batch(self.run_log, split_batch_call(call, batch, outcomes))
+
+        retry = []
+        for i, debate in zip(pending, debates):
+            results[i] = debate
+            if debate is None:
+                retry.append(i)
+        if retry and retry_individually:
+            logger.info(f"Retrying {len(retry)} of {len(batch)} batched questions individually")
+            retried = await asyncio.gather(*(
+                self.generate_philosophical_debate(seeds[i]['question'], seeds[i].get('category'),
+                                                   seeds[i].get('difficulty'))
+                for i in retry))
+            for i, debate in zip(retry, retried):
+                results[i] = debate
+        return results
+
+    async def generate_debates(self, questions: List[str],
+                               questions_per_request: int = QUESTIONS_PER_REQUEST) -> List[Optional[Dict[str, Any]]]:
+        """Generate debates for several questions concurrently, preserving order.
+
+        With ``questions_per_request`` above 1 the questions are grouped into
+        batched requests (``generate_debate_batch``).
+        """
+        if questions_per_request <= 1:
+            return await asyncio.gather(*(self.generate_philosophical_debate(q) for q in questions))
+        seeds = [{'question': q} for q in questions]
+        groups = [seeds[i:i + questions_per_request] for i in range(0, len(seeds), questions_per_request)]
+        results = await asyncio.gather(*(self.generate_debate_batch(group) for group in groups))
+        return [debate for group in results for debate in group]
@@ -1,17 +1,30 @@
+import argparse
+import asyncio
+import glob
 import json
 import os
 import time
-import random
 import logging
-from typing import List, Dict, Any, Optional
+import math
+from typing import List, Dict, Any, Optional, Set
 from pathlib import Path
 from tqdm import tqdm
 
-# Import the DeepSeekAPI class and configuration
-from .deepseek_api import DeepSeekAPI
+from ..core.metrics_registry import registry
+
+# Import the DeepSeek API client and configuration
+from .concurrency import retry_delay
+from .completion_cache import CompletionCache
+from .dedup import filter_near_duplicates
+from .deepseek_api import AsyncDeepSeekAPI
+from .journal import DebateJournal, iter_dataset, read_journal, write_json_atomic
+from .processed_index import ProcessedIndex
+from .telemetry import RunLog
+from .work_queue import WorkQueue
 from .config import (
-    SEED_QUESTIONS_FILE, EXPANDED_DATASET_FILE, LOG_FILE,
-    BATCH_SIZE, DELAY_BETWEEN_REQUESTS, MAX_RETRIES
+    SEED_QUESTIONS_FILE, EXPANDED_DATASET_FILE, LOG_FILE, WORK_QUEUE_PATH, QUEUE_HEARTBEAT_INTERVAL,
+    NEAR_DUPLICATE_THRESHOLD,
+    EXPANSION_WORKERS, MAX_RETRIES, MAX_CONCURRENT_REQUESTS, QUESTIONS_PER_REQUEST
 )
 
 # Set up logging
@@ -28,20 +41,76 @@ logger = logging.getLogger(__name__)
 class DatasetExpander:
     """A class to handle the expansion of philosophical questions into debate structures."""
     
-    def __init__(self):
-        """Initialize the dataset expander with the DeepSeek API client."""
-        self.api = DeepSeekAPI()
-        self.processed_questions = set()
-        self.existing_data = []
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+                 cache: Optional[CompletionCache] = None,
+                 api: Optional[AsyncDeepSeekAPI] = None,
+                 seed_questions_file: str = SEED_QUESTIONS_FILE,
+                 output_file: str = EXPANDED_DATASET_FILE,
+                 run_log: Optional[RunLog] = None,
+                 questions_per_request: int = QUESTIONS_PER_REQUEST,
+                 journal_file: Optional[str] = None,
+                 workers: int = EXPANSION_WORKERS,
+                 queue: Optional[WorkQueue] = None,
+                 near_duplicate_threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                 index_file: Optional[str] = None):
+        """Initialize the dataset expander with the DeepSeek API client.
+
+        Completions are replayed from ``cache`` (the configured completion
+        cache by default), so re-running after a crash or a format change
+        does not query the API again for questions it already answered.
+        Passing ``api`` uses that client instead, e.g. one pointed at a local
+        server for benchmarking. Every API call is recorded in ``run_log``
+        (the client's own log, or a new one under ``RUN_LOG_DIR``) and
+        summarized at the end. With ``questions_per_request`` above 1
+        several questions share one request and only the ones that fail are
+        retried on their own.
+
+        Results are appended to a journal (``journal_file``, by default next
+        to ``output_file``) as they complete and folded into ``output_file``
+        at the end of the run; an interrupted run resumes from both. The
+        questions already expanded are looked up in an on-disk index
+        (``index_file``, by default next to ``output_file``), so startup does
+        not parse the whole dataset. ``workers`` questions (or groups) are
+        expanded at a time.
+
+        With a shared ``queue`` several processes (on one machine or on
+        shared storage) split the seed questions: each one leases questions
+        from the queue instead of expanding the whole seed list, and writes
+        its own journal next to ``output_file``. Once the queue is drained,
+        the one process that claims the compaction in the queue folds all
+        journals into ``output_file``.
+
+        New seed questions whose character shingles overlap an earlier seed or
+        an expanded question by at least ``near_duplicate_threshold``
+        (Jaccard similarity) are dropped before any request is made; 0 keeps
+        every question that is not an exact repeat.
+        """
+        self.workers = max(1, workers)
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.questions_per_request = questions_per_request
+        self.api = api or AsyncDeepSeekAPI(max_concurrency=max_concurrency, cache=cache)
+        if self.api.run_log is None:
+            self.api.run_log = run_log or RunLog()
+        self.run_log = self.api.run_log
+        self.seed_questions_file = seed_questions_file
+        self.output_file = output_file
+        self.queue = queue
+        self.journal_base = os.path.splitext(output_file)[0]
+        if journal_file is None:
+            journal_file = (f"{self.journal_base}.{queue.worker_id}.journal.jsonl" if queue
+                            else f"{self.journal_base}.journal.jsonl")
+        self.journal_file = journal_file
+        self.journal: Optional[DebateJournal] = None
+        self.processed_questions = ProcessedIndex(index_file or f"{self.journal_base}.index.sqlite3")
         
         # Create necessary directories if they don't exist
-        os.makedirs(os.path.dirname(EXPANDED_DATASET_FILE), exist_ok=True)
+        os.makedirs(os.path.dirname(self.output_file) or ".", exist_ok=True)
         os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
     
     def load_seed_questions(self) -> List[Dict[str, Any]]:
         """Load seed questions from the JSON file."""
         try:
-            with open(SEED_QUESTIONS_FILE, 'r', encoding='utf-8') as f:
+            with open(self.seed_questions_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
                 # Ensure we have a list of questions
                 if isinstance(data, dict) and 'questions' in data:
@@ -55,43 +124,71 @@ class DatasetExpander:
             logger.error(f"Failed to load seed questions: {e}")
             return []
     
+    def journal_files(self) -> List[str]:
+        """This expander's journal followed by those of other processes sharing ``output_file``."""
+        base = glob.escape(self.journal_base)
+        siblings = sorted(set(glob.glob(f"{base}.journal.jsonl") + glob.glob(f"{base}.*.journal.jsonl")))
+        return [self.journal_file] + [path for path in siblings if path != self.journal_file]
+
     def load_existing_expanded_data(self) -> None:
-        """Load existing expanded data to avoid reprocessing."""
-        if os.path.exists(EXPANDED_DATASET_FILE):
-            try:
-                with open(EXPANDED_DATASET_FILE, 'r', encoding='utf-8') as f:
-                    self.existing_data = json.load(f)
-                    self.processed_questions = {
-                        item['question'] 
-                        for item in self.existing_data 
-                        if 'question' in item
-                    }
-                logger.info(f"Loaded {len(self.existing_data)} existing expanded questions")
-            except (json.JSONDecodeError, KeyError) as e:
-                logger.error(f"Error loading existing expanded data: {e}")
-                self.existing_data = []
+        """Index the existing expanded questions, including journaled results, to avoid reprocessing."""
+        journal_files = self.journal_files()
+        self.processed_questions.sync(self.output_file, journal_files)
+        journaled = sum(1 for path in journal_files for _ in read_journal(path))
+        logger.info(f"Loaded {len(self.processed_questions)} existing expanded questions"
+                    + (f" ({journaled} from the journal)" if journaled else ""))
     
     def save_expanded_data(self, data: List[Dict[str, Any]]) -> None:
         """Save the expanded data to a JSON file."""
         try:
-            # Create a temporary file first to ensure atomic write
-            temp_file = f"{EXPANDED_DATASET_FILE}.tmp"
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
-            
-            # Replace the original file
-            if os.path.exists(EXPANDED_DATASET_FILE):
-                os.replace(temp_file, EXPANDED_DATASET_FILE)
-            else:
-                os.rename(temp_file, EXPANDED_DATASET_FILE)
-                
-            logger.info(f"Successfully saved {len(data)} expanded questions to {EXPANDED_DATASET_FILE}")
+            write_json_atomic(self.output_file, data, ensure_ascii=False, indent=2, sort_keys=True)
+            logger.info(f"Successfully saved {len(data)} expanded questions to {self.output_file}")
         except Exception as e:
             logger.error(f"Failed to save expanded data: {e}")
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
+
+    def drop_near_duplicates(self, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop seed questions that nearly repeat an earlier seed or an expanded question."""
+        if not self.near_duplicate_threshold or not questions:
+            return questions
+        start = time.perf_counter()
+        # Expanded questions are matched through the LSH keys stored in the processed index;
+        # only this run's seeds are indexed in memory
+        threshold = self.near_duplicate_threshold
+        kept, duplicates = filter_near_duplicates(
+            questions, key=lambda q: q.get('question') or '', threshold=threshold,
+            lookup=lambda text: self.processed_questions.find_near_duplicate(text, threshold))
+        if duplicates:
+            requests = math.ceil(len(duplicates) / max(1, self.questions_per_request))
+            logger.info(f"Dropped {len(duplicates)} near-duplicate seed questions in "
+                        f"{time.perf_counter() - start:.2f}s, avoiding about {requests} API calls")
+            for question_data, match in duplicates:
+                logger.debug(f"Near-duplicate: {question_data.get('question')!r} ~ {match!r}")
+        return kept
+
+    def compact(self) -> None:
+        """Fold the journals into the consolidated JSON file.
+
+        The consolidated file is merged with every journal next to it,
+        including those of other processes, which are removed once folded in.
+        The existing records are streamed into the new file, so only the
+        journaled ones are held in memory. Only call this when no other
+        process is still writing.
+        """
+        journal_files = self.journal_files()
+        journaled = [record['question'] for path in journal_files
+                     for record in read_journal(path) if 'question' in record]
+        journal = self.journal or DebateJournal(self.journal_file)
+        try:
+            journal.compact(self.output_file, iter_dataset(self.output_file, journal_files))
+        finally:
+            if journal is not self.journal:
+                journal.close()
+        self.processed_questions.mark_compacted(self.output_file, journaled)
+        for path in journal_files[1:]:
+            if os.path.exists(path):
+                os.remove(path)
     
-    def expand_question(self, question_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def expand_question(self, question_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Expand a single philosophical question into a debate structure."""
         question_text = question_data.get('question', '')
         if not question_text:
@@ -107,52 +204,206 @@ class DatasetExpander:
         for attempt in range(MAX_RETRIES):
             try:
                 # Use the new philosophical debate generation method
-                debate_data = self.api.generate_philosophical_debate(question_text)
+                debate_data = await self.api.generate_philosophical_debate(
+                    question_text,
+                    category=question_data.get('category'),
+                    difficulty=question_data.get('difficulty'))
                 if debate_data:
-                    # Add metadata
-                    result = {
-                        **debate_data,
-                        'seed_question': question_data,
-                        'category': question_data.get('category', '哲学'),
-                        'difficulty': question_data.get('difficulty', '中等'),
-                        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
-                    }
-                    self.processed_questions.add(question_text)
-                    return result
+                    return self._with_metadata(question_data, debate_data)
                 else:
                     logger.warning(f"Attempt {attempt + 1} failed to generate debate for question")
             except Exception as e:
                 logger.error(f"Error expanding question (attempt {attempt + 1}): {e}")
                 
             if attempt < MAX_RETRIES - 1:
-                wait_time = (2 ** attempt) + random.uniform(0, 1)  # Add jitter
+                # Throttling is already handled (and Retry-After honored) by the
+                # client's concurrency controller; this only spaces out retries
+                # of rejected generations.
+                wait_time = retry_delay(attempt)
                 logger.info(f"Waiting {wait_time:.1f} seconds before retry...")
-                time.sleep(wait_time)
+                await asyncio.sleep(wait_time)
         
         logger.error(f"Failed to expand question after {MAX_RETRIES} attempts: {question_text}")
         return None
     
-    def process_batch(self, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Process a batch of questions and return the expanded data."""
+    def _with_metadata(self, question_data: Dict[str, Any], debate_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach the seed question metadata to a generated debate and mark it processed."""
+        result = {
+            **debate_data,
+            'seed_question': question_data,
+            'category': question_data.get('category', '哲学'),
+            'difficulty': question_data.get('difficulty', '中等'),
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self.processed_questions.add(question_data['question'])
+        return result
+
+    async def expand_questions(self, questions: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Expand several questions with one batched request.
+
+        Results are aligned with ``questions``; empty and already processed
+        questions get None. Questions whose debate is missing or invalid in
+        the batched answer fall back to ``expand_question`` and its retries.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(questions)
+        pending = [
+            (i, q) for i, q in enumerate(questions)
+            if q.get('question') and q['question'] not in self.processed_questions
+        ]
+        if not pending:
+            return results
+        logger.info(f"Expanding {len(pending)} questions in one request")
+        try:
+            debates = await self.api.generate_debate_batch([q for _, q in pending], retry_individually=False)
+        except Exception as e:
+            logger.error(f"Error expanding batched questions: {e}")
+            debates = [None] * len(pending)
+        for (i, question_data), debate_data in zip(pending, debates):
+            if debate_data:
+                results[i] = self._with_metadata(question_data, debate_data)
+            else:
+                results[i] = await self.expand_question(question_data)
+        return results
+
+    async def process_questions(self, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Expand questions with a pool of concurrent workers and return the expanded data.
+
+        Workers pull work units (one question, or ``questions_per_request``
+        questions) from a shared queue, so a slow generation never holds up
+        the rest. Pacing is left to the client's rate and concurrency
+        limiters instead of fixed sleeps, and each result is journaled as
+        soon as it completes.
+        """
+        size = max(1, self.questions_per_request)
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(0, len(questions), size):
+            queue.put_nowait(questions[i:i + size])
         expanded_data = []
-        for question in tqdm(questions, desc="Processing questions"):
-            result = self.expand_question(question)
-            if result:
-                expanded_data.append(result)
-                
-                # Save after each question to ensure progress isn't lost
-                current_data = self.existing_data + expanded_data
-                self.save_expanded_data(current_data)
-                
-                # Add a delay between API calls to avoid rate limiting
-                if len(expanded_data) < len(questions):  # Don't wait after the last one
-                    wait_time = DELAY_BETWEEN_REQUESTS + random.uniform(0, 1)  # Add some jitter
-                    time.sleep(wait_time)
-        
+        progress = tqdm(total=len(questions), desc="Processing questions")
+
+        async def worker() -> None:
+            while not queue.empty():
+                unit = queue.get_nowait()
+                try:
+                    if size > 1:
+                        results = await self.expand_questions(unit)
+                    else:
+                        results = await self._expand_one(unit[0])
+                except Exception as e:
+                    logger.error(f"Error expanding {len(unit)} question(s): {e}")
+                    results = []
+                for result in results:
+                    if result:
+                        self.journal.append(result)
+                        expanded_data.append(result)
+                progress.update(len(unit))
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.workers, queue.qsize()))))
+        finally:
+            progress.close()
         return expanded_data
+
+    async def process_queue(self) -> List[Dict[str, Any]]:
+        """Expand questions leased from the shared queue until it is drained.
+
+        Works like ``process_questions``, except that each worker claims its
+        next unit from ``self.queue``. A background task renews the leases
+        held by this process every ``QUEUE_HEARTBEAT_INTERVAL`` seconds;
+        questions are completed once their result is journaled and released
+        for another attempt when their generation fails. Idle workers keep
+        polling while other processes hold leases, so the questions of a
+        process that crashed are picked up once its leases expire.
+        """
+        size = max(1, self.questions_per_request)
+        held: Set[str] = set()
+        expanded_data = []
+        counts = self.queue.counts()
+        progress = tqdm(total=counts['pending'] + counts['expired'], desc=f"Processing {self.queue.worker_id}")
+        interval = min(QUEUE_HEARTBEAT_INTERVAL, self.queue.lease_seconds / 3)
+
+        async def worker() -> None:
+            while True:
+                leases = await asyncio.to_thread(self.queue.claim, size)
+                if not leases:
+                    if held or not await asyncio.to_thread(self.queue.drained):
+                        await asyncio.sleep(interval)
+                        continue
+                    return
+                held.update(lease.key for lease in leases)
+                unit = [lease.item for lease in leases]
+                try:
+                    if size > 1:
+                        results = await self.expand_questions(unit)
+                    else:
+                        results = await self._expand_one(unit[0])
+                except Exception as e:
+                    logger.error(f"Error expanding {len(unit)} question(s): {e}")
+                    results = [None] * len(unit)
+                for lease, result in zip(leases, results):
+                    if result:
+                        self.journal.append(result)
+                        expanded_data.append(result)
+                    if result or lease.key in self.processed_questions:
+                        if not await asyncio.to_thread(self.queue.complete, lease.key):
+                            logger.warning(f"Lease expired before completion: {lease.key[:50]}...")
+                    else:
+                        await asyncio.to_thread(self.queue.release, lease.key, "generation failed")
+                    held.discard(lease.key)
+                progress.update(len(unit))
+
+        async def heartbeat() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                for key in await asyncio.to_thread(self.queue.heartbeat, list(held)):
+                    logger.warning(f"Lost the lease on {key[:50]}..., another worker may expand it too")
+
+        renewer = asyncio.create_task(heartbeat())
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.workers)))
+        finally:
+            renewer.cancel()
+            progress.close()
+        return expanded_data
+
+    async def _expand_one(self, question_data: Dict[str, Any]) -> List[Optional[Dict[str, Any]]]:
+        return [await self.expand_question(question_data)]
     
     def run(self) -> None:
         """Run the dataset expansion process."""
+        asyncio.run(self.run_async())
+
+    async def run_async(self) -> None:
+        """Run the dataset expansion process inside an event loop."""
+        self.journal = DebateJournal(self.journal_file)
+        try:
+            await self._expand_all()
+        finally:
+            await self.api.aclose()
+            self.journal.close()
+            self.log_run_summary()
+
+    def log_run_summary(self) -> None:
+        """Log token usage and throughput of this run and write the summary file."""
+        summary = self.run_log.summary()
+        overall = summary["overall"]
+        if not overall["calls"]:
+            return
+        logger.info(f"Run {self.run_log.run_id}: {overall['accepted']} accepted debates from "
+                    f"{overall['api_calls']} API calls ({overall['outcomes']}), "
+                    f"{overall['prompt_tokens']} prompt + {overall['completion_tokens']} completion tokens, "
+                    f"{overall['wasted_tokens']} tokens on rejected outputs, "
+                    f"{overall['retries']} HTTP retries, cost {overall['cost']:.4f}")
+        for group, stats in summary["by_group"].items():
+            tokens = stats["tokens_per_accepted"]
+            logger.info(f"  {group}: {stats['accepted']}/{stats['questions']} questions, "
+                        f"{tokens:.0f} tokens per accepted debate" if tokens else
+                        f"  {group}: 0/{stats['questions']} questions accepted")
+        logger.info(f"Process metrics: {json.dumps(registry.snapshot(), ensure_ascii=False)}")
+        logger.info(f"Run log: {self.run_log.path}, summary: {self.run_log.write_summary()}")
+        self.run_log.close()
+
+    async def _expand_all(self) -> None:
         logger.info("Starting philosophical debate dataset expansion")
         start_time = time.time()
         
@@ -161,64 +412,108 @@ class DatasetExpander:
         
         # Load seed questions
         seed_questions = self.load_seed_questions()
+        if self.queue is not None:
+            await self._expand_from_queue(seed_questions)
+            return
         if not seed_questions:
             logger.error("No seed questions found or failed to load")
             return
             
         logger.info(f"Loaded {len(seed_questions)} seed questions")
         
-        # Filter out already processed questions
-        new_questions = [
+        # Filter out already processed questions and near-duplicates
+        new_questions = self.drop_near_duplicates([
             q for q in seed_questions 
             if q.get('question') not in self.processed_questions
-        ]
+        ])
         
         if not new_questions:
             logger.info("No new questions to process")
+            if any(os.path.getsize(path) for path in self.journal_files()):
+                self.compact()
             return
             
         logger.info(f"Found {len(new_questions)} new questions to process")
         
-        # Process in batches
-        total_batches = (len(new_questions) + BATCH_SIZE - 1) // BATCH_SIZE
-        for batch_num, i in enumerate(range(0, len(new_questions), BATCH_SIZE), 1):
-            batch = new_questions[i:i + BATCH_SIZE]
-            logger.info(f"Processing batch {batch_num}/{total_batches} ({len(batch)} questions)")
-            
-            expanded_batch = self.process_batch(batch)
-            if expanded_batch:
-                self.existing_data.extend(expanded_batch)
-                logger.info(f"Completed batch {batch_num}/{total_batches}, "
-                           f"processed: {len(expanded_batch)} questions, "
-                           f"total expanded: {len(self.existing_data)}")
-            
-            # Add a longer delay between batches if not the last batch
-            if i + BATCH_SIZE < len(new_questions):
-                wait_time = DELAY_BETWEEN_REQUESTS * 3
-                logger.info(f"Batch completed. Waiting {wait_time:.1f} seconds before next batch...")
-                time.sleep(wait_time)
+        expanded = await self.process_questions(new_questions)
+        logger.info(f"Expanded {len(expanded)} of {len(new_questions)} questions, "
+                    f"total expanded: {len(self.processed_questions)}")
         
-        # Final save
-        if self.existing_data:
-            self.save_expanded_data(self.existing_data)
+        # Fold the journal into the consolidated file
+        if expanded or any(os.path.getsize(path) for path in self.journal_files()):
+            self.compact()
         
         elapsed = time.time() - start_time
         logger.info(f"Dataset expansion completed in {elapsed/60:.1f} minutes. "
                    f"Processed {len(new_questions)} questions, "
-                   f"total expanded questions: {len(self.existing_data)}")
+                   f"total expanded questions: {len(self.processed_questions)}")
+
+    async def _expand_from_queue(self, seed_questions: List[Dict[str, Any]]) -> None:
+        start_time = time.time()
+        # Every process may enqueue the seed list; questions already queued are ignored
+        new_questions = self.drop_near_duplicates(
+            [q for q in seed_questions if q.get('question') not in self.processed_questions])
+        added = self.queue.enqueue(new_questions)
+        logger.info(f"Queued {added} new questions in {self.queue.path}, "
+                    f"worker {self.queue.worker_id}: {self.queue.counts()}")
+
+        expanded = await self.process_queue()
+        logger.info(f"Worker {self.queue.worker_id} expanded {len(expanded)} questions "
+                    f"in {(time.time() - start_time)/60:.1f} minutes")
+
+        counts = self.queue.counts()
+        if self.queue.claim_compaction():
+            # Results of every worker are read back from their journals
+            compacted = False
+            try:
+                self.compact()
+                compacted = True
+            finally:
+                self.queue.finish_compaction(compacted)
+            logger.info(f"Queue drained ({counts}), dataset compacted into {self.output_file}")
+        elif self.queue.drained():
+            logger.info(f"Queue drained ({counts}); another worker compacts the dataset")
+        else:
+            logger.info(f"Other workers still hold questions ({counts}); the last one compacts the dataset")
 
 
 def main():
     """Main function to run the dataset expansion."""
+    parser = argparse.ArgumentParser(description="Expand seed questions into philosophical debates")
+    parser.add_argument("--compact", action="store_true",
+                        help="Only fold the journals of interrupted runs into the dataset file")
+    parser.add_argument("--queue", nargs="?", const=WORK_QUEUE_PATH,
+                        help=f"Share the seed questions with other processes through this queue "
+                             f"(default {WORK_QUEUE_PATH})")
+    parser.add_argument("--worker_id", help="Name of this process in the queue (default host-pid-random)")
+    parser.add_argument("--workers", type=int, default=EXPANSION_WORKERS, help="Concurrent workers in this process")
+    parser.add_argument("--near_duplicate_threshold", type=float, default=NEAR_DUPLICATE_THRESHOLD,
+                        help="Drop seed questions at least this similar to an earlier one (0 disables)")
+    parser.add_argument("--queue_status", action="store_true", help="Print the item counts of the queue and exit")
+    parser.add_argument("--requeue_failed", action="store_true", help="Make failed queue items pending again")
+    args = parser.parse_args()
+    queue = WorkQueue(args.queue or WORK_QUEUE_PATH, worker_id=args.worker_id) if (
+        args.queue or args.queue_status or args.requeue_failed) else None
     try:
-        expander = DatasetExpander()
-        expander.run()
+        if args.requeue_failed:
+            logger.info(f"Requeued {queue.requeue_failed()} failed questions")
+        if args.queue_status or args.requeue_failed:
+            print(json.dumps(queue.counts()))
+            return
+        expander = DatasetExpander(workers=args.workers, queue=queue,
+                                   near_duplicate_threshold=args.near_duplicate_threshold)
+        if args.compact:
+            expander.compact()
+        else:
+            expander.run()
     except KeyboardInterrupt:
         logger.info("Process interrupted by user")
     except Exception as e:
         logger.exception("An unexpected error occurred")
         raise
     finally:
+        if queue is not None:
+            queue.close()
         # Ensure all logs are flushed
         for handler in logging.root.handlers:
             handler.flush()
@@ -0,0 +1,155 @@
+import logging
+import os
+import random
+import sys
+import tempfile
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _CountTree:
+    """Fenwick tree of the lines left in each run, to draw a run in O(log runs)."""
+
+    def __init__(self, counts: List[int]):
+        self.size = len(counts)
+        self.tree = [0] + list(counts)
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+        self.top = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+    def decrement(self, index: int) -> None:
+        index += 1
+        while index <= self.size:
+            self.tree[index] -= 1
+            index += index & -index
+
+    def find(self, position: int) -> int:
+        """Index of the run holding the ``position``-th remaining line."""
+        index = 0
+        step = self.top
+        while step:
+            candidate = index + step
+            if candidate <= self.size and self.tree[candidate] <= position:
+                index = candidate
+                position -= self.tree[candidate]
+            step >>= 1
+        return index
+
+
+class ExternalShuffle:
+    """Uniformly shuffle more lines of text than fit in memory.
+
+    Lines are buffered until they take ``memory_limit`` bytes, then the
+    buffer is shuffled and written to a temporary run file. Iterating merges
+    the runs by drawing each next line from a run chosen with probability
+    proportional to the lines it has left, which together with the shuffled
+    runs gives a uniformly random order. If everything fits in one buffer
+    nothing touches the disk. Memory stays around ``memory_limit`` plus one
+    read buffer per run. Lines must not contain newlines (JSON from
+    ``json.dumps`` never does).
+
+    At most ``max_fan_in`` runs are open at once: with more, groups of runs
+    are first merged the same way into longer runs (which are uniformly
+    shuffled too), so the number of open files stays bounded however small
+    the memory limit is relative to the data.
+    """
+
+    def __init__(self, memory_limit: int, temp_dir: Optional[str] = None, seed: Optional[int] = None,
+                 read_buffer: int = 1 << 16, max_fan_in: int = 256):
+        self.memory_limit = memory_limit
+        self.read_buffer = read_buffer
+        self.max_fan_in = max(2, max_fan_in)
+        self.random = random.Random(seed)
+        self._temp = tempfile.TemporaryDirectory(prefix="shuffle-", dir=temp_dir)
+        self._buffer: List[str] = []
+        self._buffer_bytes = 0
+        self._runs: List[str] = []
+        self._run_sizes: List[int] = []
+        self._merged = 0
+        self._count = 0
+
+    def __enter__(self) -> "ExternalShuffle":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, line: str) -> None:
+        self._buffer.append(line)
+        self._buffer_bytes += sys.getsizeof(line) + 8
+        self._count += 1
+        if self._buffer_bytes >= self.memory_limit:
+            self._spill()
+
+    def _spill(self) -> None:
+        self.random.shuffle(self._buffer)
+        path = os.path.join(self._temp.name, f"run-{len(self._runs):05d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            # Line by line: joining would copy the whole buffer
+            for line in self._buffer:
+                f.write(line)
+                f.write("\n")
+        self._runs.append(path)
+        self._run_sizes.append(len(self._buffer))
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    def __iter__(self) -> Iterator[str]:
+        if not self._runs:
+            self.random.shuffle(self._buffer)
+            yield from self._buffer
+            return
+        if self._buffer:
+            self._spill()
+        while len(self._runs) > self.max_fan_in:
+            self._merge_pass()
+        logger.info(f"Merging {len(self._runs)} shuffled runs of {self._count} lines")
+        yield from self._merge(self._runs, self._run_sizes)
+
+    def _merge(self, paths: List[str], sizes: List[int]) -> Iterator[str]:
+        """Lines of the runs in ``paths``, each drawn from a run picked in proportion to its lines left."""
+        files = [open(path, "r", encoding="utf-8", buffering=self.read_buffer) for path in paths]
+        remaining = _CountTree(sizes)
+        total = sum(sizes)
+        try:
+            while total:
+                run = remaining.find(self.random.randrange(total))
+                remaining.decrement(run)
+                total -= 1
+                yield files[run].readline()[:-1]
+        finally:
+            for f in files:
+                f.close()
+
+    def _merge_pass(self) -> None:
+        """Merge groups of ``max_fan_in`` runs into single runs."""
+        logger.info(f"Merging {len(self._runs)} shuffled runs in groups of {self.max_fan_in}")
+        runs, run_sizes = [], []
+        for start in range(0, len(self._runs), self.max_fan_in):
+            paths = self._runs[start:start + self.max_fan_in]
+            sizes = self._run_sizes[start:start + self.max_fan_in]
+            if len(paths) == 1:
+                runs += paths
+                run_sizes += sizes
+                continue
+            path = os.path.join(self._temp.name, f"merged-{self._merged:05d}.txt")
+            self._merged += 1
+            with open(path, "w", encoding="utf-8") as f:
+                for line in self._merge(paths, sizes):
+                    f.write(line)
+                    f.write("\n")
+            for consumed in paths:
+                os.remove(consumed)
+            runs.append(path)
+            run_sizes.append(sum(sizes))
+        self._runs, self._run_sizes = runs, run_sizes
+
+    def close(self) -> None:
+        self._buffer = []
+        self._temp.cleanup()
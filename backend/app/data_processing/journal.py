@@ -0,0 +1,256 @@
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Union
+
+logger = logging.getLogger(__name__)
+
+_SEPARATORS = re.compile(r"[\s,]*")
+_ELEMENT_ENDS = frozenset(" \t\r\n,]")
+
+
+def fsync_directory(path: str) -> None:
+    """Persist a rename or file creation in ``path``; a no-op where directories cannot be opened."""
+    try:
+        fd = os.open(path or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path: str, write: Callable[[TextIO], None]) -> None:
+    temp_file = f"{path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, path)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    fsync_directory(os.path.dirname(path))
+
+
+def write_json_atomic(path: str, data: Any, **dump_options) -> None:
+    """Write JSON to a temporary file, fsync it and rename it over ``path``.
+
+    The temporary name is unique to the call, so concurrent writers never
+    rename or remove each other's file.
+    """
+    _write_atomic(path, lambda f: json.dump(data, f, **dump_options))
+
+
+def write_json_array_atomic(path: str, records: Iterable[Any], **dump_options) -> int:
+    """``write_json_atomic`` for a list given as an iterable, written one element at a time.
+
+    The output is the same as dumping the whole list, without holding it in
+    memory. Returns the number of elements written.
+    """
+    indent = dump_options.get("indent")
+    if isinstance(indent, int):
+        indent = " " * indent
+    count = 0
+
+    def write(f: TextIO) -> None:
+        nonlocal count
+        f.write("[")
+        for record in records:
+            text = json.dumps(record, **dump_options)
+            if indent is None:
+                f.write(", " + text if count else text)
+            else:
+                # Strings are escaped, so every newline comes from the indentation
+                f.write((",\n" if count else "\n") + indent + text.replace("\n", "\n" + indent))
+            count += 1
+        if count and indent is not None:
+            f.write("\n")
+        f.write("]")
+
+    _write_atomic(path, write)
+    return count
+
+
+class DebateJournal:
+    """Append-only JSONL log of expanded debates.
+
+    Each ``append`` writes one record and fsyncs it, so a crash loses at most
+    the record being written. The cost of saving a result is independent of
+    the dataset size, unlike rewriting the consolidated JSON after every
+    question. A torn last line left by a crash is cut off when the journal is
+    opened. ``compact`` folds the journal into the consolidated JSON file and
+    empties it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._repair()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _repair(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            # Find the end of the last complete record
+            position = size
+            while position > 0:
+                step = min(4096, position)
+                f.seek(position - step)
+                chunk = f.read(step)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    position = position - step + newline + 1
+                    break
+                position -= step
+            logger.warning(f"Dropping {size - position} bytes of an incomplete record at the end of {self.path}")
+            f.truncate(position)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, sort_keys=True) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return read_journal(self.path)
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def compact(self, output_file: str, records: Optional[Iterable[Dict[str, Any]]] = None) -> int:
+        """Write the consolidated dataset to ``output_file`` and empty the journal.
+
+        ``records`` defaults to the existing consolidated data merged with the
+        journal (see ``iter_dataset``) and is streamed to the file. The JSON
+        file is replaced atomically before the journal is truncated, so a
+        crash in between leaves records in both places, which loading
+        deduplicates. If ``records`` raises, the file and the journal are
+        both left as they were. Returns the number of records written.
+        """
+        with self._lock:
+            if records is None:
+                records = iter_dataset(output_file, self.path)
+            count = write_json_array_atomic(output_file, records, ensure_ascii=False, indent=2, sort_keys=True)
+            self._file.truncate(0)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        logger.info(f"Compacted {self.path} into {output_file} ({count} records)")
+        return count
+
+
+def read_journal(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a journal file, skipping lines that are not valid JSON."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping unreadable record on line {number} of {path}")
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """Elements of a JSON array file, decoded one at a time from ``chunk_size`` reads.
+
+    Memory stays bounded by the chunk and the largest element instead of the
+    whole file. A file whose root is not an array is loaded whole and yielded
+    as its single value.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size)
+        position = _SEPARATORS.match(buffer).end()
+        if buffer[position:position + 1] != "[":
+            f.seek(0)
+            yield json.load(f)
+            return
+        position += 1
+        eof = False
+        while True:
+            position = _SEPARATORS.match(buffer, position).end()
+            end = error = None
+            if position < len(buffer):
+                if buffer[position] == "]":
+                    return
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as e:
+                    error = e
+                # A number or literal running into the end of the buffer (or cut off
+                # before it, as in "1." of "1.5") may continue in the next chunk
+                if end is not None and (eof or buffer[end:end + 1] in _ELEMENT_ENDS):
+                    yield value
+                    position = end
+                    continue
+            if eof:
+                raise error or json.JSONDecodeError("Unterminated array", buffer, position)
+            more = f.read(chunk_size)
+            eof = not more
+            buffer = buffer[position:] + more
+            position = 0
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a ``.jsonl`` file or of a JSON array file, streamed."""
+    if path.endswith(".jsonl"):
+        return read_journal(path)
+    return iter_json_array(path)
+
+
+def iter_dataset(output_file: str, journal_files: Union[str, List[str]]) -> Iterator[Dict[str, Any]]:
+    """Consolidated records followed by journaled ones, streamed; a later record replaces an
+    earlier one for the same question. ``journal_files`` is one journal path or several.
+
+    Only the journals (emptied by every compaction) are held in memory; the
+    consolidated file is read one record at a time, so folding the journals
+    in costs memory proportional to them rather than to the dataset. A
+    consolidated file that cannot be decoded raises JSONDecodeError instead
+    of ending the stream early, so a compaction never replaces it with the
+    records before the damage.
+    """
+    journaled: Dict[Any, Dict[str, Any]] = {}
+    unkeyed: List[Dict[str, Any]] = []
+    if isinstance(journal_files, str):
+        journal_files = [journal_files]
+    for record in (record for path in journal_files for record in read_journal(path)):
+        if 'question' in record:
+            journaled.pop(record['question'], None)
+            journaled[record['question']] = record
+        else:
+            unkeyed.append(record)
+    if os.path.exists(output_file):
+        try:
+            for record in iter_json_array(output_file):
+                if record.get('question') not in journaled:
+                    yield record
+        except json.JSONDecodeError as e:
+            logger.error(f"Error loading existing expanded data from {output_file}: {e}")
+            raise
+    yield from unkeyed
+    yield from journaled.values()
@@ -61,3 +61,8 @@ PHILOSOPHY_PROMPT = """你是一个专业的哲学思辨图谱数据生成助手
 请基于以下哲学问题生成符合上述格式的思辨图谱数据：
 
 """
+
+# Appended after PHILOSOPHY_PROMPT when several questions share one request,
+# followed by the numbered questions
+BATCH_PROMPT_SUFFIX = """本次请求包含多个哲学问题，请为每个问题分别生成一个符合上述格式的思辨图谱。
+输出一个 JSON 对象，格式为 {"debates": [思辨图谱1, 思辨图谱2, ...]}，数组顺序与问题编号一致，每个思辨图谱的 question 字段原样填写对应的问题（不含编号）。"""
@@ -1,49 +1,72 @@
+import argparse
 import json
 import os
 from pathlib import Path
-from typing import Dict, List, Any
-import random
+from typing import Dict, Iterable, Iterator, Any, List, Optional, Tuple
 from loguru import logger
 from tqdm import tqdm
 
+from .config import SHUFFLE_MEMORY_LIMIT_MB
+from .external_shuffle import ExternalShuffle
+from .journal import fsync_directory, iter_records
+from .split_manifest import SPLITS, SplitManifest, assign_split
+
 # Configure logging
 logger.add("logs/prepare_training_data.log", rotation="10 MB")
 
 class TrainingDataPreparer:
-    def __init__(self, input_path: str, output_dir: str):
+    def __init__(self, input_path: str, output_dir: str, memory_limit_mb: float = SHUFFLE_MEMORY_LIMIT_MB,
+                 seed: Optional[int] = None, append: bool = False):
         """
         Initialize the training data preparer.
         
+        Debates are streamed from the input file and examples are shuffled
+        on disk, so memory use stays around ``memory_limit_mb`` whatever the
+        corpus size.
+        
+        Each debate goes to the split picked by a hash of its question (see
+        ``assign_split``), so all its examples stay in one split and a debate
+        lands in the same split on every run. The written questions are
+        recorded in ``split_manifest.sqlite3`` in the output directory; with
+        ``append`` only debates missing from it are converted, and their
+        examples are appended to the existing split files, which are left
+        byte-for-byte unchanged otherwise. Without ``append`` the split files
+        and the manifest are rebuilt from the input.
+        
         Args:
-            input_path: Path to the input JSON file containing philosophical debates
+            input_path: Path to the input JSON (array) or JSONL file containing philosophical debates
             output_dir: Directory to save the prepared training data
+            memory_limit_mb: Examples buffered in memory before a shuffled run is written to disk
+            seed: Seed of the shuffle, for reproducible output
+            append: Append new debates to the existing splits instead of rebuilding them
         """
         self.input_path = input_path
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_limit = int(memory_limit_mb * 1024 * 1024)
+        self.seed = seed
+        self.append = append
+        self.manifest_path = self.output_dir / "split_manifest.sqlite3"
         
-        # Training data splits
-        self.train_data = []
-        self.val_data = []
-        self.test_data = []
+        # Examples written to each split
+        self.split_counts = {"train": 0, "val": 0, "test": 0}
         
         # Split ratios
         self.train_ratio = 0.8
         self.val_ratio = 0.1
         self.test_ratio = 0.1
     
-    def load_data(self) -> List[Dict[str, Any]]:
-        """Load the philosophical debates data."""
+    def load_data(self) -> Iterator[Dict[str, Any]]:
+        """Stream the philosophical debates, one record at a time."""
         logger.info(f"Loading data from {self.input_path}")
-        with open(self.input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        logger.info(f"Loaded {len(data)} philosophical debates")
-        return data
+        count = 0
+        for debate in iter_records(self.input_path):
+            count += 1
+            yield debate
+        logger.info(f"Loaded {count} philosophical debates")
     
-    def convert_to_training_format(self, debate: Dict[str, Any]) -> List[Dict[str, str]]:
+    def convert_to_training_format(self, debate: Dict[str, Any]) -> Iterator[Dict[str, str]]:
         """Convert a single debate into training examples."""
-        examples = []
-        
         # Create examples for each standpoint
         for standpoint in debate.get('standpoints', []):
             # Create instruction
@@ -53,99 +76,139 @@ class TrainingDataPreparer:
             arguments = "\n".join([f"- {arg['text']}" for arg in standpoint.get('arguments', [])])
             response = f"论据：\n{arguments}"
             
-            examples.append({
+            yield {
                 "instruction": instruction,
                 "input": "",
                 "output": response,
                 "category": debate.get('category', '哲学')
-            })
+            }
             
             # Create examples for counter-questions
             for cq in debate.get('counter_questions', []):
                 cq_instruction = f"请针对以下哲学立场，提出一个具有挑战性的反问：\n\n问题：{debate['question']}\n立场：{standpoint['text']}\n"
                 cq_response = f"反问：{cq['text']}"
                 
-                examples.append({
+                yield {
                     "instruction": cq_instruction,
                     "input": "",
                     "output": cq_response,
                     "category": debate.get('category', '哲学') + "-反问"
-                })
-        
-        return examples
+                }
     
-    def split_data(self, data: List[Dict[str, str]]) -> None:
-        """Split data into train, validation, and test sets."""
-        # Shuffle the data
-        random.shuffle(data)
-        
-        # Calculate split indices
-        n = len(data)
-        train_end = int(n * self.train_ratio)
-        val_end = train_end + int(n * self.val_ratio)
+    def iter_new_debates(self, manifest: SplitManifest) -> Iterator[Tuple[str, List[Dict[str, str]]]]:
+        """Split and training examples of each debate not yet in ``manifest``.
         
-        # Split the data
-        self.train_data = data[:train_end]
-        self.val_data = data[train_end:val_end]
-        self.test_data = data[val_end:]
-        
-        logger.info(f"Split data into: {len(self.train_data)} train, "
-                   f"{len(self.val_data)} validation, {len(self.test_data)} test examples")
+        A debate that fails to convert is skipped; the question of each
+        yielded debate is added to the manifest with its split.
+        """
+        debates = 0
+        known = 0
+        examples = 0
+        for debate in tqdm(self.load_data(), desc="Processing debates"):
+            debates += 1
+            question = debate.get('question')
+            if not question:
+                logger.error("Skipping debate without a question")
+                continue
+            if question in manifest:
+                known += 1
+                continue
+            try:
+                converted = list(self.convert_to_training_format(debate))
+            except Exception as e:
+                logger.error(f"Error processing debate {question}: {str(e)}")
+                continue
+            split = self.split_data(question)
+            manifest.add(question, split)
+            examples += len(converted)
+            yield split, converted
+        logger.info(f"Generated {examples} training examples from {debates - known} new debates "
+                    f"({known} already in the splits)")
     
-    def save_data(self) -> None:
-        """Save the prepared data to files."""
-        # Save training data
-        train_path = self.output_dir / "train.jsonl"
-        with open(train_path, 'w', encoding='utf-8') as f:
-            for example in self.train_data:
-                f.write(json.dumps(example, ensure_ascii=False) + '\n')
-        
-        # Save validation data
-        val_path = self.output_dir / "val.jsonl"
-        with open(val_path, 'w', encoding='utf-8') as f:
-            for example in self.val_data:
-                f.write(json.dumps(example, ensure_ascii=False) + '\n')
-        
-        # Save test data
-        test_path = self.output_dir / "test.jsonl"
-        with open(test_path, 'w', encoding='utf-8') as f:
-            for example in self.test_data:
-                f.write(json.dumps(example, ensure_ascii=False) + '\n')
+    def split_data(self, question: str) -> str:
+        """Split (train, val or test) of the debate asking ``question``."""
+        return assign_split(question, self.train_ratio, self.val_ratio)
+    
+    def save_data(self, split: str, lines: Iterable[str]) -> Path:
+        """Write the shuffled example lines of a split, after the existing ones in append mode.
         
-        logger.info(f"Saved training data to {train_path}")
-        logger.info(f"Saved validation data to {val_path}")
-        logger.info(f"Saved test data to {test_path}")
+        A rebuild writes a temporary file next to the split instead, so the old
+        splits survive a failed run; ``prepare_data`` moves the temporary files
+        over the splits once all of them are written. Returns the written file.
+        """
+        path = self.output_dir / f"{split}.jsonl"
+        target = path if self.append else path.with_suffix(".jsonl.tmp")
+        count = 0
+        with open(target, 'a' if self.append else 'w', encoding='utf-8') as f:
+            for line in lines:
+                f.write(line + '\n')
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+        self.split_counts[split] = count
+        logger.info(f"{'Appended' if self.append else 'Saved'} {count} examples to {target}")
+        return target
     
     def prepare_data(self) -> None:
         """Prepare the training data."""
-        # Load the data
-        debates = self.load_data()
-        
-        # Convert to training format
-        all_examples = []
-        for debate in tqdm(debates, desc="Processing debates"):
-            try:
-                examples = self.convert_to_training_format(debate)
-                all_examples.extend(examples)
-            except Exception as e:
-                logger.error(f"Error processing debate {debate.get('question', 'unknown')}: {str(e)}")
-        
-        logger.info(f"Generated {len(all_examples)} training examples from {len(debates)} debates")
-        
-        # Split the data
-        self.split_data(all_examples)
+        paths = {split: str(self.output_dir / f"{split}.jsonl") for split in SPLITS}
+        ratios = {"train": self.train_ratio, "val": self.val_ratio, "test": self.test_ratio}
+        manifest = SplitManifest(str(self.manifest_path))
+        shuffles = {}
+        try:
+            if self.append:
+                manifest.recover(paths)
+            manifest.begin(rebuild=not self.append)
+            # Each split is shuffled separately, with its share of the memory budget
+            shuffles = {split: ExternalShuffle(int(self.memory_limit * ratios[split]),
+                                               temp_dir=str(self.output_dir),
+                                               seed=None if self.seed is None else self.seed + i)
+                        for i, split in enumerate(SPLITS)}
+            for split, examples in self.iter_new_debates(manifest):
+                for example in examples:
+                    shuffles[split].add(json.dumps(example, ensure_ascii=False))
+            
+            written = {split: self.save_data(split, shuffles[split]) for split in SPLITS}
+            if not self.append:
+                # The old splits are only replaced once every new one is on disk
+                for split in SPLITS:
+                    os.replace(written[split], paths[split])
+                fsync_directory(str(self.output_dir))
+            manifest.commit(paths)
+        except BaseException:
+            manifest.rollback()
+            if not self.append:
+                for split in SPLITS:
+                    Path(paths[split]).with_suffix(".jsonl.tmp").unlink(missing_ok=True)
+            raise
+        finally:
+            for shuffle in shuffles.values():
+                shuffle.close()
+            manifest.close()
         
-        # Save the data
-        self.save_data()
+        logger.info(f"Split data into: {self.split_counts['train']} train, "
+                    f"{self.split_counts['val']} validation, {self.split_counts['test']} test examples")
 
 
-if __name__ == "__main__":
-    # Configuration
-    INPUT_PATH = "data/philosophical_debates.json"
-    OUTPUT_DIR = "data/processed"
+def main():
+    parser = argparse.ArgumentParser(description="Convert philosophical debates into training data splits")
+    parser.add_argument("--input_path", default="data/philosophical_debates.json",
+                        help="Debates as a JSON array or JSONL file")
+    parser.add_argument("--output_dir", default="data/processed", help="Directory for train/val/test.jsonl")
+    parser.add_argument("--memory_limit_mb", type=float, default=SHUFFLE_MEMORY_LIMIT_MB,
+                        help="Examples kept in memory before shuffled runs are written to disk")
+    parser.add_argument("--seed", type=int, help="Shuffle seed, for reproducible output")
+    parser.add_argument("--append", action="store_true",
+                        help="Only add debates not yet in the splits, appending to the existing files")
+    args = parser.parse_args()
     
     # Prepare the data
-    preparer = TrainingDataPreparer(INPUT_PATH, OUTPUT_DIR)
+    preparer = TrainingDataPreparer(args.input_path, args.output_dir, args.memory_limit_mb, args.seed,
+                                    args.append)
     preparer.prepare_data()
     
     logger.info("Data preparation completed successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Set
+
+from .config import NEAR_DUPLICATE_SHINGLE_SIZE, NEAR_DUPLICATE_NUM_PERM, NEAR_DUPLICATE_BANDS
+from .dedup import fingerprint, jaccard, minhash_signature, signature_bands
+from .journal import iter_json_array, read_journal
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA_VERSION = 2
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (id INTEGER PRIMARY KEY, question TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS lsh (key INTEGER NOT NULL, id INTEGER NOT NULL, PRIMARY KEY (key, id)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+# The LSH keys depend on these; the keys are recomputed when they change. The shingle hashes
+# under them are builtin tuple hashes, which only hold for one interpreter version and word size.
+_LSH_PARAMS = (f"{NEAR_DUPLICATE_SHINGLE_SIZE}:{NEAR_DUPLICATE_NUM_PERM}:{NEAR_DUPLICATE_BANDS}:"
+               f"{sys.implementation.cache_tag}:{sys.hash_info.width}")
+
+
+def _lsh_keys(hashes: Set[int]) -> List[int]:
+    """Keys of a question in the lsh table, one per band of its MinHash signature.
+
+    A key is the first 8 bytes of the BLAKE2b digest of the band number and
+    values, packed little-endian, read as a signed integer (SQLite's integer
+    range); unlike ``dedup.band_keys`` it does not depend on how the
+    interpreter hashes tuples.
+    """
+    signature = minhash_signature(hashes, NEAR_DUPLICATE_NUM_PERM)
+    return [int.from_bytes(hashlib.blake2b(struct.pack(f"<{len(values) + 1}q", band, *values),
+                                           digest_size=8).digest(), "big", signed=True)
+            for band, values in enumerate(signature_bands(signature, NEAR_DUPLICATE_BANDS))]
+
+
+def file_signature(path: str) -> Optional[str]:
+    """Size and modification time of ``path``, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class ProcessedIndex:
+    """On-disk set of the questions already expanded into a dataset file.
+
+    The questions of the consolidated dataset are kept in a SQLite table,
+    together with the size and modification time the dataset had when they
+    were indexed. Opening the index and checking a question take
+    milliseconds whatever the dataset size, instead of parsing the whole
+    JSON file at startup; the dataset is only read again when it was changed
+    by something other than ``mark_compacted`` (the index is then rebuilt).
+
+    Questions of journaled results are indexed by ``sync``, which reads the
+    journals (small, as they are emptied by every compaction). Questions
+    expanded during this run are only held in memory (``add``); the index
+    learns them from the journals folded in by ``mark_compacted``, so it
+    never claims a question whose result was not saved.
+
+    Each indexed question also gets the LSH band keys of its MinHash
+    signature (see ``dedup``), computed once when it is added, so
+    ``find_near_duplicate`` checks a new seed question against the whole
+    dataset with a few indexed lookups instead of building an in-memory
+    LSH index of every expanded question at startup.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._session: Set[str] = set()
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            # An index from an older layout; it is rebuilt from the dataset by the next sync
+            self._conn.executescript("DROP TABLE IF EXISTS questions; DROP TABLE IF EXISTS lsh; "
+                                     "DROP TABLE IF EXISTS meta;")
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __contains__(self, question: str) -> bool:
+        if question in self._session:
+            return True
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM questions WHERE question = ?", (question,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            indexed = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+        return indexed + len(self._session)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            indexed = [row[0] for row in self._conn.execute("SELECT question FROM questions ORDER BY id")]
+        yield from indexed
+        yield from self._session
+
+    def add(self, question: str) -> None:
+        """Mark a question expanded during this run."""
+        self._session.add(question)
+
+    def _get(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _insert(self, questions: Iterable[str], dataset_file: Optional[str] = None, rebuild: bool = False) -> int:
+        """Index ``questions`` not indexed yet, with their LSH keys; returns how many were new."""
+        added = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if rebuild:
+                    self._conn.execute("DELETE FROM questions")
+                    self._conn.execute("DELETE FROM lsh")
+                    self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('lsh', ?)", (_LSH_PARAMS,))
+                for question in questions:
+                    cursor = self._conn.execute("INSERT OR IGNORE INTO questions (question) VALUES (?)", (question,))
+                    if cursor.rowcount:
+                        added += 1
+                        self._add_lsh_keys(cursor.lastrowid, question)
+                if dataset_file is not None:
+                    self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('dataset', ?)",
+                                       (file_signature(dataset_file) or "",))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return added
+
+    def _add_lsh_keys(self, question_id: int, question: str) -> None:
+        _, hashes = fingerprint(question, NEAR_DUPLICATE_SHINGLE_SIZE)
+        self._conn.executemany("INSERT OR IGNORE INTO lsh VALUES (?, ?)",
+                               ((key, question_id) for key in _lsh_keys(hashes)))
+
+    def _reindex_lsh(self) -> None:
+        """Recompute the LSH keys of every question, after the LSH parameters changed."""
+        start = time.perf_counter()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM lsh")
+                last = 0
+                while True:
+                    rows = self._conn.execute("SELECT id, question FROM questions WHERE id > ? ORDER BY id LIMIT 10000",
+                                              (last,)).fetchall()
+                    if not rows:
+                        break
+                    for question_id, question in rows:
+                        self._add_lsh_keys(question_id, question)
+                    last = rows[-1][0]
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('lsh', ?)", (_LSH_PARAMS,))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        logger.info(f"Recomputed the LSH keys of {self.path} in {time.perf_counter() - start:.2f}s")
+
+    def find_near_duplicate(self, text: str, threshold: float) -> Optional[str]:
+        """An indexed question whose shingles overlap ``text``'s by at least ``threshold`` (Jaccard).
+
+        Candidates share an LSH band with ``text`` and are verified with the
+        exact similarity, like ``NearDuplicateIndex`` does. Questions only
+        added during this run (``add``) are not considered.
+        """
+        _, hashes = fingerprint(text, NEAR_DUPLICATE_SHINGLE_SIZE)
+        keys = _lsh_keys(hashes)
+        with self._lock:
+            candidates = [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT q.question FROM lsh JOIN questions q ON q.id = lsh.id "
+                f"WHERE lsh.key IN ({','.join('?' * len(keys))})", keys)]
+        for candidate in candidates:
+            if jaccard(hashes, fingerprint(candidate, NEAR_DUPLICATE_SHINGLE_SIZE)[1]) >= threshold:
+                return candidate
+        return None
+
+    def sync(self, dataset_file: str, journal_files: List[str]) -> None:
+        """Bring the index up to date with ``dataset_file`` and the journals next to it."""
+        with self._lock:
+            indexed = self._get("dataset")
+            lsh_params = self._get("lsh")
+        if indexed != (file_signature(dataset_file) or ""):
+            start = time.perf_counter()
+            questions: Iterable[str] = ()
+            if os.path.exists(dataset_file):
+                logger.info(f"{dataset_file} changed since it was indexed, rebuilding {self.path}")
+                questions = self._dataset_questions(dataset_file)
+            added = self._insert(questions, dataset_file, rebuild=True)
+            if added:
+                logger.info(f"Indexed {added} questions in {time.perf_counter() - start:.2f}s")
+        elif lsh_params != _LSH_PARAMS:
+            self._reindex_lsh()
+        self._insert(record['question'] for path in journal_files
+                     for record in read_journal(path) if 'question' in record)
+
+    @staticmethod
+    def _dataset_questions(dataset_file: str) -> Iterator[str]:
+        """Questions of the consolidated dataset, streamed.
+
+        A decode error is raised rather than ending the stream early: the
+        rebuild is then rolled back, so a partly read dataset is never
+        recorded as indexed and the next ``sync`` reads it again.
+        """
+        try:
+            for record in iter_json_array(dataset_file):
+                if 'question' in record:
+                    yield record['question']
+        except json.JSONDecodeError as e:
+            logger.error(f"Error loading existing expanded data from {dataset_file}: {e}")
+            raise
+
+    def mark_compacted(self, dataset_file: str, questions: Iterable[str]) -> None:
+        """Record that ``dataset_file`` was rewritten with the journaled ``questions`` folded in."""
+        self._insert(questions, dataset_file)
+        self._session.clear()
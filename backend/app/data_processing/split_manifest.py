@@ -0,0 +1,115 @@
+import hashlib
+import logging
+import os
+import sqlite3
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+SPLITS = ("train", "val", "test")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (question TEXT PRIMARY KEY, split TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS files (split TEXT PRIMARY KEY, size INTEGER NOT NULL, inode INTEGER);
+"""
+
+
+def assign_split(question: str, train_ratio: float, val_ratio: float) -> str:
+    """Split of a debate, from a hash of its question.
+
+    The first 8 bytes of the BLAKE2b digest of the question, read as a
+    fraction of 2**64, are compared with the cumulative ratios. The result
+    only depends on the question text (unlike ``hash``, which is salted per
+    process), so every example of a debate lands in the same split and a
+    debate keeps its split across runs and machines. Split sizes follow the
+    ratios on average rather than exactly.
+    """
+    digest = hashlib.blake2b(question.encode("utf-8"), digest_size=8).digest()
+    position = int.from_bytes(digest, "big") / 2 ** 64
+    if position < train_ratio:
+        return "train"
+    if position < train_ratio + val_ratio:
+        return "val"
+    return "test"
+
+
+class SplitManifest:
+    """Record of the debates written to a directory of split files.
+
+    Holds each written question with its split, and the size every split
+    file had when the last run finished. A run adds its questions inside
+    one transaction (``begin``/``add``) that is only committed, with the new
+    file sizes, once the split files are written and synced; a run that dies
+    halfway leaves the manifest as it was, and the bytes it appended past the
+    committed sizes are cut off by ``recover`` before the next append. The
+    inode of each file is recorded too, so a split replaced by a rebuild that
+    never committed is refused rather than truncated.
+    Questions added during the open transaction already count for
+    ``__contains__``, so a question repeated in the input is written once.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._conn.executescript(_SCHEMA)
+        if "inode" not in [row[1] for row in self._conn.execute("PRAGMA table_info(files)")]:
+            self._conn.execute("ALTER TABLE files ADD COLUMN inode INTEGER")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __contains__(self, question: str) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM questions WHERE question = ?", (question,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def sizes(self) -> Dict[str, int]:
+        """Committed size in bytes of each split file; empty before the first run."""
+        return dict(self._conn.execute("SELECT split, size FROM files"))
+
+    def recover(self, paths: Dict[str, str]) -> None:
+        """Truncate split files back to their committed sizes before appending to them.
+
+        Raises ValueError when a file does not match the manifest in a way
+        that cannot be repaired (it is shorter than recorded, exists but was
+        never recorded, or is another file than the one recorded); the splits
+        then have to be rebuilt.
+        """
+        files = {split: (size, inode) for split, size, inode in self._conn.execute("SELECT * FROM files")}
+        for split, path in paths.items():
+            exists = os.path.exists(path)
+            size = os.path.getsize(path) if exists else 0
+            committed, inode = files.get(split, (0, None))
+            if exists and inode is not None and os.stat(path).st_ino != inode:
+                raise ValueError(f"{path} was replaced after {self.path} was committed; rebuild the splits")
+            if size == committed:
+                continue
+            if size < committed or split not in files:
+                raise ValueError(f"{path} ({size} bytes) does not match {self.path} "
+                                 f"({committed} bytes recorded); rebuild the splits")
+            logger.warning(f"Truncating {path} from {size} to {committed} bytes left by an interrupted run")
+            with open(path, "r+b") as f:
+                f.truncate(committed)
+
+    def begin(self, rebuild: bool = False) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+        if rebuild:
+            self._conn.execute("DELETE FROM questions")
+            self._conn.execute("DELETE FROM files")
+
+    def add(self, question: str, split: str) -> None:
+        self._conn.execute("INSERT OR IGNORE INTO questions VALUES (?, ?)", (question, split))
+
+    def commit(self, paths: Dict[str, str]) -> None:
+        """Commit the questions added since ``begin`` with the current sizes and inodes of the split files."""
+        stats = {split: os.stat(path) for split, path in paths.items()}
+        self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                               [(split, stat.st_size, stat.st_ino) for split, stat in stats.items()])
+        self._conn.execute("COMMIT")
+
+    def rollback(self) -> None:
+        if self._conn.in_transaction:
+            self._conn.execute("ROLLBACK")
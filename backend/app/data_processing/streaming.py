@@ -0,0 +1,321 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..core.metrics_registry import registry
+from .debate_schema import format_path
+from .config import MIN_STANDPOINTS, MIN_ARGUMENTS_PER_STANDPOINT, MIN_COUNTER_QUESTIONS
+
+logger = logging.getLogger(__name__)
+
+STREAM_ABORTS = registry.counter(
+    "deepseek_stream_aborts_total", "Streamed generations aborted on invalid structure")
+STREAM_ABORTED_CHARS = registry.counter(
+    "deepseek_stream_aborted_chars_total", "Characters received before aborting streamed generations")
+
+Path = Tuple[Any, ...]
+
+
+class StreamValidationError(ValueError):
+    """The streamed document can no longer become a valid debate."""
+
+
+class IncrementalJSONParser:
+    """Push parser for one JSON document arriving in arbitrary chunks.
+
+    Calls ``handler(event, path, value)`` with events ``start_object``,
+    ``start_array``, ``end_object``, ``end_array`` and ``scalar``, where
+    ``path`` is the tuple of keys and indices leading to the value. Anything
+    before the first ``{`` (a code fence, say) and after the root value closes
+    is ignored. Raises ``StreamValidationError`` on malformed JSON.
+    """
+
+    _SCALAR_CHARS = set("0123456789+-.eEtruefalsn")
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.state = "preamble"
+        # Each frame: [container type, path, current key or index]
+        self.stack: List[list] = []
+        self.buffer: List[str] = []
+        self.string_role = "value"
+        self.escaped = False
+
+    @property
+    def done(self) -> bool:
+        return self.state == "done"
+
+    def _value_path(self) -> Path:
+        if not self.stack:
+            return ()
+        kind, path, slot = self.stack[-1]
+        return path + (slot,)
+
+    def _emit_value(self, event: str, value: Any = None) -> None:
+        self.handler(event, self._value_path(), value)
+
+    def _open(self, kind: str) -> None:
+        path = self._value_path()
+        self.handler("start_object" if kind == "object" else "start_array", path, None)
+        self.stack.append([kind, path, None if kind == "object" else 0])
+        self.state = "key_or_end" if kind == "object" else "value_or_end"
+
+    def _close(self, kind: str) -> None:
+        frame_kind, path, _ = self.stack.pop()
+        if frame_kind != kind:
+            raise StreamValidationError(f"Mismatched closing bracket at {format_path(path)}")
+        self.handler("end_object" if kind == "object" else "end_array", path, None)
+        self._after_value()
+
+    def _after_value(self) -> None:
+        self.state = "after_value" if self.stack else "done"
+
+    def _finish_scalar(self) -> None:
+        text = "".join(self.buffer)
+        self.buffer = []
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            raise StreamValidationError(f"Invalid literal {text[:20]!r} at {format_path(self._value_path())}")
+        self._emit_value("scalar", value)
+        self._after_value()
+
+    def _finish_string(self) -> None:
+        try:
+            value = json.loads('"' + "".join(self.buffer) + '"')
+        except json.JSONDecodeError:
+            raise StreamValidationError(f"Invalid string at {format_path(self._value_path())}")
+        self.buffer = []
+        if self.string_role == "key":
+            self.stack[-1][2] = value
+            self.state = "colon"
+        else:
+            self._emit_value("scalar", value)
+            self._after_value()
+
+    def _start_value(self, char: str) -> None:
+        if char == "{":
+            self._open("object")
+        elif char == "[":
+            self._open("array")
+        elif char == '"':
+            self.string_role = "value"
+            self.state = "string"
+        elif char in self._SCALAR_CHARS:
+            self.buffer.append(char)
+            self.state = "scalar"
+        else:
+            raise StreamValidationError(f"Unexpected {char!r} at {format_path(self._value_path())}")
+
+    def feed(self, text: str) -> None:
+        for char in text:
+            state = self.state
+            if state == "string":
+                if self.escaped:
+                    self.escaped = False
+                    self.buffer.append(char)
+                elif char == "\\":
+                    self.escaped = True
+                    self.buffer.append(char)
+                elif char == '"':
+                    self._finish_string()
+                else:
+                    self.buffer.append(char)
+                continue
+            if state == "scalar":
+                if char in self._SCALAR_CHARS:
+                    self.buffer.append(char)
+                    continue
+                self._finish_scalar()
+                state = self.state
+            if char in " \t\r\n" or state == "done":
+                continue
+            if state == "preamble":
+                if char == "{":
+                    self._open("object")
+            elif state == "value":
+                self._start_value(char)
+            elif state == "value_or_end":
+                if char == "]":
+                    self._close("array")
+                else:
+                    self._start_value(char)
+            elif state in ("key_or_end", "key"):
+                if char == "}" and state == "key_or_end":
+                    self._close("object")
+                elif char == '"':
+                    self.string_role = "key"
+                    self.state = "string"
+                else:
+                    raise StreamValidationError(f"Expected a key at {format_path(self.stack[-1][1])}")
+            elif state == "colon":
+                if char != ":":
+                    raise StreamValidationError(f"Expected ':' at {format_path(self._value_path())}")
+                self.state = "value"
+            elif state == "after_value":
+                frame = self.stack[-1]
+                if char == ",":
+                    if frame[0] == "array":
+                        frame[2] += 1
+                        self.state = "value"
+                    else:
+                        self.state = "key"
+                elif char == "}":
+                    self._close("object")
+                elif char == "]":
+                    self._close("array")
+                else:
+                    raise StreamValidationError(f"Unexpected {char!r} after {format_path(self._value_path())}")
+
+
+class DebateStructureValidator:
+    """Applies the structural rules of ``debate_schema`` to parser events as they arrive.
+
+    Each check fires as soon as the value it depends on is complete, so a
+    wrong id or a non-list field is rejected without waiting for the rest of
+    the generation. It checks a subset of the schema and only rejects
+    documents the full validation would also reject; the complete result is
+    still validated once the stream ends.
+    """
+
+    _REQUIRED = ("question", "standpoints", "counter_questions")
+    _LISTS = {
+        ("standpoints",): ("standpoints", MIN_STANDPOINTS),
+        ("counter_questions",): ("counter questions", MIN_COUNTER_QUESTIONS),
+    }
+
+    def __init__(self):
+        self.parser = IncrementalJSONParser(self._on_event)
+        self.keys: Dict[Path, Set[str]] = {}
+        self.lengths: Dict[Path, int] = {}
+
+    def feed(self, text: str) -> None:
+        self.parser.feed(text)
+
+    @property
+    def done(self) -> bool:
+        return self.parser.done
+
+    def _fail(self, message: str) -> None:
+        raise StreamValidationError(message)
+
+    def _on_event(self, event: str, path: Path, value: Any) -> None:
+        depth = len(path)
+        if depth and path[:-1] in self.keys:
+            self.keys[path[:-1]].add(path[-1])
+        if depth and isinstance(path[-1], int):
+            self.lengths[path[:-1]] = path[-1] + 1
+
+        if event == "start_object":
+            self.keys[path] = set()
+        elif depth == 0:
+            if event != "end_object":
+                self._fail("Response is not a JSON object")
+        elif event == "start_array":
+            self.lengths[path] = 0
+
+        if event in ("scalar", "start_object") and self._expects_list(path):
+            self._fail(f"{format_path(path)} must be a list")
+
+        if event == "scalar" and path[-1:] == ("id",):
+            expected = self._expected_id(path[:-1])
+            if expected and value != expected:
+                self._fail(f"Invalid id {value!r} at {format_path(path)}, expected {expected!r}")
+
+        if event == "end_object":
+            self._check_object(path, self.keys.pop(path, set()))
+        elif event == "end_array":
+            self._check_array(path, self.lengths.get(path, 0))
+
+    @staticmethod
+    def _expects_list(path: Path) -> bool:
+        return path in (("standpoints",), ("counter_questions",)) or (
+            len(path) == 3 and path[0] == "standpoints" and path[2] == "arguments")
+
+    @staticmethod
+    def _expected_id(parent: Path) -> Optional[str]:
+        if len(parent) == 2 and parent[0] == "standpoints":
+            return f"standpoint_{parent[1] + 1}"
+        if len(parent) == 4 and parent[0] == "standpoints" and parent[2] == "arguments":
+            return f"argument_{parent[1] + 1}_{parent[3] + 1}"
+        if len(parent) == 2 and parent[0] == "counter_questions":
+            return f"counter_question_{parent[1] + 1}"
+        return None
+
+    def _check_object(self, path: Path, keys: Set[str]) -> None:
+        if path == ():
+            for field in self._REQUIRED:
+                if field not in keys:
+                    self._fail(f"Missing required field in response: {field}")
+        elif self._expected_id(path) and "id" not in keys:
+            self._fail(f"Missing id at {format_path(path)}")
+        elif len(path) == 2 and path[0] == "standpoints" and "arguments" not in keys:
+            self._fail(f"Missing arguments at {format_path(path)}")
+
+    def _check_array(self, path: Path, length: int) -> None:
+        if path in self._LISTS:
+            name, minimum = self._LISTS[path]
+            if length < minimum:
+                self._fail(f"At least {minimum} {name} are required")
+        elif len(path) == 3 and path[0] == "standpoints" and path[2] == "arguments":
+            if length < MIN_ARGUMENTS_PER_STANDPOINT:
+                self._fail(f"At least {MIN_ARGUMENTS_PER_STANDPOINT} arguments are required "
+                           f"for standpoint {path[1] + 1}")
+
+
+class StreamedCompletion:
+    """Collects an SSE chat completion stream, validating content as it arrives.
+
+    ``feed_line`` takes one line of the event stream and raises
+    ``StreamValidationError`` once the content cannot become a valid debate.
+    ``as_response`` rebuilds the non-streamed response shape so the usual
+    parsing applies to the final text.
+    """
+
+    def __init__(self, validator: Optional[DebateStructureValidator] = None):
+        self.validator = validator
+        self.parts: List[str] = []
+        self.received = 0
+        self.finish_reason: Optional[str] = None
+        self.usage: Optional[Dict[str, Any]] = None
+        self.finished = False
+
+    def feed_line(self, line: str) -> None:
+        if not line.startswith("data:"):
+            return
+        data = line[5:].strip()
+        if data == "[DONE]":
+            self.finished = True
+            return
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError:
+            raise StreamValidationError("Malformed stream event")
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+        for choice in chunk.get("choices") or []:
+            text = (choice.get("delta") or {}).get("content") or ""
+            if text:
+                self.parts.append(text)
+                self.received += len(text)
+                if self.validator is not None:
+                    try:
+                        self.validator.feed(text)
+                    except StreamValidationError:
+                        STREAM_ABORTS.inc()
+                        STREAM_ABORTED_CHARS.inc(amount=self.received)
+                        raise
+            if choice.get("finish_reason"):
+                self.finish_reason = choice["finish_reason"]
+
+    def as_response(self) -> Dict[str, Any]:
+        response = {
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(self.parts)},
+                "finish_reason": self.finish_reason,
+            }]
+        }
+        if self.usage is not None:
+            response["usage"] = self.usage
+        return response
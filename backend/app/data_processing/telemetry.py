@@ -0,0 +1,245 @@
+"""Per-call telemetry for debate generation runs.
+
+Every completion request made on behalf of a question becomes one
+``CallRecord``: its latency, HTTP attempts, token usage and what happened to
+the output (accepted, rejected by validation, aborted mid-stream, failed or
+replayed from the cache). ``RunLog`` appends the records of a run to a JSONL
+file, and ``summarize_run`` turns them into throughput, token and cost figures
+broken down by the seed questions' category and difficulty.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from ..core.metrics_registry import registry
+from .config import RUN_LOG_DIR, PROMPT_TOKEN_PRICE, COMPLETION_TOKEN_PRICE
+
+CALL_LATENCY = registry.histogram(
+    "deepseek_call_duration_seconds", "Completion call latency, including streaming", ("outcome",),
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0))
+TOKENS = registry.counter(
+    "deepseek_tokens_total", "Tokens billed by completion outcome", ("kind", "outcome"))
+GENERATIONS = registry.counter(
+    "deepseek_generations_total", "Completion calls by outcome", ("outcome",))
+
+# Outcomes of a call
+ACCEPTED = "accepted"
+REJECTED = "rejected"  # Complete output that failed validation
+ABORTED = "aborted"  # Stream abandoned once the structure was invalid
+FAILED = "failed"  # No usable response after the HTTP retries
+CACHED = "cached"  # Replayed from the completion cache, no API call
+
+
+@dataclass
+class CallRecord:
+    question: str = ""
+    category: Optional[str] = None
+    difficulty: Optional[str] = None
+    outcome: str = FAILED
+    http_attempts: int = 0
+    status: Optional[int] = None
+    latency: float = 0.0  # Duration of the last HTTP attempt, the one that produced the output
+    elapsed: float = 0.0  # From the first attempt to the final outcome, including retry waits
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    completion_chars: int = 0
+    finish_reason: Optional[str] = None
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    # Set when several questions shared one request; see split_batch_call
+    batch_id: Optional[str] = None
+    batch_size: int = 1
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.http_attempts - 1)
+
+    def apply_response(self, response: Optional[Dict[str, Any]]) -> None:
+        """Copy usage, finish reason and output size from a completion response."""
+        if not response:
+            return
+        usage = response.get("usage") or {}
+        self.prompt_tokens = usage.get("prompt_tokens", self.prompt_tokens)
+        self.completion_tokens = usage.get("completion_tokens", self.completion_tokens)
+        choices = response.get("choices") or [{}]
+        self.finish_reason = choices[0].get("finish_reason", self.finish_reason)
+        content = (choices[0].get("message") or {}).get("content")
+        if content is not None:
+            self.completion_chars = len(content)
+
+
+def _share(total: Optional[int], parts: int, index: int) -> Optional[int]:
+    if total is None:
+        return None
+    return total // parts + (1 if index < total % parts else 0)
+
+
+def split_batch_call(call: CallRecord, items: Sequence[Dict[str, Any]], outcomes: Sequence[str]) -> List[CallRecord]:
+    """One record per question of a batched call.
+
+    ``items`` are the seed questions (``question``, ``category``,
+    ``difficulty``) in request order and ``outcomes`` their individual
+    outcomes. The call's tokens are shared evenly between the records so
+    per-category totals still add up; HTTP attempts and latency are kept on
+    every record and counted once per ``batch_id`` in summaries.
+    """
+    batch_id = uuid.uuid4().hex[:12]
+    return [
+        replace(call, question=item.get("question", ""), category=item.get("category"),
+                difficulty=item.get("difficulty"), outcome=outcome,
+                prompt_tokens=_share(call.prompt_tokens, len(items), i),
+                completion_tokens=_share(call.completion_tokens, len(items), i),
+                completion_chars=_share(call.completion_chars, len(items), i),
+                batch_id=batch_id, batch_size=len(items))
+        for i, (item, outcome) in enumerate(zip(items, outcomes))
+    ]
+
+
+def record_call(run_log: Optional["RunLog"], call: CallRecord, observe_latency: bool = True) -> None:
+    """Update the process metrics and append the call to ``run_log`` if given."""
+    call.elapsed = time.time() - call.started_at
+    GENERATIONS.inc(call.outcome)
+    if call.outcome != CACHED:
+        if observe_latency:
+            CALL_LATENCY.observe(call.latency, call.outcome)
+        TOKENS.inc("prompt", call.outcome, amount=call.prompt_tokens or 0)
+        TOKENS.inc("completion", call.outcome, amount=call.completion_tokens or 0)
+    if run_log is not None:
+        run_log.append(call)
+
+
+def record_batch(run_log: Optional["RunLog"], records: Sequence[CallRecord]) -> None:
+    """Record the per-question records of one batched call, observing its latency once."""
+    for i, record in enumerate(records):
+        record_call(run_log, record, observe_latency=i == 0)
+
+
+class RunLog:
+    """Append-only JSONL log of the calls made during one generation run."""
+
+    def __init__(self, path: Optional[str] = None, run_id: Optional[str] = None):
+        self.run_id = run_id or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.path = path or os.path.join(RUN_LOG_DIR, f"{self.run_id}.jsonl")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def append(self, call: CallRecord) -> None:
+        line = json.dumps({"run_id": self.run_id, **asdict(call)}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+        return summarize_run(load_run_log(self.path))
+
+    def write_summary(self) -> str:
+        """Write the run summary next to the log; returns its path.
+
+        The summary also carries the process metrics at the time of writing
+        (concurrency limit, rate-limit waits, cache lookups, ...), as offline
+        runs have no ``/metrics`` endpoint to scrape them from.
+        """
+        path = os.path.splitext(self.path)[0] + ".summary.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"run_id": self.run_id, **self.summary(), "metrics": registry.snapshot()},
+                      f, ensure_ascii=False, indent=2)
+        return path
+
+
+def load_run_log(path: str) -> List[CallRecord]:
+    names = CallRecord.__dataclass_fields__.keys()
+    with open(path, "r", encoding="utf-8") as f:
+        return [CallRecord(**{k: v for k, v in json.loads(line).items() if k in names})
+                for line in f if line.strip()]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _requests(calls: List[CallRecord]) -> List[CallRecord]:
+    """One record per HTTP request: batched calls collapse to their first record."""
+    seen = set()
+    requests = []
+    for call in calls:
+        if call.batch_id is not None:
+            if call.batch_id in seen:
+                continue
+            seen.add(call.batch_id)
+        requests.append(call)
+    return requests
+
+
+def _summarize(calls: List[CallRecord]) -> Dict[str, Any]:
+    api_calls = [c for c in calls if c.outcome != CACHED]
+    requests = _requests(api_calls)
+    outcomes: Dict[str, int] = {}
+    for call in calls:
+        outcomes[call.outcome] = outcomes.get(call.outcome, 0) + 1
+    accepted = outcomes.get(ACCEPTED, 0) + outcomes.get(CACHED, 0)
+    prompt = sum(c.prompt_tokens or 0 for c in api_calls)
+    completion = sum(c.completion_tokens or 0 for c in api_calls)
+    wasted = sum((c.prompt_tokens or 0) + (c.completion_tokens or 0) for c in api_calls if c.outcome != ACCEPTED)
+    streamed = [c for c in requests if c.completion_tokens and c.latency]
+    latencies = [c.latency for c in requests if c.http_attempts]
+    cost = (prompt * PROMPT_TOKEN_PRICE + completion * COMPLETION_TOKEN_PRICE) / 1_000_000
+    return {
+        "questions": len({c.question for c in calls}),
+        "calls": len(calls),
+        "api_calls": len(requests),
+        "batched_questions": sum(1 for c in api_calls if c.batch_id is not None),
+        "outcomes": outcomes,
+        "accepted": accepted,
+        "retries": sum(c.retries for c in requests),
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "wasted_tokens": wasted,
+        # Aborted streams carry no usage block; this is what they had produced
+        "aborted_chars": sum(c.completion_chars for c in api_calls if c.outcome == ABORTED),
+        "tokens_per_accepted": (prompt + completion) / accepted if accepted else None,
+        "completion_tokens_per_second": (sum(c.completion_tokens * c.batch_size for c in streamed) /
+                                         sum(c.latency for c in streamed)) if streamed else None,
+        "latency_p50": _percentile(latencies, 0.5),
+        "latency_p95": _percentile(latencies, 0.95),
+        "cost": cost,
+        "cost_per_accepted": cost / accepted if accepted else None,
+    }
+
+
+def summarize_run(calls: Iterable[CallRecord]) -> Dict[str, Any]:
+    """Overall figures plus the same figures per ``category/difficulty``.
+
+    Token costs use ``PROMPT_TOKEN_PRICE`` and ``COMPLETION_TOKEN_PRICE``
+    (per million tokens). Wall time is the span from the first call's start
+    to the last call's end.
+    """
+    calls = list(calls)
+    groups: Dict[str, List[CallRecord]] = {}
+    for call in calls:
+        key = f"{call.category or '-'}/{call.difficulty or '-'}"
+        groups.setdefault(key, []).append(call)
+    overall = _summarize(calls)
+    if calls:
+        wall = max(c.started_at + c.elapsed for c in calls) - min(c.started_at for c in calls)
+        overall["wall_seconds"] = wall
+        overall["accepted_per_minute"] = overall["accepted"] / wall * 60 if wall else None
+    return {
+        "overall": overall,
+        "by_group": {key: _summarize(group) for key, group in sorted(groups.items())},
+    }
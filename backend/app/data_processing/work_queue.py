@@ -0,0 +1,243 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ..core.metrics_registry import registry
+from .config import WORK_QUEUE_PATH, QUEUE_LEASE_SECONDS, QUEUE_MAX_ATTEMPTS
+
+logger = logging.getLogger(__name__)
+
+QUEUE_EVENTS = registry.counter(
+    "work_queue_events_total", "Seed question queue transitions by event", ("event",))
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_items_state ON items (state, lease_expires);
+CREATE TABLE IF NOT EXISTS compaction (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    owner TEXT,
+    lease_expires REAL,
+    compacted_at REAL
+);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+
+
+@dataclass
+class Lease:
+    key: str
+    item: Dict[str, Any]
+    attempt: int
+    expires: float
+
+
+class WorkQueue:
+    """Seed questions shared by several expander processes through one SQLite file.
+
+    Items are keyed by question text, so enqueueing the same seed list from
+    every process is harmless. ``claim`` leases pending items to this worker
+    for ``lease_seconds``; the holder extends its leases with ``heartbeat``
+    and finishes them with ``complete`` or ``release``. Leases that expire,
+    because their worker crashed or lost contact, are handed out again on
+    the next claim. An item that was leased ``max_attempts`` times without
+    completing is marked failed.
+
+    The database uses SQLite's rollback journal rather than WAL so it works
+    on shared (network) storage, and claims run in ``BEGIN IMMEDIATE``
+    transactions so two workers never lease the same item.
+    """
+
+    def __init__(self, path: str = WORK_QUEUE_PATH, worker_id: Optional[str] = None,
+                 lease_seconds: float = QUEUE_LEASE_SECONDS, max_attempts: int = QUEUE_MAX_ATTEMPTS):
+        self.path = path
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._compaction_started: Optional[float] = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=DELETE")
+        self._conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def enqueue(self, items: Iterable[Dict[str, Any]]) -> int:
+        """Add seed question dicts not already queued; returns how many were added."""
+        now = time.time()
+        rows = [(item["question"], json.dumps(item, ensure_ascii=False), now)
+                for item in items if item.get("question")]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO items (key, payload, updated_at) VALUES (?, ?, ?)", rows)
+            added = conn.total_changes - before
+        QUEUE_EVENTS.inc("enqueued", amount=added)
+        return added
+
+    def claim(self, limit: int = 1) -> List[Lease]:
+        """Lease up to ``limit`` pending or expired items to this worker."""
+        now = time.time()
+        expires = now + self.lease_seconds
+        with self._transaction() as conn:
+            # Expired leases that used up their attempts are given up on
+            exhausted = conn.execute(
+                "UPDATE items SET state = ?, owner = NULL, error = COALESCE(error, 'lease expired'), "
+                "updated_at = ? WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, LEASED, now, self.max_attempts)).rowcount
+            rows = conn.execute(
+                "SELECT key, payload, state, attempts FROM items "
+                "WHERE state = ? OR (state = ? AND lease_expires < ?) ORDER BY rowid LIMIT ?",
+                (PENDING, LEASED, now, limit)).fetchall()
+            conn.executemany(
+                "UPDATE items SET state = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE key = ?",
+                [(LEASED, self.worker_id, expires, now, key) for key, _, _, _ in rows])
+        reclaimed = sum(1 for _, _, state, _ in rows if state == LEASED)
+        if reclaimed:
+            logger.warning(f"Reclaimed {reclaimed} expired leases")
+            QUEUE_EVENTS.inc("reclaimed", amount=reclaimed)
+        if exhausted:
+            logger.warning(f"Gave up on {exhausted} items after {self.max_attempts} expired leases")
+            QUEUE_EVENTS.inc("exhausted", amount=exhausted)
+        QUEUE_EVENTS.inc("claimed", amount=len(rows))
+        return [Lease(key, json.loads(payload), attempts + 1, expires) for key, payload, _, attempts in rows]
+
+    def heartbeat(self, keys: Iterable[str]) -> List[str]:
+        """Extend this worker's leases on ``keys``; returns the keys it no longer holds."""
+        keys = list(keys)
+        if not keys:
+            return []
+        now = time.time()
+        lost = []
+        with self._transaction() as conn:
+            for key in keys:
+                updated = conn.execute(
+                    "UPDATE items SET lease_expires = ?, updated_at = ? WHERE key = ? AND state = ? AND owner = ?",
+                    (now + self.lease_seconds, now, key, LEASED, self.worker_id)).rowcount
+                if not updated:
+                    lost.append(key)
+        if lost:
+            QUEUE_EVENTS.inc("lost", amount=len(lost))
+        return lost
+
+    def complete(self, key: str) -> bool:
+        """Mark an item done. Returns False if this worker no longer held its lease
+        (the item is still marked done, the work having been finished)."""
+        now = time.time()
+        with self._transaction() as conn:
+            held = conn.execute(
+                "SELECT 1 FROM items WHERE key = ? AND state = ? AND owner = ?",
+                (key, LEASED, self.worker_id)).fetchone() is not None
+            conn.execute("UPDATE items SET state = ?, owner = NULL, lease_expires = NULL, error = NULL, "
+                         "updated_at = ? WHERE key = ?", (DONE, now, key))
+        QUEUE_EVENTS.inc("completed")
+        return held
+
+    def release(self, key: str, error: Optional[str] = None) -> None:
+        """Give a leased item back after a failed attempt; it fails for good after ``max_attempts``."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE items SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, owner = NULL, "
+                "lease_expires = NULL, error = ?, updated_at = ? WHERE key = ? AND state = ? AND owner = ?",
+                (self.max_attempts, FAILED, PENDING, error, now, key, LEASED, self.worker_id))
+        QUEUE_EVENTS.inc("released")
+
+    def requeue_failed(self) -> int:
+        """Make failed items pending again with fresh attempts."""
+        with self._transaction() as conn:
+            count = conn.execute(
+                "UPDATE items SET state = ?, attempts = 0, updated_at = ? WHERE state = ?",
+                (PENDING, time.time(), FAILED)).rowcount
+        return count
+
+    def counts(self) -> Dict[str, int]:
+        """Items per state; leases past their expiry are counted as ``expired``."""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT CASE WHEN state = ? AND lease_expires < ? THEN 'expired' ELSE state END, COUNT(*) "
+                "FROM items GROUP BY 1", (LEASED, now)).fetchall()
+        counts = {PENDING: 0, LEASED: 0, "expired": 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def claim_compaction(self) -> bool:
+        """Claim the right to fold the workers' journals into the dataset.
+
+        Succeeds for one worker only, once the queue is drained and items
+        were completed since the last compaction; the claim is held for
+        ``lease_seconds`` or until ``finish_compaction``. Workers that finish
+        together therefore never compact at the same time.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            active = conn.execute(
+                "SELECT COUNT(*) FROM items WHERE state IN (?, ?)", (PENDING, LEASED)).fetchone()[0]
+            if active:
+                return False
+            row = conn.execute("SELECT owner, lease_expires, compacted_at FROM compaction").fetchone()
+            owner, expires, compacted_at = row if row else (None, None, None)
+            if owner is not None and expires > now:
+                return False
+            last_done = conn.execute(
+                "SELECT MAX(updated_at) FROM items WHERE state = ?", (DONE,)).fetchone()[0]
+            if compacted_at is not None and (last_done is None or last_done <= compacted_at):
+                return False
+            conn.execute("INSERT OR REPLACE INTO compaction VALUES (1, ?, ?, ?)",
+                         (self.worker_id, now + self.lease_seconds, compacted_at))
+        self._compaction_started = now
+        return True
+
+    def finish_compaction(self, compacted: bool = True) -> None:
+        """Release the compaction claim, recording the compaction if it succeeded."""
+        with self._transaction() as conn:
+            if compacted:
+                conn.execute("UPDATE compaction SET owner = NULL, lease_expires = NULL, compacted_at = ? "
+                             "WHERE owner = ?", (self._compaction_started, self.worker_id))
+            else:
+                conn.execute("UPDATE compaction SET owner = NULL, lease_expires = NULL WHERE owner = ?",
+                             (self.worker_id,))
+
+    def drained(self) -> bool:
+        """True once no item is pending or leased."""
+        counts = self.counts()
+        return counts[PENDING] + counts[LEASED] + counts["expired"] == 0
@@ -1,16 +1,61 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
+import logging
+from typing import Optional
+
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from ..config import settings
 
-# Create database engine
-engine = create_engine(settings.DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+# The engine is created on first use so importing the app does not load the
+# database driver; the lifespan hook in app.main normally creates it at startup
+_engine: Optional[Engine] = None
+
+# Create session factory; bound to the engine when it is created
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+def get_engine() -> Engine:
+    """Return the database engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        from sqlalchemy import create_engine
+        from sqlalchemy.engine import make_url
+        from sqlalchemy.pool import QueuePool
+
+        url = make_url(settings.DATABASE_URL)
+        pool_options = {}
+        # Only queue pools are sized; e.g. in-memory SQLite uses a SingletonThreadPool,
+        # which rejects these arguments
+        if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+            pool_options = {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
+        _engine = create_engine(url, pool_pre_ping=True, **pool_options)
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+def prewarm_pool(connections: int) -> None:
+    """Open ``connections`` pooled connections so the first requests don't pay for connecting."""
+    engine = get_engine()
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    except Exception as e:
+        logger.warning(f"Database pool prewarm stopped after {len(opened)} connections: {e}")
+    finally:
+        for connection in opened:
+            connection.close()
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def dispose_engine() -> None:
+    """Close all pooled connections."""
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
 
 # Dependency to get DB session
 def get_db():
+    if _engine is None:
+        get_engine()
     db = SessionLocal()
     try:
         yield db
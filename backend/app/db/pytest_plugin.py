@@ -0,0 +1,62 @@
+"""pytest plugin enforcing SQL query budgets.
+
+Enable it from a conftest.py::
+
+    pytest_plugins = ["app.db.pytest_plugin"]
+
+Any request that exceeds the budget declared on its endpoint with
+``query_budget(n)`` fails the test that issued it. Tests can also declare
+their own budget::
+
+    @pytest.mark.query_budget(3)
+    def test_read_graph(client): ...
+
+    def test_list(client, assert_max_queries):
+        with assert_max_queries(4):
+            client.get("/api/v1/thought-graphs/")
+"""
+from contextlib import contextmanager
+
+import pytest
+
+from ..config import settings
+from .query_budget import add_violation_listener, count_queries, remove_violation_listener
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(n): fail the test if it executes more than n SQL statements"
+    )
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(request):
+    """Fail the test if any endpoint it called exceeded its declared query budget."""
+    violations = []
+    previous = settings.QUERY_DEBUG
+    settings.QUERY_DEBUG = True
+    add_violation_listener(violations.append)
+
+    marker = request.node.get_closest_marker("query_budget")
+    if marker is not None:
+        with count_queries(request.node.name, budget=marker.args[0]):
+            yield
+    else:
+        yield
+
+    remove_violation_listener(violations.append)
+    settings.QUERY_DEBUG = previous
+    if violations:
+        pytest.fail("Query budget exceeded:\n" + "\n".join(v.summary() for v in violations), pytrace=False)
+
+
+@pytest.fixture
+def assert_max_queries():
+    """Context manager failing the test if its block runs more than ``n`` statements."""
+    @contextmanager
+    def check(n: int):
+        with count_queries("block") as log:
+            yield log
+        if log.count > n:
+            pytest.fail(f"Expected at most {n} queries\n{log.summary()}", pytrace=False)
+    return check
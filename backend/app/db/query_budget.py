@@ -0,0 +1,148 @@
+"""SQL query counting and per-endpoint query budgets (N+1 detection).
+
+Endpoints declare how many statements they may run::
+
+    @router.get("/{graph_id}", dependencies=[Depends(query_budget(4))])
+
+When ``QUERY_DEBUG`` is enabled, ``QueryBudgetMiddleware`` records every
+statement of a request, logs the count together with statement shapes that
+ran more than once (the signature of lazy-loading N+1 patterns), and reports
+requests that exceed their declared budget. ``app.db.pytest_plugin`` turns
+those reports into test failures.
+"""
+import logging
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so repeats that differ only in parameters compare equal."""
+    shape = _PARAM_LIST.sub("(?)", statement)
+    shape = _PLACEHOLDER.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryLog:
+    """Statements executed within one request or ``count_queries`` block."""
+
+    def __init__(self, label: str = "", parent: Optional["QueryLog"] = None):
+        self.label = label
+        # Enclosing log (e.g. a test-wide count around a request); it sees these statements too
+        self.parent = parent
+        self.budget: Optional[int] = None
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str) -> None:
+        with self._lock:
+            self.statements.append(statement)
+        if self.parent is not None:
+            self.parent.record(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def duplicate_shapes(self) -> List[Tuple[str, int]]:
+        """Statement shapes executed more than once, most frequent first."""
+        shapes = Counter(statement_shape(s) for s in self.statements)
+        return [(shape, n) for shape, n in shapes.most_common() if n > 1]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def summary(self) -> str:
+        budget = f"/{self.budget}" if self.budget is not None else ""
+        lines = [f"{self.label or 'block'}: {self.count}{budget} queries"]
+        for shape, n in self.duplicate_shapes():
+            lines.append(f"  {n}x {shape[:200]}")
+        return "\n".join(lines)
+
+
+_current_log: ContextVar[Optional[QueryLog]] = ContextVar("current_query_log", default=None)
+
+# Called with each QueryLog that exceeded its budget (used by the pytest plugin)
+_violation_listeners: List[Callable[[QueryLog], None]] = []
+
+
+def add_violation_listener(listener: Callable[[QueryLog], None]) -> None:
+    _violation_listeners.append(listener)
+
+
+def remove_violation_listener(listener: Callable[[QueryLog], None]) -> None:
+    _violation_listeners.remove(listener)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    log = _current_log.get()
+    if log is not None:
+        log.record(statement)
+
+
+@contextmanager
+def count_queries(label: str = "", budget: Optional[int] = None) -> Iterator[QueryLog]:
+    """Record statements run in this block (including threads started from it)."""
+    log = QueryLog(label, parent=_current_log.get())
+    log.budget = budget
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+    if log.over_budget:
+        _report_violation(log)
+
+
+def _report_violation(log: QueryLog) -> None:
+    logger.warning(f"Query budget exceeded\n{log.summary()}")
+    for listener in list(_violation_listeners):
+        listener(log)
+
+
+def query_budget(max_queries: int):
+    """Dependency declaring the most SQL statements an endpoint may execute."""
+    async def declare_query_budget() -> None:
+        log = _current_log.get()
+        if log is not None:
+            log.budget = max_queries
+    return declare_query_budget
+
+
+class QueryBudgetMiddleware:
+    """Track statements per request when ``QUERY_DEBUG`` is on; a no-op otherwise."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_DEBUG:
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog(f"{scope['method']} {scope['path']}", parent=_current_log.get())
+        token = _current_log.set(log)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_log.reset(token)
+            if log.over_budget:
+                _report_violation(log)
+            elif log.count:
+                logger.debug(log.summary())
@@ -1,11 +1,35 @@
+import os
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from .config import settings
+from .db.base import dispose_engine, get_engine, prewarm_pool
+from .db.query_budget import QueryBudgetMiddleware
+from .core.security import prewarm_security, shutdown_security
+from .core.metrics import MetricsMiddleware, registry
+from .core.profiling import ProfilingMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prewarm lazily-created resources so the first requests don't pay for them."""
+    global WORKER_STARTED_AT
+    WORKER_STARTED_AT = time.time()
+    await run_in_threadpool(prewarm_security)
+    await run_in_threadpool(prewarm_pool, settings.DB_POOL_PREWARM)
+    yield
+    shutdown_security()
+    dispose_engine()
 
 app = FastAPI(
     title="OntoThink API",
     description="API for OntoThink - A platform for critical thinking and knowledge mapping",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS middleware configuration
@@ -17,13 +41,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request SQL statement tracking; inert unless QUERY_DEBUG is enabled
+app.add_middleware(QueryBudgetMiddleware)
+
+# Opt-in request profiling; inert unless PROFILING_TOKEN is set
+app.add_middleware(ProfilingMiddleware)
+
+# Request metrics; added last so it is the outermost middleware and times the whole stack
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics for this worker process"""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to OntoThink API"}
 
+# Set when this worker process imports the app; with a preloading server
+# the lifespan hook resets it after the fork
+WORKER_STARTED_AT = time.time()
+
+def _check_database() -> None:
+    with get_engine().connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+@app.get("/health")
+async def health(deep: bool = False):
+    """Health of the worker process that served this request; deep=true also checks the database"""
+    body = {
+        "status": "ok",
+        "pid": os.getpid(),
+        "uptime_seconds": round(time.time() - WORKER_STARTED_AT, 1),
+    }
+    if deep:
+        try:
+            await run_in_threadpool(_check_database)
+            body["database"] = "ok"
+        except Exception as e:
+            body.update(status="unhealthy", database=str(e))
+            return JSONResponse(status_code=503, content=body)
+    return body
+
 # Import and include routers
-# from .api.v1.api import api_router
-# app.include_router(api_router, prefix="/api/v1")
+from .api.v1.api import api_router
+app.include_router(api_router, prefix=settings.API_V1_STR)
 
 if __name__ == "__main__":
     import uvicorn
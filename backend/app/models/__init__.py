@@ -0,0 +1,3 @@
+from .base import Base, BaseModel
+from .user import User
+from .thought_graph import ThoughtGraph, GraphNode, GraphEdge, NodeType, EdgeType
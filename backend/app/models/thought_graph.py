@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, JSON, Enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, JSON, Enum
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -22,6 +22,7 @@ class ThoughtGraph(BaseModel):
     created_by = Column(Integer, ForeignKey("users.id"), nullable=True)  # Will be implemented with user auth
     
     # Relationships
+    owner = relationship("User", back_populates="graphs")
     nodes = relationship("GraphNode", back_populates="graph", cascade="all, delete-orphan")
     edges = relationship("GraphEdge", back_populates="graph", cascade="all, delete-orphan")
 
@@ -33,7 +34,8 @@ class GraphNode(BaseModel):
     content = Column(Text, nullable=False)
     position_x = Column(JSON, nullable=True)  # Store position data for the frontend
     position_y = Column(JSON, nullable=True)
-    metadata = Column(JSON, nullable=True)  # Additional metadata
+    # "metadata" is reserved by the declarative base, so map the column under another attribute name
+    node_metadata = Column("metadata", JSON, nullable=True)  # Additional metadata
     
     # Relationships
     graph = relationship("ThoughtGraph", back_populates="nodes")
@@ -0,0 +1,10 @@
+from .user import (
+    User, UserCreate, UserUpdate, UserInDB, Token, TokenData,
+    LoginRequest, RegisterRequest, PasswordResetRequest, PasswordResetConfirm
+)
+from .thought_graph import (
+    GraphNodeCreate, GraphEdgeCreate, ThoughtGraphCreate,
+    GraphNodeUpdate, GraphEdgeUpdate, ThoughtGraphUpdate,
+    GraphNodeResponse, GraphEdgeResponse, ThoughtGraphResponse, ThoughtGraphListResponse
+)
+from .training import TrainingStartRequest, TrainingStatus, TrainingLogChunk
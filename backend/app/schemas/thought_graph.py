@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -34,7 +34,8 @@ class ThoughtGraphBase(BaseModel):
 
 # Create schemas
 class GraphNodeCreate(GraphNodeBase):
-    pass
+    # Client-side id referenced by edges in the same request; defaults to the node's index
+    id: Optional[int] = None
 
 class GraphEdgeCreate(GraphEdgeBase):
     pass
@@ -62,6 +63,10 @@ class ThoughtGraphUpdate(BaseModel):
 class GraphNodeResponse(GraphNodeBase):
     id: int
     graph_id: int
+    # The ORM attribute is node_metadata since "metadata" is reserved by SQLAlchemy
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("node_metadata", "metadata")
+    )
     created_at: datetime
     updated_at: datetime
 
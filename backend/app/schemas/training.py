@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional, Dict, Any
+
+class TrainingStartRequest(BaseModel):
+    # Per-section overrides merged into the training config, e.g. {"training": {"num_epochs": 1}}
+    overrides: Dict[str, Dict[str, Any]] = {}
+
+class TrainingStatus(BaseModel):
+    state: str
+    pid: Optional[int] = None
+    returncode: Optional[int] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    log_file: Optional[str] = None
+    log_size: Optional[int] = None
+    command: List[str] = []
+
+class TrainingLogChunk(BaseModel):
+    log_file: Optional[str] = None
+    offset: int
+    next_offset: int
+    size: int
+    lines: List[str]
@@ -0,0 +1,113 @@
+"""Production server entrypoint.
+
+Runs the API under gunicorn with uvicorn workers::
+
+    python -m app.server --workers 4 --bind 0.0.0.0:8000
+
+The app is imported once in the master before forking (``preload_app``), so
+workers start from a warm, shared module image. Database connections and the
+password hash pool are created lazily and prewarmed by the lifespan hook in
+each worker after the fork, so no sockets are shared between processes.
+uvloop and httptools are used when installed (``pip install uvloop httptools``).
+"""
+import argparse
+import importlib.util
+import os
+from typing import Any, Dict, Optional
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from .config import settings
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+class OntoThinkUvicornWorker(UvicornWorker):
+    """Uvicorn worker that selects the fastest available loop and HTTP parser."""
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop" if _has_module("uvloop") else "asyncio",
+        "http": "httptools" if _has_module("httptools") else "h11",
+        "lifespan": "on",
+    }
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring affinity masks and cgroup quotas."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    # cgroup v2 CPU quota, e.g. "200000 100000" for a 2-CPU container limit
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def default_worker_count() -> int:
+    """One async worker per usable CPU, capped by SERVER_MAX_WORKERS."""
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    return max(1, min(available_cpus(), settings.SERVER_MAX_WORKERS))
+
+
+class OntoThinkServer(BaseApplication):
+    """Embedded gunicorn application serving ``app.main:app``."""
+
+    def __init__(self, options: Dict[str, Any], app_uri: str = "app.main:app"):
+        self.options = options
+        self.app_uri = app_uri
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from .main import app
+        return app
+
+
+def build_options(
+    bind: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Gunicorn settings derived from the app settings."""
+    return {
+        "bind": bind or f"{settings.SERVER_HOST}:{settings.SERVER_PORT}",
+        "workers": workers or default_worker_count(),
+        "worker_class": f"{__name__}.OntoThinkUvicornWorker",
+        "preload_app": True,
+        "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        "timeout": settings.SERVER_TIMEOUT_SECONDS,
+        # Recycle workers periodically to bound memory growth; jitter avoids
+        # restarting all workers at once
+        "max_requests": settings.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVER_MAX_REQUESTS // 10,
+        "accesslog": "-" if settings.SERVER_ACCESS_LOG else None,
+        "errorlog": "-",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the OntoThink API in production mode")
+    parser.add_argument("--bind", help="Address to bind, e.g. 0.0.0.0:8000")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    OntoThinkServer(build_options(args.bind, args.workers)).run()
+
+
+if __name__ == "__main__":
+    main()
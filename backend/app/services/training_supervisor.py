@@ -0,0 +1,288 @@
+import fcntl
+import json
+import os
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from ..config import settings
+
+
+def read_log_chunk(
+    path: Path,
+    offset: Optional[int] = None,
+    max_bytes: int = 64 * 1024,
+    tail_bytes: int = 16 * 1024,
+    final: bool = False,
+) -> Dict[str, Any]:
+    """Read a line-aligned chunk of a log file starting at a byte offset.
+
+    Only the requested window is read from disk, so polling a multi-GB log
+    costs O(chunk) instead of O(file). When ``offset`` is None the read starts
+    ``tail_bytes`` before the end of the file. A trailing partial line is held
+    back until it is completed, unless ``final`` is set (the writer has exited).
+    The returned ``next_offset`` is what the client sends on its next call.
+    """
+    size = path.stat().st_size
+    if offset is None:
+        start = max(0, size - tail_bytes)
+    elif offset > size:
+        # The log was truncated or replaced; start over from the beginning
+        start = 0
+    else:
+        start = offset
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(max_bytes)
+        if offset is None and start > 0:
+            # Skip the partial first line of a tail window
+            newline = data.find(b"\n")
+            start += newline + 1 if newline != -1 else len(data)
+            data = data[newline + 1:] if newline != -1 else b""
+
+    at_eof = start + len(data) >= size
+    if data and not data.endswith(b"\n") and not (final and at_eof):
+        newline = data.rfind(b"\n")
+        if newline != -1:
+            data = data[:newline + 1]
+        elif at_eof:
+            # A single line that is still being written
+            data = b""
+
+    return {
+        "offset": start,
+        "next_offset": start + len(data),
+        "size": size,
+        "lines": data.decode("utf-8", errors="replace").splitlines(),
+    }
+
+
+def _process_start_time(pid: int) -> Optional[str]:
+    """Start time of a live process from /proc, or None if it is gone or a zombie.
+
+    Returns "" when /proc is unavailable and the process exists.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may contain spaces; the fields after it do not
+            fields = f.read().rsplit(")", 1)[1].split()
+    except FileNotFoundError:
+        return None
+    except OSError:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return None
+        except PermissionError:
+            pass
+        return ""
+    if fields[0] == "Z":
+        return None
+    return fields[19]
+
+
+class TrainingSupervisor:
+    """Runs the OntoThink training job as a supervised subprocess.
+
+    The torchrun command is built by ``OntoThinkTrainingManager`` so the API and
+    the CLI launch identical jobs. Output goes straight to the log file instead
+    of through a pipe, which keeps the API process out of the hot path and lets
+    clients tail the file by byte offset.
+
+    The job's pid, log file and command are kept in a JSON state file rather
+    than in memory, so every server worker sees the same job: any of them can
+    report on it, tail it or stop it, and a start is refused while another
+    worker's job is alive. Reads and updates hold an exclusive ``flock`` on a
+    lock file next to it. The worker that launched the job reaps it from a
+    waiter thread and records its exit code; if that worker is gone first,
+    the job is seen to have exited without a known code.
+    """
+
+    def __init__(self, config_path: Optional[str] = None, state_path: Optional[str] = None):
+        self.config_path = config_path
+        self.state_path = Path(state_path or settings.TRAINING_STATE_PATH)
+        self._lock = threading.Lock()
+
+    def _create_manager(self, overrides: Dict[str, Dict[str, Any]]):
+        # The manager lives with the CLI scripts; backend/ is on sys.path when
+        # the app is served from there
+        from scripts.train_manager import OntoThinkTrainingManager
+
+        manager = OntoThinkTrainingManager(self.config_path)
+        for section, values in overrides.items():
+            manager.config.setdefault(section, {}).update(values)
+        return manager
+
+    @contextmanager
+    def _locked(self) -> Iterator[Dict[str, Any]]:
+        """Hold the state lock across threads and processes, yielding the current state."""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.state_path.with_suffix(".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield self._refresh(self._load())
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, state: Dict[str, Any]) -> None:
+        temp = self.state_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(temp, self.state_path)
+
+    def _refresh(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Record the end of a job whose process is gone; must be called with the lock held."""
+        if state.get("pid") and state.get("finished_at") is None and not self._alive(state):
+            state["finished_at"] = time.time()
+            self._save(state)
+        return state
+
+    @staticmethod
+    def _alive(state: Dict[str, Any]) -> bool:
+        start_time = _process_start_time(state["pid"])
+        # A different start time means the pid was reused by another process
+        return start_time is not None and start_time in ("", state.get("process_start_time"))
+
+    def _reap(self, process: subprocess.Popen, log_handle) -> None:
+        """Wait for a job launched by this worker and record its exit code."""
+        returncode = process.wait()
+        log_handle.close()
+        with self._locked() as state:
+            if state.get("pid") == process.pid and state.get("returncode") is None:
+                state["returncode"] = returncode
+                state["finished_at"] = state.get("finished_at") or time.time()
+                self._save(state)
+
+    @property
+    def is_running(self) -> bool:
+        with self._locked() as state:
+            return bool(state.get("pid")) and state.get("finished_at") is None
+
+    def current_log(self) -> Tuple[Optional[Path], bool]:
+        """Log file of the latest job and whether the job is still running, read together."""
+        with self._locked() as state:
+            running = bool(state.get("pid")) and state.get("finished_at") is None
+            return (Path(state["log_file"]) if state.get("log_file") else None), running
+
+    def start(self, overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Launch a training run; raises RuntimeError if one is already running."""
+        with self._locked() as state:
+            if state.get("pid") and state.get("finished_at") is None:
+                raise RuntimeError("Training is already running")
+
+            manager = self._create_manager(overrides or {})
+            output_dir = manager.write_training_config()
+            log_file = output_dir / f"training_{int(time.time())}.log"
+            command = manager.build_training_command()
+
+            log_handle = open(log_file, "ab")
+            try:
+                process = subprocess.Popen(
+                    command,
+                    stdout=log_handle,
+                    stderr=subprocess.STDOUT,
+                    stdin=subprocess.DEVNULL,
+                    env=manager.build_training_env(),
+                    cwd=str(manager.base_dir),
+                    # Own process group so stop() reaches every torchrun worker
+                    start_new_session=True,
+                )
+            except OSError:
+                log_handle.close()
+                raise
+
+            state = {
+                "pid": process.pid,
+                "process_start_time": _process_start_time(process.pid),
+                "returncode": None,
+                "started_at": time.time(),
+                "finished_at": None,
+                "log_file": str(log_file.resolve()),
+                "command": command,
+                "stop_requested": False,
+            }
+            self._save(state)
+            threading.Thread(target=self._reap, args=(process, log_handle),
+                             name="training-reaper", daemon=True).start()
+            return self._status(state)
+
+    def stop(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Terminate the running job: SIGTERM the group, then SIGKILL after ``timeout``."""
+        if timeout is None:
+            timeout = settings.TRAINING_STOP_TIMEOUT_SECONDS
+        with self._locked() as state:
+            if not state.get("pid") or state.get("finished_at") is not None:
+                return self._status(state)
+            state["stop_requested"] = True
+            self._save(state)
+            # The job is the leader of its own process group
+            self._signal_group(state["pid"], signal.SIGTERM)
+
+        # The job may belong to another worker, so wait on its state rather than on a Popen
+        deadline = time.monotonic() + timeout
+        while self.is_running and time.monotonic() < deadline:
+            time.sleep(0.2)
+        if self.is_running:
+            self._signal_group(state["pid"], signal.SIGKILL)
+            while self.is_running:
+                time.sleep(0.2)
+        return self.status()
+
+    @staticmethod
+    def _signal_group(pgid: int, sig: int) -> None:
+        try:
+            os.killpg(pgid, sig)
+        except ProcessLookupError:
+            pass
+
+    def status(self) -> Dict[str, Any]:
+        with self._locked() as state:
+            return self._status(state)
+
+    def _status(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        returncode = state.get("returncode")
+        if not state.get("pid"):
+            status = "idle"
+        elif state.get("finished_at") is None:
+            status = "running"
+        elif state.get("stop_requested"):
+            status = "stopped"
+        elif returncode is None:
+            # Reaped by a worker that has since exited
+            status = "exited"
+        elif returncode == 0:
+            status = "completed"
+        else:
+            status = "failed"
+
+        log_file = Path(state["log_file"]) if state.get("log_file") else None
+        log_size = None
+        if log_file is not None and log_file.exists():
+            log_size = log_file.stat().st_size
+
+        return {
+            "state": status,
+            "pid": state.get("pid"),
+            "returncode": returncode,
+            "started_at": state.get("started_at"),
+            "finished_at": state.get("finished_at"),
+            "log_file": log_file.name if log_file is not None else None,
+            "log_size": log_size,
+            "command": state.get("command", []),
+        }
+
+
+# Shared by all requests in this worker; the job state itself is shared by all workers
+training_supervisor = TrainingSupervisor(settings.TRAINING_CONFIG_PATH)
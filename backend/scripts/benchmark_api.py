@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+OntoThink后端进程内HTTP压测套件
+  1. 在一次性数据库(默认临时SQLite，可用 --database_url 指定一次性Postgres)中
+     写入可配置规模的合成用户与思辨图谱
+  2. 通过ASGI客户端并发驱动认证与thought-graphs接口(按权重混合场景)
+  3. 以JSON输出每个场景的吞吐、p50/p95/p99延迟和错误率
+  4. --compare 与保存的基线比较，出现超过阈值的退化时返回非零退出码
+
+示例:
+  python scripts/benchmark_api.py --graphs 200 --nodes_per_graph 30 --output baseline.json
+  python scripts/benchmark_api.py --graphs 200 --nodes_per_graph 30 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import httpx
+from sqlalchemy import insert
+
+from app.config import settings
+
+SCENARIO_WEIGHTS = "read_graph=60,list_graphs=15,me=10,create_graph=10,login=5"
+BENCH_PASSWORD = "bench-password"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def seed_database(args) -> Dict[str, list]:
+    """写入合成数据，返回用户名、token和图谱id"""
+    from app.db.base import get_engine
+    from app.models import Base, User, ThoughtGraph, GraphNode, GraphEdge, NodeType, EdgeType
+    from app.core.security import build_token_claims, create_access_token, get_password_hash
+
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    rng = random.Random(args.seed)
+    password_hash = get_password_hash(BENCH_PASSWORD)
+    node_types = list(NodeType)
+    edge_types = list(EdgeType)
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"username": f"bench{i}", "email": f"bench{i}@example.com",
+             "hashed_password": password_hash, "is_active": True, "is_superuser": False}
+            for i in range(args.users)
+        ])
+        users = conn.execute(User.__table__.select()).mappings().all()
+        user_ids = [u["id"] for u in users]
+
+        graph_ids = []
+        for g in range(args.graphs):
+            graph_id = conn.execute(insert(ThoughtGraph).values(
+                title=f"合成图谱 {g}", description="benchmark", created_by=rng.choice(user_ids)
+            )).inserted_primary_key[0]
+            graph_ids.append(graph_id)
+
+            conn.execute(insert(GraphNode), [
+                {"graph_id": graph_id, "node_type": rng.choice(node_types),
+                 "content": f"节点 {g}-{n} " + "思辨" * rng.randint(5, 50),
+                 "position_x": rng.uniform(0, 1000), "position_y": rng.uniform(0, 1000)}
+                for n in range(args.nodes_per_graph)
+            ])
+            node_ids = [row[0] for row in conn.execute(
+                GraphNode.__table__.select().with_only_columns(GraphNode.__table__.c.id)
+                .where(GraphNode.__table__.c.graph_id == graph_id)
+            )]
+            if len(node_ids) > 1 and args.edges_per_graph:
+                conn.execute(insert(GraphEdge), [
+                    {"graph_id": graph_id, "source_node_id": a, "target_node_id": b,
+                     "edge_type": rng.choice(edge_types)}
+                    for a, b in (rng.sample(node_ids, 2) for _ in range(args.edges_per_graph))
+                ])
+
+    tokens = [create_access_token(build_token_claims(User(**u))) for u in users]
+    return {"usernames": [u["username"] for u in users], "tokens": tokens, "graph_ids": graph_ids}
+
+
+def build_scenarios(data: Dict[str, list], args) -> Dict[str, Callable]:
+    api = settings.API_V1_STR
+    rng = random.Random(args.seed + 1)
+
+    def auth(i: int) -> dict:
+        return {"Authorization": f"Bearer {data['tokens'][i % len(data['tokens'])]}"}
+
+    async def read_graph(client, i):
+        return await client.get(f"{api}/thought-graphs/{rng.choice(data['graph_ids'])}", headers=auth(i))
+
+    async def list_graphs(client, i):
+        return await client.get(f"{api}/thought-graphs/", params={"limit": args.list_limit}, headers=auth(i))
+
+    async def me(client, i):
+        return await client.get(f"{api}/auth/me", headers=auth(i))
+
+    async def create_graph(client, i):
+        n = max(2, args.nodes_per_graph // 4)
+        body = {
+            "title": f"新图谱 {i}",
+            "nodes": [{"node_type": "standpoint", "content": f"立场 {k}"} for k in range(n)],
+            "edges": [{"source_node_id": k, "target_node_id": k + 1, "edge_type": "supports"}
+                      for k in range(n - 1)],
+        }
+        return await client.post(f"{api}/thought-graphs/", json=body, headers=auth(i))
+
+    async def login(client, i):
+        username = data["usernames"][i % len(data["usernames"])]
+        return await client.post(f"{api}/auth/login", data={"username": username, "password": BENCH_PASSWORD})
+
+    return {"read_graph": read_graph, "list_graphs": list_graphs, "me": me,
+            "create_graph": create_graph, "login": login}
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    weights = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+async def run_load(scenarios: Dict[str, Callable], weights: Dict[str, float],
+                   duration: float, concurrency: int, seed: int) -> Dict[str, dict]:
+    from app.main import app
+
+    names = [name for name in weights if weights[name] > 0]
+    unknown = set(names) - set(scenarios)
+    if unknown:
+        raise SystemExit(f"❌ 未知场景: {', '.join(sorted(unknown))}")
+    rng = random.Random(seed)
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    deadline = time.perf_counter() + duration
+    counter = 0
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60.0) as client:
+        async def worker():
+            nonlocal counter
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights=[weights[n] for n in names])[0]
+                counter += 1
+                start = time.perf_counter()
+                try:
+                    response = await scenarios[name](client, counter)
+                    failed = response.status_code >= 400
+                except Exception:
+                    failed = True
+                latencies[name].append((time.perf_counter() - start) * 1000)
+                if failed:
+                    errors[name] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    def summarize(values: List[float], error_count: int) -> dict:
+        values = sorted(values)
+        count = len(values)
+        return {
+            "requests": count,
+            "errors": error_count,
+            "error_rate": round(error_count / count, 4) if count else 0.0,
+            "requests_per_second": round(count / elapsed, 2),
+            "mean_ms": round(sum(values) / count, 2) if count else 0.0,
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+        }
+
+    results = {name: summarize(latencies[name], errors[name]) for name in names}
+    results["overall"] = summarize([v for vs in latencies.values() for v in vs], sum(errors.values()))
+    return results
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> List[str]:
+    """比较吞吐和p95，返回超过阈值的退化描述"""
+    regressions = []
+    print(f"\n📈 与基线比较 (阈值 {max_regression:.0%}):")
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            print(f"   {name:13s} 基线中无此场景")
+            continue
+        rps_change = (current["requests_per_second"] - base["requests_per_second"]) / (base["requests_per_second"] or 1)
+        p95_change = (current["p95_ms"] - base["p95_ms"]) / (base["p95_ms"] or 1)
+        flag = ""
+        if rps_change < -max_regression:
+            regressions.append(f"{name}: 吞吐下降 {-rps_change:.1%}")
+            flag = " ❌"
+        if p95_change > max_regression:
+            regressions.append(f"{name}: p95上升 {p95_change:.1%}")
+            flag = " ❌"
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{name}: 错误率 {base['error_rate']:.2%} -> {current['error_rate']:.2%}")
+            flag = " ❌"
+        print(f"   {name:13s} 吞吐 {rps_change:+.1%}  p95 {p95_change:+.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OntoThink后端进程内压测")
+    parser.add_argument("--database_url", help="一次性数据库URL(结束时删除所有表)，默认使用临时SQLite")
+    parser.add_argument("--keep_data", action="store_true", help="结束时不删除数据表")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--graphs", type=int, default=100)
+    parser.add_argument("--nodes_per_graph", type=int, default=20)
+    parser.add_argument("--edges_per_graph", type=int, default=30)
+    parser.add_argument("--list_limit", type=int, default=20, help="list_graphs每页数量")
+    parser.add_argument("--scenarios", default=SCENARIO_WEIGHTS, help="场景权重，如 read_graph=60,login=5")
+    parser.add_argument("--duration", type=float, default=20.0, help="压测时长(秒)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="预热时长(秒)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--hash_rounds", type=int, help="覆盖bcrypt轮数(登录场景)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="结果JSON输出路径(可作为基线)")
+    parser.add_argument("--compare", help="基线JSON路径")
+    parser.add_argument("--max_regression", type=float, default=0.10, help="允许的退化比例")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    if args.database_url:
+        settings.DATABASE_URL = args.database_url
+    else:
+        tmp_dir = tempfile.TemporaryDirectory()
+        settings.DATABASE_URL = f"sqlite:///{Path(tmp_dir.name) / 'bench.db'}"
+    # Engine and hash context are created lazily, so these take effect here
+    settings.DB_POOL_SIZE = max(settings.DB_POOL_SIZE, args.concurrency)
+    if args.hash_rounds:
+        settings.PASSWORD_HASH_ROUNDS = args.hash_rounds
+
+    from app.db.base import dispose_engine, get_engine
+    from app.models import Base
+
+    try:
+        print(f"🌱 写入合成数据: {args.users} 用户, {args.graphs} 图谱 x {args.nodes_per_graph} 节点")
+        start = time.perf_counter()
+        data = seed_database(args)
+        print(f"   完成，用时 {time.perf_counter() - start:.1f}s")
+
+        scenarios = build_scenarios(data, args)
+        weights = parse_weights(args.scenarios)
+        if args.warmup > 0:
+            asyncio.run(run_load(scenarios, weights, args.warmup, args.concurrency, args.seed))
+        print(f"🚀 压测 {args.duration:.0f}s，并发 {args.concurrency}")
+        scenario_results = asyncio.run(run_load(scenarios, weights, args.duration, args.concurrency, args.seed))
+    finally:
+        if args.database_url and not args.keep_data:
+            Base.metadata.drop_all(get_engine())
+        dispose_engine()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    results = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("database_url", "output", "compare")},
+        "database": "postgresql" if args.database_url and args.database_url.startswith("postgres") else "sqlite",
+        "scenarios": scenario_results,
+    }
+    for name, r in scenario_results.items():
+        print(f"   {name:13s} {r['requests_per_second']:>8} req/s  p50={r['p50_ms']}ms  "
+              f"p95={r['p95_ms']}ms  p99={r['p99_ms']}ms  errors={r['error_rate']:.2%}")
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存至: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print("❌ 检测到性能退化:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("✅ 未检测到超过阈值的退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+认证吞吐基准
+在进程内通过ASGI客户端并发请求，数据库使用临时SQLite文件。
+
+reads: 并发请求 GET /thought-graphs/{id}，对比
+  - no-cache: 每个请求都查询users表
+  - cache:    get_current_user 使用TTL用户缓存
+  - claims:   直接信任JWT中的签名声明
+login: 并发登录，对比bcrypt在事件循环内执行(inline)与在线程池执行(pool)，
+       同时测量登录风暴期间 GET / 的延迟
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import httpx
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.main import app
+from app.db.base import get_db
+from app.models import Base, User, ThoughtGraph, GraphNode, NodeType
+from app.core.security import build_token_claims, create_access_token, get_password_hash
+from app.core.user_cache import user_cache
+
+
+def setup_database(db_path: str, pool_size: int):
+    """创建SQLite数据库并写入一个用户和一张图"""
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False},
+        pool_size=pool_size
+    )
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = SessionLocal()
+    user = User(
+        username="bench", email="bench@example.com",
+        hashed_password=get_password_hash("bench-password"),
+        is_active=True, is_superuser=False
+    )
+    db.add(user)
+    db.commit()
+    graph = ThoughtGraph(title="自由意志是否真实存在？", created_by=user.id)
+    graph.nodes = [
+        GraphNode(node_type=NodeType.STANDPOINT, content=f"立场 {i}") for i in range(5)
+    ]
+    db.add(graph)
+    db.commit()
+    ids = (user.id, graph.id)
+    token = create_access_token(build_token_claims(user))
+    db.close()
+
+    def override_get_db():
+        session = SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return engine, token, ids
+
+
+async def run_scenario(url: str, token: str, total: int, concurrency: int) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                response = await client.get(url, headers=headers)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return {"requests": total, "errors": errors, "seconds": round(elapsed, 3),
+            "requests_per_second": round(total / elapsed, 1)}
+
+
+async def run_login_scenario(total: int, concurrency: int) -> dict:
+    """并发登录，同时以固定间隔探测 GET / 的延迟"""
+    url = f"{settings.API_V1_STR}/auth/login"
+    form = {"username": "bench", "password": "bench-password"}
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                response = await client.post(url, data=form)
+                if response.status_code != 200:
+                    errors += 1
+
+        async def probe():
+            # Latency is measured from when the probe was due, so time spent
+            # waiting for a blocked event loop is included
+            interval = 0.01
+            while not done.is_set():
+                due = time.perf_counter() + interval
+                await asyncio.sleep(interval)
+                await client.get("/")
+                probe_latencies.append((time.perf_counter() - due) * 1000)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    probe_latencies.sort()
+    return {
+        "requests": total, "errors": errors, "seconds": round(elapsed, 3),
+        "logins_per_second": round(total / elapsed, 1),
+        "probe_p50_ms": round(statistics.median(probe_latencies), 1),
+        "probe_max_ms": round(probe_latencies[-1], 1),
+    }
+
+
+def run_reads(args, engine, token, graph_id) -> dict:
+    queries = {"count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_query(*_):
+        queries["count"] += 1
+
+    url = f"{settings.API_V1_STR}/thought-graphs/{graph_id}"
+    scenarios = {
+        "no-cache": (0, False),
+        "cache": (settings.AUTH_USER_CACHE_TTL_SECONDS or 60.0, False),
+        "claims": (0, True),
+    }
+    results = {}
+    for name, (ttl, trust_claims) in scenarios.items():
+        user_cache.configure(ttl, settings.AUTH_USER_CACHE_MAX_SIZE)
+        settings.AUTH_TRUST_TOKEN_CLAIMS = trust_claims
+        # Warm up connection pool and cache
+        asyncio.run(run_scenario(url, token, args.concurrency, args.concurrency))
+        queries["count"] = 0
+        result = asyncio.run(run_scenario(url, token, args.requests, args.concurrency))
+        result["queries_per_request"] = round(queries["count"] / args.requests, 2)
+        results[name] = result
+        print(f"📊 {name:9s} {result['requests_per_second']:>8} req/s  "
+              f"{result['queries_per_request']} queries/req  errors={result['errors']}")
+    return results
+
+
+def run_logins(args) -> dict:
+    scenarios = {"inline": 0, "pool": args.hash_workers}
+    results = {}
+    for name, workers in scenarios.items():
+        settings.PASSWORD_HASH_WORKERS = workers
+        result = asyncio.run(run_login_scenario(args.logins, args.concurrency))
+        results[name] = result
+        print(f"🔐 {name:9s} {result['logins_per_second']:>8} logins/s  "
+              f"GET / p50={result['probe_p50_ms']}ms max={result['probe_max_ms']}ms  errors={result['errors']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="认证吞吐基准")
+    parser.add_argument("--mode", choices=["reads", "login", "all"], default="all", help="执行的基准")
+    parser.add_argument("--requests", type=int, default=2000, help="reads每个场景的请求数")
+    parser.add_argument("--logins", type=int, default=64, help="login每个场景的登录次数")
+    parser.add_argument("--concurrency", type=int, default=32, help="并发请求数")
+    parser.add_argument("--hash_workers", type=int, default=4, help="pool场景的bcrypt线程数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, token, (user_id, graph_id) = setup_database(str(Path(tmp) / "bench.db"), args.concurrency)
+        results = {}
+        if args.mode in ("reads", "all"):
+            results["reads"] = run_reads(args, engine, token, graph_id)
+        if args.mode in ("login", "all"):
+            results["login"] = run_logins(args)
+        engine.dispose()
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
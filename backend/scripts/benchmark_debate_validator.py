@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+思辨图谱结构校验器基准测试
+以 data/philosophical_debates.json 为模板生成指定条数（默认100万）的 JSONL 语料，
+按比例混入id错误、缺字段和截断的记录，然后分别测量：
+  - legacy: 逐行 json.loads + 原 generate_philosophical_debate 中的手写校验（单进程）
+  - compiled: debate_schema.validate_jsonl，依次使用 --workers 指定的进程数
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.data_processing.debate_schema import validate_jsonl
+
+DEBATES_FILE = Path(__file__).parent.parent / "data" / "philosophical_debates.json"
+
+
+def legacy_check(line: str) -> bool:
+    """原 DeepSeekAPI.generate_philosophical_debate 中的结构校验，作为对照"""
+    try:
+        debate_data = json.loads(line)
+    except json.JSONDecodeError:
+        return False
+    for field in ['question', 'standpoints', 'counter_questions']:
+        if field not in debate_data:
+            return False
+    if not isinstance(debate_data['standpoints'], list) or len(debate_data['standpoints']) < 2:
+        return False
+    for i, standpoint in enumerate(debate_data['standpoints'], 1):
+        if 'id' not in standpoint or standpoint['id'] != f'standpoint_{i}':
+            return False
+        if 'arguments' not in standpoint or not isinstance(standpoint['arguments'], list) or len(standpoint['arguments']) < 2:
+            return False
+        for j, argument in enumerate(standpoint['arguments'], 1):
+            if 'id' not in argument or argument['id'] != f'argument_{i}_{j}':
+                return False
+    if not isinstance(debate_data['counter_questions'], list) or len(debate_data['counter_questions']) < 2:
+        return False
+    for i, question in enumerate(debate_data['counter_questions'], 1):
+        if 'id' not in question or question['id'] != f'counter_question_{i}':
+            return False
+    return True
+
+
+def build_variants(invalid: bool):
+    with open(DEBATES_FILE, "r", encoding="utf-8") as f:
+        debates = json.load(f)
+    variants = []
+    for debate in debates:
+        if not invalid:
+            variants.append(json.dumps(debate, ensure_ascii=False))
+            continue
+        wrong_id = copy.deepcopy(debate)
+        wrong_id["standpoints"][-1]["arguments"][-1]["id"] = "argument_9_9"
+        missing = copy.deepcopy(debate)
+        del missing["counter_questions"]
+        line = json.dumps(debate, ensure_ascii=False)
+        variants += [json.dumps(wrong_id, ensure_ascii=False), json.dumps(missing, ensure_ascii=False),
+                     line[:len(line) // 2]]
+    return variants
+
+
+def generate_corpus(path: str, records: int, invalid_ratio: float, seed: int) -> int:
+    rng = random.Random(seed)
+    valid, invalid = build_variants(False), build_variants(True)
+    expected_invalid = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(records):
+            if rng.random() < invalid_ratio:
+                expected_invalid += 1
+                f.write(rng.choice(invalid))
+            else:
+                f.write(rng.choice(valid))
+            f.write("\n")
+    return expected_invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="思辨图谱结构校验器基准测试")
+    parser.add_argument("--records", type=int, default=1_000_000, help="生成的记录数")
+    parser.add_argument("--invalid_ratio", type=float, default=0.02, help="不合规记录比例")
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="逗号分隔的进程数列表")
+    parser.add_argument("--chunk_mb", type=int, default=32, help="每个任务的字节区间大小(MB)")
+    parser.add_argument("--skip_legacy", action="store_true", help="跳过原手写校验的对照测试")
+    parser.add_argument("--corpus", help="使用已有的JSONL语料而不是重新生成")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--output", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    expected_invalid = None
+    corpus = args.corpus
+    if not corpus:
+        tmp_dir = tempfile.TemporaryDirectory()
+        corpus = os.path.join(tmp_dir.name, "debates.jsonl")
+        start = time.perf_counter()
+        expected_invalid = generate_corpus(corpus, args.records, args.invalid_ratio, args.seed)
+        print(f"🧪 生成 {args.records} 条记录 ({os.path.getsize(corpus) / 1e6:.0f} MB)，"
+              f"用时 {time.perf_counter() - start:.1f}s")
+
+    results = []
+    try:
+        if not args.skip_legacy:
+            start = time.perf_counter()
+            with open(corpus, "r", encoding="utf-8") as f:
+                records = invalid = 0
+                for line in f:
+                    records += 1
+                    invalid += not legacy_check(line)
+            elapsed = time.perf_counter() - start
+            results.append({"mode": "legacy", "workers": 1, "records": records, "invalid": invalid,
+                            "seconds": elapsed, "records_per_second": records / elapsed})
+            print(f"  legacy     workers=1   {elapsed:7.2f}s  {records / elapsed:>10,.0f} rec/s  不合规 {invalid}")
+
+        for workers in (int(w) for w in args.workers.split(",")):
+            start = time.perf_counter()
+            report = validate_jsonl(corpus, workers=workers, chunk_bytes=args.chunk_mb * 1024 * 1024)
+            elapsed = time.perf_counter() - start
+            results.append({"mode": "compiled", "workers": workers, "records": report.records,
+                            "invalid": report.invalid, "seconds": elapsed,
+                            "records_per_second": report.records / elapsed})
+            print(f"  compiled   workers={workers:<3} {elapsed:7.2f}s  {report.records / elapsed:>10,.0f} rec/s  "
+                  f"不合规 {report.invalid}")
+    finally:
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+    if expected_invalid is not None:
+        print(f"\n✅ 预期不合规 {expected_invalid} 条")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"corpus": args.corpus, "expected_invalid": expected_invalid, "results": results}, f, indent=2)
+        print(f"📄 结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
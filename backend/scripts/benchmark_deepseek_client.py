@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+DeepSeek客户端连接复用基准测试
+在本地启动一个返回固定补全结果的 OpenAI 兼容服务器，分别以
+每次调用新建连接（原 requests.post 方式）和 DeepSeekAPI 连接池方式
+发起相同数量的请求，对比单次调用耗时，得出连接池省去的开销。
+也可通过 --api_base 指向其他（例如 HTTPS）兼容端点以计入 TLS 握手。
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, List
+
+import requests
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.data_processing.completion_cache import CompletionCache
+from app.data_processing.deepseek_api import DeepSeekAPI
+
+COMPLETION = json.dumps({
+    "id": "chatcmpl-local",
+    "object": "chat.completion",
+    "model": "deepseek-chat",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "{}"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}).encode("utf-8")
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body are written separately
+    latency = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(COMPLETION)))
+        self.end_headers()
+        self.wfile.write(COMPLETION)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_local_server(latency: float) -> ThreadingHTTPServer:
+    CompletionHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CompletionHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(call: Callable[[], None], requests_count: int, warmup: int) -> List[float]:
+    for _ in range(warmup):
+        call()
+    latencies = []
+    for _ in range(requests_count):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def describe(name: str, latencies: List[float]) -> dict:
+    latencies_sorted = sorted(latencies)
+    result = {
+        "mode": name,
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": latencies_sorted[len(latencies) // 2],
+        "p95_ms": latencies_sorted[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+    print(f"  {name:<10} mean {result['mean_ms']:7.2f} ms   p50 {result['p50_ms']:7.2f} ms   "
+          f"p95 {result['p95_ms']:7.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DeepSeek客户端连接复用基准测试")
+    parser.add_argument("--requests", type=int, default=300, help="每种模式的请求数")
+    parser.add_argument("--warmup", type=int, default=10, help="预热请求数")
+    parser.add_argument("--server_latency_ms", type=float, default=0.0, help="本地服务器每个请求附加的处理时延(毫秒)")
+    parser.add_argument("--api_base", help="使用外部兼容端点而不是本地服务器")
+    parser.add_argument("--http2", action="store_true", help="连接池客户端启用HTTP/2（需要h2）")
+    parser.add_argument("--output", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    server = None
+    api_base = args.api_base
+    if not api_base:
+        server = start_local_server(args.server_latency_ms / 1000)
+        api_base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"🚀 目标端点: {api_base}，每种模式 {args.requests} 次请求")
+
+    messages = [{"role": "user", "content": "ping"}]
+    api = DeepSeekAPI(api_key="benchmark", api_base=api_base, http2=args.http2,
+                      cache=CompletionCache(mode="off"))
+    payload = {"model": "deepseek-chat", "messages": messages}
+
+    def per_call():
+        response = requests.post(api.base_url, headers=api.headers, json=payload, timeout=60)
+        response.raise_for_status()
+        response.json()
+
+    def pooled():
+        if api._make_api_call(messages) is None:
+            raise RuntimeError("请求失败")
+
+    try:
+        results = [
+            describe("per-call", measure(per_call, args.requests, args.warmup)),
+            describe("pooled", measure(pooled, args.requests, args.warmup)),
+        ]
+    finally:
+        api.close()
+        if server:
+            server.shutdown()
+
+    saved = results[0]["mean_ms"] - results[1]["mean_ms"]
+    print(f"\n✅ 连接池每次调用节省 {saved:.2f} ms "
+          f"（占单次调用均值的 {saved / results[0]['mean_ms']:.0%}）")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"api_base": api_base, "results": results, "saved_ms_per_call": saved}, f, indent=2)
+        print(f"📄 结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+生成流水线端到端吞吐基准测试（离线，不消耗API额度）
+在后台启动 scripts/local_llm_server.py 中的本地补全服务器（或通过 --api_base 使用已启动的服务器），
+依次测量以下目标的总耗时、每秒合格思辨图谱数和失败数：
+  - sync:      DeepSeekAPI 逐个生成
+  - async:     AsyncDeepSeekAPI 并发生成，每个问题一次请求
+  - batched:   同上，但每次请求合并 --questions_per_request 个问题，失败的问题单独重试
+  - expander:  DatasetExpander 完整运行（工作协程池、逐条写入日志和最终合并）
+  - training:  expand_training_data.generate_training_data
+补全缓存全部关闭，保证每个问题都真正请求服务器。每个目标的调用写入单独的调用日志，
+报告中的 Token 数来自服务器返回的 usage（按字节估算）。
+
+用法示例:
+  python scripts/benchmark_generation_pipeline.py --questions 60 --concurrency 8 \\
+      --latency lognormal:800:0.4 --tokens_per_second 200 --rate_429 0.05 --rate_malformed 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent))
+
+from app.data_processing.completion_cache import CompletionCache
+from app.data_processing.deepseek_api import AsyncDeepSeekAPI, DeepSeekAPI
+from app.data_processing.telemetry import RunLog
+from expand_training_data import generate_training_data
+from local_llm_server import DEBATES_FILE, BackgroundServer, add_server_arguments, config_from_args
+
+TARGETS = ("sync", "async", "batched", "expander", "training")
+
+
+def build_questions(count: int) -> List[Dict[str, Any]]:
+    """以数据集中的问题为底，加编号保证互不相同"""
+    with open(DEBATES_FILE, "r", encoding="utf-8") as f:
+        seeds = json.load(f)
+    return [
+        {
+            "question": f"{seeds[i % len(seeds)]['question']}（{i + 1}）",
+            "category": seeds[i % len(seeds)].get("category", "哲学"),
+            "difficulty": seeds[i % len(seeds)].get("difficulty", "中等"),
+        }
+        for i in range(count)
+    ]
+
+
+def run_sync(api_base: str, questions: List[Dict[str, Any]], args, run_log: RunLog, work_dir: str) -> int:
+    with DeepSeekAPI(api_base=api_base, cache=CompletionCache(mode="off"), run_log=run_log) as api:
+        return sum(api.generate_philosophical_debate(q["question"], q["category"], q["difficulty"]) is not None
+                   for q in questions)
+
+
+def generate_async(api_base: str, questions: List[Dict[str, Any]], args, run_log: RunLog,
+                   questions_per_request: int) -> int:
+    async def generate():
+        async with AsyncDeepSeekAPI(api_base=api_base, max_concurrency=args.concurrency,
+                                    cache=CompletionCache(mode="off"), run_log=run_log) as api:
+            groups = [questions[i:i + questions_per_request]
+                      for i in range(0, len(questions), questions_per_request)]
+            results = await asyncio.gather(*(api.generate_debate_batch(group) for group in groups))
+        return sum(debate is not None for group in results for debate in group)
+    return asyncio.run(generate())
+
+
+def run_async(api_base: str, questions: List[Dict[str, Any]], args, run_log: RunLog, work_dir: str) -> int:
+    return generate_async(api_base, questions, args, run_log, 1)
+
+
+def run_batched(api_base: str, questions: List[Dict[str, Any]], args, run_log: RunLog, work_dir: str) -> int:
+    return generate_async(api_base, questions, args, run_log, args.questions_per_request)
+
+
+def run_expander(api_base: str, questions: List[Dict[str, Any]], args, run_log: RunLog, work_dir: str) -> int:
+    from app.data_processing.expand_dataset import DatasetExpander
+
+    seed_file = os.path.join(work_dir, "seed_questions.json")
+    output_file = os.path.join(work_dir, "expanded_dataset.json")
+    with open(seed_file, "w", encoding="utf-8") as f:
+        json.dump(questions, f, ensure_ascii=False)
+    api = AsyncDeepSeekAPI(api_base=api_base, max_concurrency=args.concurrency, cache=CompletionCache(mode="off"),
+                           run_log=run_log)
+    # 问题只靠编号区分，关闭近似去重，保证每个问题都会生成
+    DatasetExpander(api=api, seed_questions_file=seed_file, output_file=output_file,
+                    questions_per_request=args.questions_per_request, near_duplicate_threshold=0).run()
+    with open(output_file, "r", encoding="utf-8") as f:
+        return len(json.load(f))
+
+
+def run_training(api_base: str, questions: List[Dict[str, Any]], args, run_log: RunLog, work_dir: str) -> int:
+    # generate_training_data 自己抽取问题；返回的是训练样本，按每个问题至少产生一条样本统计合格数
+    output_path = os.path.join(work_dir, "training.jsonl")
+    samples = asyncio.run(generate_training_data(
+        api_key="local", num_samples=len(questions), output_path=output_path,
+        concurrency=args.concurrency, cache=CompletionCache(mode="off"), api_base=api_base, run_log=run_log,
+        questions_per_request=args.questions_per_request))
+    return len({sample["instruction"].split("问题：")[1].split("\n")[0] for sample in samples})
+
+
+RUNNERS: Dict[str, Callable[..., int]] = {
+    "sync": run_sync,
+    "async": run_async,
+    "batched": run_batched,
+    "expander": run_expander,
+    "training": run_training,
+}
+
+
+def server_stats(base_url: str) -> Dict[str, int]:
+    return httpx.get(f"{base_url}/stats").json()
+
+
+def reset_server_stats(base_url: str) -> None:
+    httpx.post(f"{base_url}/stats/reset")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成流水线端到端吞吐基准测试")
+    parser.add_argument("--targets", default="sync,async,batched,expander,training", help=f"逗号分隔，可选 {','.join(TARGETS)}")
+    parser.add_argument("--questions", type=int, default=30, help="async/training 目标的问题数")
+    parser.add_argument("--sync_questions", type=int, default=10, help="sync 目标的问题数")
+    parser.add_argument("--expander_questions", type=int, default=30, help="expander 目标的问题数")
+    parser.add_argument("--concurrency", type=int, default=8, help="异步客户端的初始并发数")
+    parser.add_argument("--questions_per_request", type=int, default=5,
+                        help="batched 目标每次请求合并的问题数（expander/training 目标也使用）")
+    parser.add_argument("--api_base", help="使用已启动的兼容服务器，而不是在后台启动本地服务器")
+    parser.add_argument("--output", help="将结果写入JSON文件")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    targets = [t for t in args.targets.split(",") if t]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"未知目标: {', '.join(sorted(unknown))}")
+    counts = {"sync": args.sync_questions, "expander": args.expander_questions}
+
+    server = None
+    if args.api_base:
+        api_base = args.api_base.rstrip("/")
+    else:
+        server = BackgroundServer(config_from_args(args)).__enter__()
+        api_base = server.api_base
+        print(f"🚀 本地LLM服务器已启动: {api_base} (时延 {args.latency})")
+    base_url = api_base[:-3] if api_base.endswith("/v1") else api_base
+
+    results = []
+    try:
+        for target in targets:
+            questions = build_questions(counts.get(target, args.questions))
+            reset_server_stats(base_url)
+            print(f"\n▶️  {target}: {len(questions)} 个问题")
+            with tempfile.TemporaryDirectory() as work_dir:
+                run_log = RunLog(os.path.join(work_dir, "run.jsonl"), run_id=target)
+                start = time.perf_counter()
+                accepted = RUNNERS[target](api_base, questions, args, run_log, work_dir)
+                elapsed = time.perf_counter() - start
+                run_log.close()
+                usage = run_log.summary()["overall"]
+            stats = server_stats(base_url)
+            result = {
+                "target": target,
+                "questions": len(questions),
+                "accepted": accepted,
+                "failed": len(questions) - accepted,
+                "seconds": elapsed,
+                "debates_per_second": accepted / elapsed if elapsed else 0.0,
+                "api_calls": usage["api_calls"],
+                "prompt_tokens": usage["prompt_tokens"],
+                "completion_tokens": usage["completion_tokens"],
+                "tokens_per_accepted": usage["tokens_per_accepted"],
+                "server": stats,
+            }
+            results.append(result)
+            print(f"  ⏱️  {elapsed:7.2f}s  {result['debates_per_second']:6.2f} 个/秒  "
+                  f"合格 {accepted}  失败 {result['failed']}  服务器 {stats}")
+    finally:
+        if server is not None:
+            server.__exit__(None, None, None)
+
+    print("\n📊 汇总")
+    for result in results:
+        tokens = result["tokens_per_accepted"]
+        print(f"  {result['target']:<9} {result['seconds']:8.2f}s  {result['debates_per_second']:6.2f} 个/秒  "
+              f"合格 {result['accepted']}/{result['questions']}  请求 {result['api_calls']}  "
+              f"每个合格图谱 {'-' if tokens is None else round(tokens)} tokens")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"📄 结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
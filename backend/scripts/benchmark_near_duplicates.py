@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+种子问题近似去重基准测试
+以 data/ 下真实问题的字符为语料，构造 --questions 个候选问题：其中 --variant_ratio 比例是
+已有问题的轻微改写（增删替换一两个字、改标点、加编号、全角半角混用），其余为不同的问题。
+测量 MinHash/LSH 过滤的耗时和每秒处理数，并以精确 Jaccard 相似度为基准，
+统计改写问题的召回率（相似度达到阈值的改写中被过滤的比例）和误删数
+（被判为重复但与所匹配问题的精确相似度低于阈值，按设计应为 0）。
+
+用法示例:
+  python scripts/benchmark_near_duplicates.py --questions 1000000 --threshold 0.7
+"""
+
+import argparse
+import json
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.data_processing.config import (
+    NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_SHINGLE_SIZE, NEAR_DUPLICATE_NUM_PERM, NEAR_DUPLICATE_BANDS
+)
+from app.data_processing.dedup import NearDuplicateIndex, fingerprint, jaccard
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+FULL_WIDTH = {"?": "？", ",": "，", ":": "：", "1": "１", "2": "２"}
+
+
+def corpus_characters() -> List[str]:
+    """data/ 下所有问题文本中出现的汉字（按出现次数加权）"""
+    chars = []
+    for path in DATA_DIR.glob("*.json"):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        chars.extend(c for c in text if "一" <= c <= "鿿")
+    return chars
+
+
+def perturb(question: str, chars: List[str], rng: random.Random) -> str:
+    """对问题做一两处轻微改写"""
+    body, mark = (question[:-1], question[-1]) if question[-1] in "？?" else (question, "？")
+    for _ in range(rng.randint(1, 2)):
+        kind = rng.choice(("replace", "insert", "delete", "number", "width"))
+        position = rng.randrange(len(body))
+        if kind == "replace":
+            body = body[:position] + rng.choice(chars) + body[position + 1:]
+        elif kind == "insert":
+            body = body[:position] + rng.choice(chars) + body[position:]
+        elif kind == "delete" and len(body) > 4:
+            body = body[:position] + body[position + 1:]
+        elif kind == "number":
+            body = f"{body}（{rng.randint(1, 99)}）"
+        elif kind == "width":
+            mark = FULL_WIDTH.get(mark, "?") if mark in FULL_WIDTH else "?"
+    return body + mark
+
+
+def build_candidates(count: int, variant_ratio: float, seed: int) -> List[Tuple[str, int]]:
+    """(问题, 改写来源的下标或 -1)"""
+    rng = random.Random(seed)
+    chars = corpus_characters()
+    candidates: List[Tuple[str, int]] = []
+    originals: List[int] = []
+    for _ in range(count):
+        if originals and rng.random() < variant_ratio:
+            source = rng.choice(originals)
+            candidates.append((perturb(candidates[source][0], chars, rng), source))
+        else:
+            originals.append(len(candidates))
+            candidates.append(("".join(rng.choices(chars, k=rng.randint(8, 30))) + "？", -1))
+    return candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="种子问题近似去重基准测试")
+    parser.add_argument("--questions", type=int, default=200000, help="候选问题数")
+    parser.add_argument("--variant_ratio", type=float, default=0.3, help="改写问题的比例")
+    parser.add_argument("--threshold", type=float, default=NEAR_DUPLICATE_THRESHOLD, help="Jaccard 相似度阈值")
+    parser.add_argument("--shingle_size", type=int, default=NEAR_DUPLICATE_SHINGLE_SIZE, help="每个shingle的字数")
+    parser.add_argument("--num_perm", type=int, default=NEAR_DUPLICATE_NUM_PERM, help="MinHash 签名长度")
+    parser.add_argument("--bands", type=int, default=NEAR_DUPLICATE_BANDS, help="LSH 分段数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    print(f"🧪 构造 {args.questions} 个候选问题（改写比例 {args.variant_ratio}）...")
+    candidates = build_candidates(args.questions, args.variant_ratio, args.seed)
+
+    index = NearDuplicateIndex(threshold=args.threshold, shingle_size=args.shingle_size,
+                               num_perm=args.num_perm, bands=args.bands)
+    start = time.perf_counter()
+    matches = [index.find_or_add(question) for question, _ in candidates]
+    elapsed = time.perf_counter() - start
+
+    dropped = sum(match is not None for match in matches)
+    fingerprints = {}
+
+    def shingles(text: str):
+        if text not in fingerprints:
+            fingerprints[text] = fingerprint(text, args.shingle_size)[1]
+        return fingerprints[text]
+
+    # 召回率：与来源问题精确相似度达到阈值、且来源问题本身被保留的改写
+    expected = caught = wrong = 0
+    for (question, source), match in zip(candidates, matches):
+        if match is not None and jaccard(shingles(question), shingles(match)) < args.threshold:
+            wrong += 1
+        if source < 0 or matches[source] is not None:
+            continue
+        if jaccard(shingles(question), shingles(candidates[source][0])) >= args.threshold:
+            expected += 1
+            caught += match is not None
+
+    result = {
+        "questions": len(candidates),
+        "seconds": elapsed,
+        "questions_per_second": len(candidates) / elapsed,
+        "indexed": len(index),
+        "dropped": dropped,
+        "api_calls_avoided": dropped,
+        "recall": caught / expected if expected else None,
+        "similar_variants": expected,
+        "false_drops": wrong,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    print(f"⏱️  {elapsed:.2f}s，{result['questions_per_second']:.0f} 个/秒，"
+          f"保留 {len(index)}，过滤 {dropped}（节省 {dropped} 次生成调用），"
+          f"峰值内存 {result['peak_rss_mb']:.0f} MB")
+    recall = "-" if result["recall"] is None else f"{result['recall']:.3f}"
+    print(f"🎯 相似度≥{args.threshold} 的改写召回率: {recall}（{caught}/{expected}），误删 {wrong}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "result": result}, f, ensure_ascii=False, indent=2)
+        print(f"📄 结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
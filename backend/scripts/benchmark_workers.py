@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+生产服务器多worker扩展性压测
+依次以不同worker数启动 python -m app.server，对 /health 施加固定并发负载，
+输出每种配置的吞吐、延迟分位数以及处理请求的worker进程分布。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_healthy(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"服务器未在 {timeout}s 内就绪")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def drive_load(base_url: str, path: str, duration: float, concurrency: int) -> dict:
+    latencies: List[float] = []
+    pids: Counter = Counter()
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=10.0) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    if response.status_code != 200:
+                        errors += 1
+                    elif path == "/health":
+                        pids[response.json()["pid"]] += 1
+                except httpx.HTTPError:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "requests_per_worker": sorted(pids.values(), reverse=True),
+    }
+
+
+def run_profile(workers: int, args) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = os.environ.copy()
+    env.setdefault("DB_POOL_PREWARM", "0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--workers", str(workers), "--bind", f"127.0.0.1:{port}"],
+        cwd=str(BACKEND_DIR), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_healthy(base_url)
+        # Warm up every worker before measuring
+        asyncio.run(drive_load(base_url, args.path, 1.0, args.concurrency))
+        return asyncio.run(drive_load(base_url, args.path, args.duration, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多worker扩展性压测")
+    parser.add_argument("--workers", default="1,2,4", help="逗号分隔的worker数列表")
+    parser.add_argument("--duration", type=float, default=10.0, help="每种配置的压测时长(秒)")
+    parser.add_argument("--concurrency", type=int, default=64, help="并发连接数")
+    parser.add_argument("--path", default="/health", help="压测的路径")
+    parser.add_argument("--output", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    results = {}
+    for workers in [int(w) for w in args.workers.split(",")]:
+        print(f"🚀 workers={workers} ...")
+        result = run_profile(workers, args)
+        results[str(workers)] = result
+        print(f"   {result['requests_per_second']} req/s  p50={result['p50_ms']}ms  "
+              f"p99={result['p99_ms']}ms  errors={result['errors']}  per-worker={result['requests_per_worker']}")
+
+    baseline = results[next(iter(results))]["requests_per_second"]
+    for workers, result in results.items():
+        result["speedup"] = round(result["requests_per_second"] / baseline, 2) if baseline else None
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
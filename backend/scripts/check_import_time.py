@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+后端冷启动导入时间检查
+使用 python -X importtime 导入 app.main，超过预算或提前加载了重量级模块时返回非零退出码，
+可直接用于CI。
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Loaded lazily on first use / in the lifespan hook; importing the app must not pull them in
+LAZY_MODULES = ["jose", "passlib", "bcrypt", "psycopg2"]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure_import(module: str) -> Tuple[int, List[Tuple[int, str]], List[str]]:
+    """导入模块一次，返回(累计微秒, 顶层耗时明细, 已加载的模块列表)"""
+    code = f"import sys, {module}; print('\\n'.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=str(BACKEND_DIR)
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr}")
+
+    total = 0
+    top_level: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if name == module:
+            total = cumulative
+        if indent <= 3:
+            top_level[name] = cumulative
+
+    breakdown = sorted(((us, name) for name, us in top_level.items() if name != module), reverse=True)
+    return total, breakdown, result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查后端导入时间预算")
+    parser.add_argument("--module", default="app.main", help="要检查的模块")
+    parser.add_argument("--budget_ms", type=float, default=1500.0, help="导入时间预算(毫秒)")
+    parser.add_argument("--runs", type=int, default=3, help="测量次数，取最小值")
+    args = parser.parse_args()
+
+    runs = [measure_import(args.module) for _ in range(args.runs)]
+    total, breakdown, loaded = min(runs, key=lambda run: run[0])
+    total_ms = total / 1000
+
+    print(f"⏱️  {args.module} 导入耗时: {total_ms:.1f} ms (预算 {args.budget_ms:.0f} ms)")
+    for us, name in breakdown[:10]:
+        print(f"   {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    if eager:
+        print(f"❌ 以下模块应延迟加载，但在导入时已被加载: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"❌ 导入时间超出预算 {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✅ 导入时间检查通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,20 @@ OntoThink训练数据扩展脚本
 import json
 import random
 import asyncio
-import aiohttp
+import sys
 from typing import List, Dict
 import argparse
 from pathlib import Path
 
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.data_processing.completion_cache import CACHE_MODES, CompletionCache
+from app.data_processing.config import DEEPSEEK_API_BASE, LLM_CACHE_PATH, QUESTIONS_PER_REQUEST
+from app.data_processing.deepseek_api import AsyncDeepSeekAPI
+from app.data_processing.dedup import filter_near_duplicates
+from app.data_processing.telemetry import RunLog
+
 # 哲学领域和问题模板
 PHILOSOPHY_DOMAINS = {
     "形而上学": [
@@ -58,6 +67,9 @@ PHILOSOPHY_DOMAINS = {
     ]
 }
 
+# 模板问题所属领域，用于按类别统计生成情况；组合和对比问题归为“综合”
+QUESTION_DOMAINS = {q: domain for domain, domain_questions in PHILOSOPHY_DOMAINS.items() for q in domain_questions}
+
 def generate_philosophical_questions(num_questions: int = 50) -> List[str]:
     """生成多样化的哲学问题"""
     questions = []
@@ -88,110 +100,12 @@ def generate_philosophical_questions(num_questions: int = 50) -> List[str]:
     
     questions.extend(contrast_questions)
     
-    return random.sample(questions, min(num_questions, len(questions)))
-
-async def generate_with_deepseek(session: aiohttp.ClientSession, question: str, api_key: str) -> Dict:
-    """使用DeepSeek API生成思辨数据"""
+    # 随机组合常会重复或只差一两个字，先去掉近似重复的问题，避免为它们浪费API调用
+    questions, duplicates = filter_near_duplicates(questions)
+    if duplicates:
+        print(f"🧹 过滤近似重复问题 {len(duplicates)} 个（节省 {len(duplicates)} 次生成）")
     
-    prompt = f"""请基于以下哲学问题，生成包含不同立场、支持论据和反问的思辨图谱数据。请严格按照以下JSON格式输出：
-
-{{
-  "question": "{question}",
-  "standpoints": [
-    {{
-      "id": "standpoint_1",
-      "text": "[立场1的陈述]",
-      "arguments": [
-        {{
-          "id": "argument_1_1",
-          "text": "[支持立场1的论据1]"
-        }},
-        {{
-          "id": "argument_1_2",
-          "text": "[支持立场1的论据2]"
-        }}
-      ]
-    }},
-    {{
-      "id": "standpoint_2",
-      "text": "[立场2的陈述]",
-      "arguments": [
-        {{
-          "id": "argument_2_1",
-          "text": "[支持立场2的论据1]"
-        }},
-        {{
-          "id": "argument_2_2",
-          "text": "[支持立场2的论据2]"
-        }}
-      ]
-    }}
-  ],
-  "counter_questions": [
-    {{
-      "id": "counter_question_1",
-      "text": "[针对上述立场或论据的反问1]"
-    }},
-    {{
-      "id": "counter_question_2",
-      "text": "[针对上述立场或论据的反问2]"
-    }}
-  ]
-}}
-
-要求：
-1. 立场应该对立或互补，体现问题的复杂性
-2. 论据要有哲学深度，避免常识性表述
-3. 反问要能引发深层思考，挑战现有观点
-4. 确保JSON格式正确，所有字段完整
-
-问题：{question}"""
-
-    payload = {
-        "model": "deepseek-chat",
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.7,
-        "max_tokens": 2000
-    }
-    
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    
-    try:
-        async with session.post(
-            "https://api.deepseek.com/v1/chat/completions",
-            json=payload,
-            headers=headers
-        ) as response:
-            if response.status == 200:
-                result = await response.json()
-                content = result["choices"][0]["message"]["content"].strip()
-                
-                # 尝试解析JSON
-                try:
-                    # 提取JSON部分
-                    start = content.find('{')
-                    end = content.rfind('}') + 1
-                    if start != -1 and end != 0:
-                        json_content = content[start:end]
-                        data = json.loads(json_content)
-                        return data
-                    else:
-                        print(f"⚠️  无法提取JSON: {question}")
-                        return None
-                except json.JSONDecodeError as e:
-                    print(f"⚠️  JSON解析失败: {question} - {e}")
-                    return None
-            else:
-                print(f"❌ API请求失败: {response.status}")
-                return None
-    except Exception as e:
-        print(f"❌ 请求异常: {e}")
-        return None
+    return random.sample(questions, min(num_questions, len(questions)))
 
 def convert_to_training_format(data: Dict) -> List[Dict]:
     """将思辨数据转换为训练格式"""
@@ -235,8 +149,11 @@ def convert_to_training_format(data: Dict) -> List[Dict]:
     
     return training_samples
 
-async def generate_training_data(api_key: str, num_samples: int = 100, output_path: str = None):
-    """批量生成训练数据"""
+async def generate_training_data(api_key: str, num_samples: int = 100, output_path: str = None,
+                                 concurrency: int = 3, cache: CompletionCache = None,
+                                 api_base: str = DEEPSEEK_API_BASE, run_log: RunLog = None,
+                                 questions_per_request: int = 1):
+    """批量生成训练数据（并发由 AsyncDeepSeekAPI 控制，失败请求自动重试，结果经过结构校验）"""
     
     print(f"🚀 开始生成 {num_samples} 个训练样本...")
     
@@ -246,30 +163,36 @@ async def generate_training_data(api_key: str, num_samples: int = 100, output_pa
     all_training_samples = []
     successful_generations = 0
     
-    async with aiohttp.ClientSession() as session:
-        # 限制并发数量以避免API限制
-        semaphore = asyncio.Semaphore(3)
-        
-        async def process_question(question):
-            async with semaphore:
-                print(f"📝 处理问题: {question}")
-                data = await generate_with_deepseek(session, question, api_key)
-                
+    # 限制并发数量以避免API限制
+    async with AsyncDeepSeekAPI(api_key=api_key, api_base=api_base, max_concurrency=concurrency, cache=cache,
+                                run_log=run_log) as api:
+        async def process_questions(group):
+            print(f"📝 处理问题: {'；'.join(group)}")
+            seeds = [{"question": q, "category": QUESTION_DOMAINS.get(q, "综合")} for q in group]
+            # 多个问题合并为一次请求时，只有生成失败的问题会单独重试
+            debates = await api.generate_debate_batch(seeds)
+            
+            group_samples = []
+            for question, data in zip(group, debates):
                 if data:
-                    training_samples = convert_to_training_format(data)
-                    return training_samples
-                return []
+                    group_samples.append(convert_to_training_format(data))
+                else:
+                    print(f"⚠️  生成失败: {question}")
+            return group_samples
         
         # 并发处理所有问题
-        tasks = [process_question(q) for q in questions]
+        groups = [questions[i:i + questions_per_request] for i in range(0, len(questions), questions_per_request)]
+        tasks = [process_questions(group) for group in groups]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         for result in results:
-            if isinstance(result, list) and result:
-                all_training_samples.extend(result)
-                successful_generations += 1
-            elif isinstance(result, Exception):
+            if isinstance(result, Exception):
                 print(f"❌ 处理异常: {result}")
+                continue
+            for training_samples in result:
+                if training_samples:
+                    all_training_samples.extend(training_samples)
+                    successful_generations += 1
     
     print(f"✅ 成功生成 {len(all_training_samples)} 个训练样本 (成功率: {successful_generations}/{len(questions)})")
     
@@ -291,15 +214,41 @@ def main():
     parser.add_argument("--api_key", required=True, help="DeepSeek API密钥")
     parser.add_argument("--num_samples", type=int, default=100, help="生成样本数量")
     parser.add_argument("--output_path", required=True, help="输出文件路径")
+    parser.add_argument("--concurrency", type=int, default=3, help="同时进行的API请求数")
+    parser.add_argument("--cache_mode", choices=CACHE_MODES, default="readwrite",
+                        help="补全缓存模式：readwrite 命中即重放并记录新结果，readonly 只重放不请求API，off 关闭")
+    parser.add_argument("--cache_path", default=LLM_CACHE_PATH, help="补全缓存SQLite文件路径")
+    parser.add_argument("--questions_per_request", type=int, default=QUESTIONS_PER_REQUEST,
+                        help="每次API请求合并的问题数，1 表示每个问题单独请求")
+    parser.add_argument("--run_log", help="调用日志(JSONL)路径，默认写入 logs/generation_runs/")
+    parser.add_argument("--api_base", default=DEEPSEEK_API_BASE, help="OpenAI兼容的API地址（例如本地LLM服务器）")
     
     args = parser.parse_args()
     
+    cache = CompletionCache(args.cache_path, mode=args.cache_mode)
+    run_log = RunLog(args.run_log)
+    
     # 运行数据生成
-    asyncio.run(generate_training_data(
-        api_key=args.api_key,
-        num_samples=args.num_samples,
-        output_path=args.output_path
-    ))
+    try:
+        asyncio.run(generate_training_data(
+            api_key=args.api_key,
+            num_samples=args.num_samples,
+            output_path=args.output_path,
+            concurrency=args.concurrency,
+            cache=cache,
+            api_base=args.api_base,
+            run_log=run_log,
+            questions_per_request=args.questions_per_request
+        ))
+    finally:
+        print(f"🗄️  补全缓存: {cache.stats()}")
+        cache.close()
+        run_log.close()
+        overall = run_log.summary()["overall"]
+        if overall["calls"]:
+            print(f"📈 Token用量: 提示 {overall['prompt_tokens']} + 补全 {overall['completion_tokens']}，"
+                  f"被拒输出浪费 {overall['wasted_tokens']}，费用 {overall['cost']:.4f}")
+        print(f"📄 调用日志: {run_log.path}，汇总: {run_log.write_summary()}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+本地 OpenAI/DeepSeek 兼容补全服务器（离线压测用）
+实现 POST /v1/chat/completions（以及 /chat/completions），返回从
+data/philosophical_debates.json 中取出的真实思辨图谱数据，question 字段替换为请求中的问题；
+多问题批量请求返回 {"debates": [...]}。
+支持：
+  - 可配置的时延分布（首字节时延）和输出速率（tokens/s）
+  - stream=true 的 SSE 流式输出，包括 stream_options.include_usage
+  - 429（带 Retry-After）/ 5xx 注入，以及服务端并发上限（超出即 429）
+  - 截断 JSON、结构错误（id 错位）和语法错误的 JSON 输出
+GET /stats 返回各类响应的计数，POST /stats/reset 清零。
+
+用法示例:
+  python scripts/local_llm_server.py --port 8100 --latency lognormal:800:0.4 --tokens_per_second 60 \\
+      --rate_429 0.05 --rate_5xx 0.02 --rate_truncated 0.02 --rate_malformed 0.02
+然后将 DEEPSEEK_API_BASE（或各脚本的 --api_base）指向 http://127.0.0.1:8100/v1
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEBATES_FILE = Path(__file__).parent.parent / "data" / "philosophical_debates.json"
+DEBATE_FIELDS = ("question", "standpoints", "counter_questions")
+# 批量请求的最后一段是编号问题列表（见 deepseek_api.build_batch_messages）
+NUMBERED_QUESTION = re.compile(r"^\d+\.\s+(.+)$")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计 token 数：中文约每字一个 token，英文约每3字节一个"""
+    return max(1, len(text.encode("utf-8")) // 3)
+
+
+@dataclass
+class LatencyDistribution:
+    """时延分布，单位毫秒。spec 形如 fixed:200 / uniform:100:500 / normal:300:50 / lognormal:300:0.5"""
+    kind: str = "fixed"
+    params: List[float] = field(default_factory=lambda: [0.0])
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, *params = spec.split(":")
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"无效的时延分布: {spec}")
+        return cls(kind, [float(p) for p in params])
+
+    def sample(self, rng: random.Random) -> float:
+        """返回秒数"""
+        if self.kind == "fixed":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            value = rng.gauss(*self.params)
+        else:
+            # params: 中位数(ms)、sigma
+            value = self.params[0] * rng.lognormvariate(0, self.params[1])
+        return max(0.0, value) / 1000
+
+
+@dataclass
+class ServerConfig:
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    tokens_per_second: float = 0.0  # 0 表示输出不耗时
+    chunk_chars: int = 8
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    rate_truncated: float = 0.0
+    rate_malformed: float = 0.0
+    retry_after: float = 1.0
+    max_concurrency: int = 0  # 0 表示不限
+    seed: Optional[int] = None
+
+
+class CompletionSource:
+    """按请求生成补全内容并统计结果"""
+
+    def __init__(self, config: ServerConfig, debates_file: Path = DEBATES_FILE):
+        with open(debates_file, "r", encoding="utf-8") as f:
+            self.debates = [{k: d[k] for k in DEBATE_FIELDS} for d in json.load(f)]
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.stats: Counter = Counter()
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def questions_of(messages: List[Dict[str, str]]) -> List[str]:
+        """请求中的问题；批量请求返回多个"""
+        user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        block = user.rsplit("\n\n", 1)[-1].strip()
+        lines = block.splitlines()
+        matches = [NUMBERED_QUESTION.match(line.strip()) for line in lines]
+        if len(lines) > 1 and all(matches):
+            return [match.group(1) for match in matches]
+        return [block]
+
+    def debate_for(self, question: str) -> Dict[str, Any]:
+        debate = copy.deepcopy(self.rng.choice(self.debates))
+        debate["question"] = question or debate["question"]
+        return debate
+
+    def choose_outcome(self) -> str:
+        """ok / 429 / 5xx / truncated / malformed"""
+        config = self.config
+        with self._lock:
+            if config.max_concurrency and self.in_flight >= config.max_concurrency:
+                return "429"
+            roll = self.rng.random()
+        for outcome, rate in (("429", config.rate_429), ("5xx", config.rate_5xx),
+                              ("truncated", config.rate_truncated), ("malformed", config.rate_malformed)):
+            if roll < rate:
+                return outcome
+            roll -= rate
+        return "ok"
+
+    def content_for(self, questions: List[str], outcome: str) -> str:
+        debates = [self.debate_for(question) for question in questions]
+        document = debates[0] if len(debates) == 1 else {"debates": debates}
+        if outcome == "malformed":
+            if self.rng.random() < 0.5:
+                # 结构错误：某个立场的 id 错位，流式校验可以尽早发现；批量时只影响其中一个
+                self.rng.choice(debates)["standpoints"][0]["id"] = "standpoint_2"
+                return json.dumps(document, ensure_ascii=False, indent=2)
+            text = json.dumps(document, ensure_ascii=False, indent=2)
+            # 语法错误：去掉中间一个逗号
+            cut = text.find(",", len(text) // 3)
+            return text[:cut] + text[cut + 1:]
+        text = json.dumps(document, ensure_ascii=False, indent=2)
+        if outcome == "truncated":
+            return text[:self.rng.randint(len(text) // 4, len(text) * 3 // 4)]
+        return text
+
+    def enter(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+            self.stats["requests"] += 1
+
+
+def create_app(config: ServerConfig, debates_file: Path = DEBATES_FILE) -> FastAPI:
+    source = CompletionSource(config, debates_file)
+    app = FastAPI(title="OntoThink local LLM server")
+    app.state.source = source
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "deepseek-chat")
+        messages = body.get("messages", [])
+        outcome = source.choose_outcome()
+        source.record(outcome)
+
+        if outcome == "429":
+            return JSONResponse({"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                                status_code=429, headers={"Retry-After": f"{config.retry_after:g}"})
+        if outcome == "5xx":
+            status = source.rng.choice([500, 502, 503])
+            return JSONResponse({"error": {"message": "Server error", "type": "server_error"}}, status_code=status)
+
+        content = source.content_for(source.questions_of(messages), outcome)
+        prompt_tokens = estimate_tokens("".join(m.get("content", "") for m in messages))
+        completion_tokens = estimate_tokens(content)
+        max_tokens = body.get("max_tokens")
+        finish_reason = "length" if outcome == "truncated" else "stop"
+        if max_tokens and completion_tokens > max_tokens:
+            content = content[:max_tokens * 3]
+            completion_tokens, finish_reason = max_tokens, "length"
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        first_byte = config.latency.sample(source.rng)
+        per_char = (completion_tokens / config.tokens_per_second / max(1, len(content))
+                    if config.tokens_per_second else 0.0)
+
+        if not body.get("stream"):
+            source.enter()
+            try:
+                await asyncio.sleep(first_byte + per_char * len(content))
+            finally:
+                source.leave()
+            return {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": finish_reason}],
+                "usage": usage,
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        async def events():
+            source.enter()
+            try:
+                await asyncio.sleep(first_byte)
+                base = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model}
+                first = {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""},
+                                              "finish_reason": None}]}
+                yield f"data: {json.dumps(first, ensure_ascii=False)}\n\n"
+                step = config.chunk_chars
+                for i in range(0, len(content), step):
+                    piece = content[i:i + step]
+                    chunk = {**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    if per_char:
+                        await asyncio.sleep(per_char * len(piece))
+                last = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]}
+                yield f"data: {json.dumps(last)}\n\n"
+                if include_usage:
+                    yield f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                source.leave()
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    app.post("/v1/chat/completions")(chat_completions)
+    app.post("/chat/completions")(chat_completions)
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "deepseek-chat", "object": "model", "owned_by": "local"}]}
+
+    @app.get("/stats")
+    async def stats():
+        return dict(source.stats)
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        source.stats.clear()
+        return {}
+
+    return app
+
+
+class BackgroundServer:
+    """在后台线程中运行服务器，供压测脚本使用"""
+
+    def __init__(self, config: ServerConfig, host: str = "127.0.0.1", port: int = 0):
+        import socket
+        if not port:
+            with socket.socket() as s:
+                s.bind((host, 0))
+                port = s.getsockname()[1]
+        self.app = create_app(config)
+        self.base_url = f"http://{host}:{port}"
+        self.server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning",
+                                                    access_log=False))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def api_base(self) -> str:
+        return f"{self.base_url}/v1"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(self.app.state.source.stats)
+
+    def __enter__(self) -> "BackgroundServer":
+        self.thread.start()
+        deadline = time.time() + 10
+        while not self.server.started:
+            if time.time() > deadline:
+                raise RuntimeError("本地LLM服务器启动超时")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", default="fixed:200", help="首字节时延分布(ms)，如 lognormal:800:0.4")
+    parser.add_argument("--tokens_per_second", type=float, default=0.0, help="输出速率，0 表示立即输出")
+    parser.add_argument("--chunk_chars", type=int, default=8, help="流式输出每个事件的字符数")
+    parser.add_argument("--rate_429", type=float, default=0.0, help="返回 429 的比例")
+    parser.add_argument("--rate_5xx", type=float, default=0.0, help="返回 5xx 的比例")
+    parser.add_argument("--rate_truncated", type=float, default=0.0, help="输出截断 JSON 的比例")
+    parser.add_argument("--rate_malformed", type=float, default=0.0, help="输出结构或语法错误 JSON 的比例")
+    parser.add_argument("--retry_after", type=float, default=1.0, help="429 响应的 Retry-After 秒数")
+    parser.add_argument("--server_max_concurrency", type=int, default=0, help="服务端并发上限，超出返回 429")
+    parser.add_argument("--server_seed", type=int, help="服务器随机种子")
+
+
+def config_from_args(args) -> ServerConfig:
+    return ServerConfig(
+        latency=LatencyDistribution.parse(args.latency),
+        tokens_per_second=args.tokens_per_second,
+        chunk_chars=args.chunk_chars,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        rate_truncated=args.rate_truncated,
+        rate_malformed=args.rate_malformed,
+        retry_after=args.retry_after,
+        max_concurrency=args.server_max_concurrency,
+        seed=args.server_seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 OpenAI/DeepSeek 兼容补全服务器")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8100, help="监听端口")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    config = config_from_args(args)
+    print(f"🚀 本地LLM服务器: http://{args.host}:{args.port}/v1 (时延 {args.latency})")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
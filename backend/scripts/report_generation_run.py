@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+生成运行报告
+读取 DatasetExpander / expand_training_data.py 写出的调用日志（logs/generation_runs/*.jsonl），
+按种子问题的类别和难度汇总：调用结果、重试次数、Token用量、每个合格思辨图谱的Token数和费用、
+被拒输出浪费的Token、补全速率(tokens/s)以及时延分位数。
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.data_processing.telemetry import load_run_log, summarize_run
+
+
+def format_row(name: str, stats: dict) -> str:
+    tokens = stats["tokens_per_accepted"]
+    cost = stats["cost_per_accepted"]
+    rate = stats["completion_tokens_per_second"]
+    return (f"  {name:<16} {stats['accepted']:>4}/{stats['questions']:<4} {stats['api_calls']:>5} "
+            f"{stats['retries']:>5} {stats['prompt_tokens']:>9} {stats['completion_tokens']:>9} "
+            f"{stats['wasted_tokens']:>8} {'-' if tokens is None else round(tokens):>8} "
+            f"{'-' if cost is None else f'{cost:.4f}':>8} {'-' if rate is None else f'{rate:.1f}':>7} "
+            f"{stats['latency_p50']:>6.2f} {stats['latency_p95']:>6.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成运行报告")
+    parser.add_argument("run_logs", nargs="+", help="调用日志(JSONL)，多个文件合并统计")
+    parser.add_argument("--output", help="将汇总写入JSON文件")
+    args = parser.parse_args()
+
+    calls = [call for path in args.run_logs for call in load_run_log(path)]
+    if not calls:
+        print("⚠️  调用日志为空")
+        return 1
+    summary = summarize_run(calls)
+    overall = summary["overall"]
+
+    print(f"📊 {len(calls)} 次调用，耗时 {overall['wall_seconds']:.1f}s，结果 {overall['outcomes']}")
+    print(f"  {'类别/难度':<13} {'合格/问题':>9} {'调用':>5} {'重试':>5} {'提示Token':>9} {'补全Token':>9} "
+          f"{'浪费':>8} {'Token/个':>8} {'费用/个':>8} {'tok/s':>7} {'p50':>6} {'p95':>6}")
+    for group, stats in summary["by_group"].items():
+        print(format_row(group, stats))
+    print(format_row("合计", overall))
+    if overall["aborted_chars"]:
+        print(f"✂️  流式中止前已接收 {overall['aborted_chars']} 个字符（中止的调用没有usage）")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"📄 结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
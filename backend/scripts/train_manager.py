@@ -10,7 +10,7 @@ import os
 import json
 import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
 import shutil
 
 class OntoThinkTrainingManager:
@@ -148,23 +148,21 @@ class OntoThinkTrainingManager:
             print(f"❌ 数据优化异常: {e}")
             return False
     
-    def start_training(self) -> bool:
-        """启动模型训练"""
-        print("🚀 启动模型训练...")
-        
-        # 创建输出目录
+    def write_training_config(self) -> Path:
+        """创建输出目录并保存本次训练配置"""
         output_dir = Path(self.config["model"]["output_dir"])
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        # 保存训练配置
         config_file = output_dir / "training_config.json"
         with open(config_file, 'w', encoding='utf-8') as f:
             json.dump(self.config, f, ensure_ascii=False, indent=2)
-        
-        # 构建训练命令
+        return output_dir
+    
+    def build_training_command(self) -> List[str]:
+        """构建torchrun训练命令"""
         training_script = self.base_dir / "backend" / "app" / "training" / "chatglm3_ontothink_training.py"
         
-        cmd = [
+        return [
             "torchrun",
             f"--nproc_per_node={self.config['training']['num_gpus']}",
             "--master_port=29500",
@@ -190,8 +188,9 @@ class OntoThinkTrainingManager:
             "--logging_steps", "10",
             "--report_to", "tensorboard"
         ]
-        
-        # 设置环境变量
+    
+    def build_training_env(self) -> Dict[str, str]:
+        """构建训练进程的环境变量"""
         env = os.environ.copy()
         env.update({
             "CUDA_VISIBLE_DEVICES": ",".join(map(str, range(self.config["training"]["num_gpus"]))),
@@ -199,6 +198,18 @@ class OntoThinkTrainingManager:
             "NCCL_IB_DISABLE": "1",
             "NCCL_P2P_DISABLE": "1"
         })
+        return env
+    
+    def start_training(self) -> bool:
+        """启动模型训练"""
+        print("🚀 启动模型训练...")
+        
+        # 创建输出目录并保存训练配置
+        output_dir = self.write_training_config()
+        
+        # 构建训练命令和环境变量
+        cmd = self.build_training_command()
+        env = self.build_training_env()
         
         # 启动训练
         log_file = output_dir / f"training_{int(time.time())}.log"
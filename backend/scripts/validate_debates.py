@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+思辨图谱数据集结构校验
+按 app.data_processing.debate_schema 的统一规则校验 JSONL（每行一条）或 JSON 数组文件，
+JSONL 文件按字节区间切分后由多个进程并行校验，输出错误路径统计和出错样例。
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.data_processing.debate_schema import validate_jsonl, validate_records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="思辨图谱数据集结构校验")
+    parser.add_argument("path", help="JSONL 或 JSON 数组文件")
+    parser.add_argument("--workers", type=int, default=0, help="并行进程数（0 表示CPU核数）")
+    parser.add_argument("--chunk_mb", type=int, default=32, help="每个任务的字节区间大小(MB)")
+    parser.add_argument("--max_samples", type=int, default=20, help="最多输出的出错样例数")
+    parser.add_argument("--output", help="将校验报告写入JSON文件")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.path.endswith(".json"):
+        with open(args.path, "r", encoding="utf-8") as f:
+            report = validate_records(json.load(f), args.max_samples)
+    else:
+        report = validate_jsonl(args.path, workers=args.workers or None,
+                                chunk_bytes=args.chunk_mb * 1024 * 1024, max_samples=args.max_samples)
+    elapsed = time.perf_counter() - start
+
+    print(f"📊 共 {report.records} 条记录，合规 {report.valid} 条，不合规 {report.invalid} 条"
+          f"（其中JSON解析失败 {report.invalid_json} 条），耗时 {elapsed:.2f}s")
+    if report.issue_counts:
+        print("\n🔎 错误路径统计:")
+        for path, count in sorted(report.issue_counts.items(), key=lambda item: -item[1]):
+            print(f"   {count:>8}  {path}")
+    if report.samples:
+        print("\n📝 出错样例:")
+        for line, issues in report.samples:
+            print(f"   第 {line} 条: {'; '.join(issues[:3])}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "records": report.records,
+                "valid": report.valid,
+                "invalid": report.invalid,
+                "invalid_json": report.invalid_json,
+                "issue_counts": report.issue_counts,
+                "samples": [{"line": line, "issues": issues} for line, issues in report.samples],
+                "elapsed_seconds": elapsed,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n📄 报告已写入 {args.output}")
+
+    sys.exit(0 if report.invalid == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
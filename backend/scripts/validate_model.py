@@ -10,8 +10,15 @@ import torch
 from transformers import AutoTokenizer, AutoModelForCausalLM
 from peft import PeftModel
 import time
+import sys
+from pathlib import Path
 from typing import Dict, List
 
+# Add the project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.data_processing.debate_schema import parse_and_validate
+
 def load_model_and_tokenizer(model_path: str, base_model: str = "THUDM/chatglm3-6b"):
     """加载训练后的模型和tokenizer"""
     print(f"🔄 正在加载模型: {model_path}")
@@ -68,52 +75,44 @@ def generate_ontothink_response(model, tokenizer, question: str, max_length: int
     return response.strip()
 
 def validate_json_structure(response: str) -> Dict:
-    """验证生成的JSON结构是否符合OntoThink格式"""
-    try:
-        data = json.loads(response)
-        required_keys = ["question", "standpoints", "counter_questions"]
-        
-        validation_result = {
-            "valid_json": True,
-            "has_required_keys": all(key in data for key in required_keys),
-            "standpoints_count": len(data.get("standpoints", [])),
-            "counter_questions_count": len(data.get("counter_questions", [])),
-            "detailed_structure": {}
-        }
-        
-        # 验证standpoints结构
-        if "standpoints" in data:
-            standpoints_valid = all(
-                "id" in sp and "text" in sp and "arguments" in sp
-                for sp in data["standpoints"]
-            )
-            validation_result["detailed_structure"]["standpoints_valid"] = standpoints_valid
-        
-        # 验证counter_questions结构
-        if "counter_questions" in data:
-            cq_valid = all(
-                "id" in cq and "text" in cq
-                for cq in data["counter_questions"]
-            )
-            validation_result["detailed_structure"]["counter_questions_valid"] = cq_valid
-        
-        return validation_result
-    
-    except json.JSONDecodeError:
+    """验证生成的JSON结构是否符合OntoThink格式（规则见 app.data_processing.debate_schema）"""
+    data, issues = parse_and_validate(response)
+    if data is None:
         return {
             "valid_json": False,
+            "valid_schema": False,
             "has_required_keys": False,
             "standpoints_count": 0,
             "counter_questions_count": 0,
+            "errors": [str(issue) for issue in issues],
             "detailed_structure": {}
         }
 
+    if not isinstance(data, dict):
+        data = {}
+    required_keys = ["question", "standpoints", "counter_questions"]
+    standpoints = data.get("standpoints")
+    counter_questions = data.get("counter_questions")
+    return {
+        "valid_json": True,
+        "valid_schema": not issues,
+        "has_required_keys": all(key in data for key in required_keys),
+        "standpoints_count": len(standpoints) if isinstance(standpoints, list) else 0,
+        "counter_questions_count": len(counter_questions) if isinstance(counter_questions, list) else 0,
+        "errors": [str(issue) for issue in issues],
+        "detailed_structure": {
+            "standpoints_valid": not any(i.path.startswith("$.standpoints") for i in issues),
+            "counter_questions_valid": not any(i.path.startswith("$.counter_questions") for i in issues),
+        }
+    }
+
 def run_validation(model, tokenizer, test_questions: List[str]) -> Dict:
     """运行完整的模型验证"""
     results = {
         "total_questions": len(test_questions),
         "successful_generations": 0,
         "valid_json_count": 0,
+        "valid_schema_count": 0,
         "average_standpoints": 0,
         "average_counter_questions": 0,
         "detailed_results": []
@@ -147,6 +146,8 @@ def run_validation(model, tokenizer, test_questions: List[str]) -> Dict:
                 results["valid_json_count"] += 1
                 total_standpoints += validation["standpoints_count"]
                 total_counter_questions += validation["counter_questions_count"]
+            if validation["valid_schema"]:
+                results["valid_schema_count"] += 1
             
             results["detailed_results"].append(result)
             
@@ -207,6 +208,7 @@ def main():
     print(f"   - 总问题数: {results['total_questions']}")
     print(f"   - 成功生成: {results['successful_generations']}")
     print(f"   - 有效JSON: {results['valid_json_count']}")
+    print(f"   - 结构合规: {results['valid_schema_count']}")
     print(f"   - 平均立场数: {results['average_standpoints']:.1f}")
     print(f"   - 平均反问数: {results['average_counter_questions']:.1f}")
     print(f"   - 成功率: {results['valid_json_count']/results['total_questions']*100:.1f}%")
@@ -12,6 +12,10 @@ from typing import List, Dict
 
 # 添加燧原collie路径
 sys.path.append("../llm_scripts")
+# 共用后端的思辨图谱结构校验
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "backend"))
+
+from app.data_processing.debate_schema import parse_and_validate
 
 try:
     import torch
@@ -116,43 +120,22 @@ class OntoThinkEnflameValidator:
             return f"生成失败: {e}"
     
     def validate_json_format(self, response: str) -> Dict:
-        """验证生成的JSON格式"""
-        try:
-            # 提取JSON部分
-            start = response.find('{')
-            end = response.rfind('}') + 1
-            
-            if start == -1 or end == 0:
-                return {"valid": False, "error": "未找到JSON格式"}
-            
-            json_content = response[start:end]
-            data = json.loads(json_content)
-            
-            # 检查必要字段
-            required_fields = ["question", "standpoints", "counter_questions"]
-            missing_fields = [field for field in required_fields if field not in data]
-            
-            if missing_fields:
-                return {
-                    "valid": False, 
-                    "error": f"缺少字段: {missing_fields}"
-                }
-            
-            # 统计内容
-            standpoints_count = len(data.get("standpoints", []))
-            counter_questions_count = len(data.get("counter_questions", []))
-            
+        """验证生成的JSON格式（规则见 app.data_processing.debate_schema）"""
+        data, issues = parse_and_validate(response)
+        if data is None:
+            return {"valid": False, "error": f"JSON解析错误: {issues[0].message}"}
+        if issues:
             return {
-                "valid": True,
-                "standpoints_count": standpoints_count,
-                "counter_questions_count": counter_questions_count,
-                "json_data": data
+                "valid": False,
+                "error": "; ".join(str(issue) for issue in issues[:5]),
+                "errors": [str(issue) for issue in issues]
             }
-            
-        except json.JSONDecodeError as e:
-            return {"valid": False, "error": f"JSON解析错误: {e}"}
-        except Exception as e:
-            return {"valid": False, "error": f"验证错误: {e}"}
+        return {
+            "valid": True,
+            "standpoints_count": len(data["standpoints"]),
+            "counter_questions_count": len(data["counter_questions"]),
+            "json_data": data
+        }
     
     def run_validation(self, test_questions: List[str]) -> Dict:
         """运行完整验证"""